@@ -0,0 +1,250 @@
+"""
+Synthetic .pptx files for benchmarks, written straight as Office Open XML with zipfile and Pillow
+
+    python benchmarks/generate.py out.pptx --slides 3 --shapes 6 --text 200 --images 2 --image-size 1200
+    python benchmarks/generate.py out.pptx --inherit master --transitions 1 --animations 2
+"""
+import argparse
+import random
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw
+
+SLIDE_WIDTH, SLIDE_HEIGHT = 12192000, 6858000
+NAMESPACES = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+              'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+              'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+CT = "application/vnd.openxmlformats-officedocument.presentationml"
+WORDS = ("презентация", "слайд", "информатика", "экзамен", "текст", "картинка", "макет", "шрифт", "блок", "задание")
+
+TREE_START = ('<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+              '<p:grpSpPr/>')
+TREE_END = '</p:spTree></p:cSld>'
+# boxes of the title placeholder on the layout and on the master, slides take them with inherit
+LAYOUT_TITLE = (838200, 365125, 10515600, 1325563)
+MASTER_TITLE = (457200, 274638, 11277600, 1143000)
+CLR_MAP = ('<p:clrMap bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" '
+           'accent3="accent3" accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" '
+           'folHlink="folHlink"/>')
+CLR_OVERRIDE = '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr>'
+THEME = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" name="Benchmark"><a:themeElements>'
+    '<a:clrScheme name="Benchmark">'
+    '<a:dk1><a:srgbClr val="000000"/></a:dk1><a:lt1><a:srgbClr val="FFFFFF"/></a:lt1>'
+    '<a:dk2><a:srgbClr val="44546A"/></a:dk2><a:lt2><a:srgbClr val="E7E6E6"/></a:lt2>'
+    '<a:accent1><a:srgbClr val="4472C4"/></a:accent1><a:accent2><a:srgbClr val="ED7D31"/></a:accent2>'
+    '<a:accent3><a:srgbClr val="A5A5A5"/></a:accent3><a:accent4><a:srgbClr val="FFC000"/></a:accent4>'
+    '<a:accent5><a:srgbClr val="5B9BD5"/></a:accent5><a:accent6><a:srgbClr val="70AD47"/></a:accent6>'
+    '<a:hlink><a:srgbClr val="0563C1"/></a:hlink><a:folHlink><a:srgbClr val="954F72"/></a:folHlink></a:clrScheme>'
+    '<a:fontScheme name="Benchmark">'
+    '<a:majorFont><a:latin typeface="Calibri Light"/><a:ea typeface=""/><a:cs typeface=""/></a:majorFont>'
+    '<a:minorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont></a:fontScheme>'
+    '<a:fmtScheme name="Benchmark"><a:fillStyleLst>' + '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>' * 3 +
+    '</a:fillStyleLst><a:lnStyleLst>' +
+    '<a:ln w="6350"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>' * 3 +
+    '</a:lnStyleLst><a:effectStyleLst>' + '<a:effectStyle><a:effectLst/></a:effectStyle>' * 3 +
+    '</a:effectStyleLst><a:bgFillStyleLst>' + '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>' * 3 +
+    '</a:bgFillStyleLst></a:fmtScheme></a:themeElements></a:theme>'
+)
+
+
+def _rels(relationships):
+    items = "".join(f'<Relationship Id="rId{number}" Type="{REL}/{typeof}" Target="{target}"/>'
+                    for number, (typeof, target) in enumerate(relationships, start=1))
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{items}</Relationships>')
+
+
+def _xml(root, body, attributes=""):
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<p:{root} {NAMESPACES}{attributes}>{body}</p:{root}>')
+
+
+def _xfrm(x, y, cx, cy):
+    return f'<a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+
+
+def _title(shape_id, text, box=LAYOUT_TITLE):
+    """Title placeholder, without box it has no geometry of its own and inherits it"""
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Title {shape_id}"/><p:cNvSpPr/>'
+            f'<p:nvPr><p:ph type="title"/></p:nvPr></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(*box) if box else ""}</p:spPr>'
+            f'<p:txBody><a:bodyPr/><a:p><a:r><a:rPr lang="ru-RU" sz="4000"/><a:t>{escape(text)}</a:t></a:r></a:p>'
+            f'</p:txBody></p:sp>')
+
+
+def _text_box(shape_id, box, text, size):
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="TextBox {shape_id}"/><p:cNvSpPr txBox="1"/><p:nvPr/>'
+            f'</p:nvSpPr><p:spPr>{_xfrm(*box)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+            f'<p:txBody><a:bodyPr wrap="square"/><a:p><a:r><a:rPr lang="ru-RU" sz="{size * 100}">'
+            f'<a:latin typeface="Calibri"/></a:rPr><a:t>{escape(text)}</a:t></a:r></a:p></p:txBody></p:sp>')
+
+
+def _picture(shape_id, rel_id, box, crop):
+    src_rect = f'<a:srcRect l="{crop}" t="{crop}" r="{crop}" b="{crop}"/>' if crop else ""
+    return (f'<p:pic><p:nvPicPr><p:cNvPr id="{shape_id}" name="Picture {shape_id}"/>'
+            f'<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+            f'<p:blipFill><a:blip r:embed="{rel_id}"/>{src_rect}<a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+            f'<p:spPr>{_xfrm(*box)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>')
+
+
+def _timing(shape_ids):
+    """Main sequence with an appear entrance effect on click for every shape"""
+    effects, node = [], 3
+    for shape_id in shape_ids:
+        effects.append(
+            f'<p:par><p:cTn id="{node}" fill="hold"><p:stCondLst><p:cond delay="indefinite"/></p:stCondLst>'
+            f'<p:childTnLst><p:par><p:cTn id="{node + 1}" fill="hold"><p:stCondLst><p:cond delay="0"/></p:stCondLst>'
+            f'<p:childTnLst><p:par><p:cTn id="{node + 2}" presetID="1" presetClass="entr" presetSubtype="0" '
+            f'fill="hold" nodeType="clickEffect"><p:stCondLst><p:cond delay="0"/></p:stCondLst><p:childTnLst>'
+            f'<p:set><p:cBhvr><p:cTn id="{node + 3}" dur="1" fill="hold"><p:stCondLst><p:cond delay="0"/>'
+            f'</p:stCondLst></p:cTn><p:tgtEl><p:spTgt spid="{shape_id}"/></p:tgtEl><p:attrNameLst>'
+            f'<p:attrName>style.visibility</p:attrName></p:attrNameLst></p:cBhvr><p:to><p:strVal val="visible"/>'
+            f'</p:to></p:set></p:childTnLst></p:cTn></p:par></p:childTnLst></p:cTn></p:par></p:childTnLst>'
+            f'</p:cTn></p:par>')
+        node += 4
+    return ('<p:timing><p:tnLst><p:par><p:cTn id="1" dur="indefinite" restart="never" nodeType="tmRoot">'
+            '<p:childTnLst><p:seq concurrent="1" nextAc="seek"><p:cTn id="2" dur="indefinite" nodeType="mainSeq">'
+            f'<p:childTnLst>{"".join(effects)}</p:childTnLst></p:cTn></p:seq></p:childTnLst></p:cTn></p:par>'
+            '</p:tnLst></p:timing>')
+
+
+def make_image(size, seed, image_format="PNG"):
+    """Bytes of a size x size*3/4 picture with random rectangles, different for every seed"""
+    rng = random.Random(seed)
+    width, height = size, max(size * 3 // 4, 1)
+    image = Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(width), rng.randrange(height)
+        draw.rectangle([x, y, x + rng.randrange(width // 2 + 1), y + rng.randrange(height // 2 + 1)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    data = BytesIO()
+    image.save(data, image_format, quality=85)
+    return data.getvalue()
+
+
+def text_of(length, rng):
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:length] or "текст"
+
+
+def generate(path, slides=3, shapes=4, text=60, images=2, image_size=800, crop=0, scale=1.0, seed=0,
+             references=None, inherit=None, transitions=0, animations=0):
+    """
+    Writes a presentation with slides slides, each has a title, shapes text boxes with text characters of text and
+    images pictures of image_size px width. crop is srcRect of every side in 1/1000 of percent, scale stretches
+    pictures horizontally. Images are also written to references folder if it's given.
+    inherit - "layout" or "master": titles have no geometry and take LAYOUT_TITLE or MASTER_TITLE from there.
+    The first transitions slides have a fade transition, animations text boxes of every slide appear on click
+    """
+    rng = random.Random(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    media, slide_parts = [], []
+    for slide in range(1, slides + 1):
+        body, shape_id = [_title(2, f"Слайд {slide}", None if inherit else LAYOUT_TITLE)], 3
+        relationships = [("slideLayout", "../slideLayouts/slideLayout1.xml")]
+        columns = max(shapes + images, 1)
+        cell = (SLIDE_WIDTH - 838200 * 2) // columns
+        for number in range(shapes):
+            box = (838200 + number * cell, 1825625, max(cell - 91440, 91440), 1500000 + rng.randrange(2000000))
+            body.append(_text_box(shape_id, box, text_of(text, rng), rng.choice((18, 20, 24))))
+            shape_id += 1
+        for number in range(images):
+            name = f"image{len(media) + 1}.{'jpg' if number % 2 else 'png'}"
+            data = make_image(image_size, seed * 1000 + len(media), "JPEG" if number % 2 else "PNG")
+            media.append((name, data))
+            relationships.append(("image", f"../media/{name}"))
+            width = max(cell - 91440, 91440)
+            height = int(width * 3 / 4 / scale)
+            box = (838200 + (shapes + number) * cell, 3500000, width, height)
+            body.append(_picture(shape_id, f"rId{len(relationships)}", box, crop))
+            shape_id += 1
+        extra = '<p:transition spd="med"><p:fade/></p:transition>' if slide <= transitions else ""
+        if animations:
+            extra += _timing(range(3, 3 + min(animations, shapes)))
+        slide_parts.append((_xml("sld", TREE_START + "".join(body) + TREE_END + CLR_OVERRIDE + extra),
+                            _rels(relationships)))
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Default Extension="png" ContentType="image/png"/><Default Extension="jpg" ContentType="image/jpeg"/>'
+        f'<Override PartName="/ppt/presentation.xml" ContentType="{CT}.presentation.main+xml"/>'
+        f'<Override PartName="/ppt/slideMasters/slideMaster1.xml" ContentType="{CT}.slideMaster+xml"/>'
+        f'<Override PartName="/ppt/slideLayouts/slideLayout1.xml" ContentType="{CT}.slideLayout+xml"/>'
+        '<Override PartName="/ppt/theme/theme1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.theme+xml"/>'
+        + "".join(f'<Override PartName="/ppt/slides/slide{n}.xml" ContentType="{CT}.slide+xml"/>'
+                  for n in range(1, slides + 1)) + '</Types>'
+    )
+    presentation = _xml("presentation", (
+        '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+        '<p:sldIdLst>' + "".join(f'<p:sldId id="{255 + n}" r:id="rId{n + 1}"/>' for n in range(1, slides + 1)) +
+        f'</p:sldIdLst><p:sldSz cx="{SLIDE_WIDTH}" cy="{SLIDE_HEIGHT}"/><p:notesSz cx="6858000" cy="9144000"/>'))
+    master = _xml("sldMaster", TREE_START + (_title(2, "Заголовок", MASTER_TITLE) if inherit else "") + TREE_END +
+                  CLR_MAP + '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst>')
+    layout = _xml("sldLayout", TREE_START + (_title(2, "Заголовок", LAYOUT_TITLE if inherit == "layout" else None)
+                                             if inherit else "") + TREE_END + CLR_OVERRIDE,
+                  ' type="titleOnly" preserve="1"')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", _rels([("officeDocument", "ppt/presentation.xml")]))
+        archive.writestr("ppt/presentation.xml", presentation)
+        archive.writestr("ppt/_rels/presentation.xml.rels", _rels(
+            [("slideMaster", "slideMasters/slideMaster1.xml")] +
+            [("slide", f"slides/slide{n}.xml") for n in range(1, slides + 1)] + [("theme", "theme/theme1.xml")]))
+        archive.writestr("ppt/slideMasters/slideMaster1.xml", master)
+        archive.writestr("ppt/slideMasters/_rels/slideMaster1.xml.rels", _rels(
+            [("slideLayout", "../slideLayouts/slideLayout1.xml"), ("theme", "../theme/theme1.xml")]))
+        archive.writestr("ppt/slideLayouts/slideLayout1.xml", layout)
+        archive.writestr("ppt/slideLayouts/_rels/slideLayout1.xml.rels", _rels(
+            [("slideMaster", "../slideMasters/slideMaster1.xml")]))
+        archive.writestr("ppt/theme/theme1.xml", THEME)
+        for number, (slide, rels) in enumerate(slide_parts, start=1):
+            archive.writestr(f"ppt/slides/slide{number}.xml", slide)
+            archive.writestr(f"ppt/slides/_rels/slide{number}.xml.rels", rels)
+        for name, data in media:
+            # pictures are already compressed
+            archive.writestr(f"ppt/media/{name}", data, zipfile.ZIP_STORED)
+    if references is not None:
+        references = Path(references)
+        references.mkdir(parents=True, exist_ok=True)
+        for name, data in media:
+            (references / name).write_bytes(data)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic .pptx for benchmarks")
+    parser.add_argument("output")
+    parser.add_argument("--slides", type=int, default=3)
+    parser.add_argument("--shapes", type=int, default=4, help="text boxes on every slide besides the title")
+    parser.add_argument("--text", type=int, default=60, help="characters in every text box")
+    parser.add_argument("--images", type=int, default=2, help="pictures on every slide")
+    parser.add_argument("--image-size", type=int, default=800, help="width of pictures in px")
+    parser.add_argument("--crop", type=int, default=0, help="crop of every side, 1/1000 of percent")
+    parser.add_argument("--scale", type=float, default=1.0, help="horizontal stretch of pictures")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--references", default=None, help="folder to write the original pictures to")
+    parser.add_argument("--inherit", choices=("layout", "master"), default=None,
+                        help="titles take their geometry from the layout or the master placeholder")
+    parser.add_argument("--transitions", type=int, default=0, help="slides with a transition, from the first")
+    parser.add_argument("--animations", type=int, default=0, help="animated text boxes on every slide")
+    args = parser.parse_args(argv)
+    generate(args.output, args.slides, args.shapes, args.text, args.images, args.image_size, args.crop, args.scale,
+             args.seed, args.references, args.inherit, args.transitions, args.animations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold import cost of the exam package, measured with python -X importtime in fresh interpreters
+
+    python benchmarks/importtime.py [--budget 100] [--runs 5]
+
+Fails if the best run of a statement is over its budget in milliseconds or if it imports a heavy dependency
+(PowerPoint, Pillow, numpy, imagehash) or reads config files. Those must be loaded on first use only
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# statement -> budget in ms for the whole import including stdlib modules it needs
+STATEMENTS = {
+    "import exam": 5,
+    "import exam.analyze": 10,
+    "from exam.analyze import Analyze": 100,
+    "import exam.__main__": 100,
+    "import exam.batch": 100,
+}
+HEAVY = ("win32com", "PIL", "numpy", "imagehash")
+CHECK = ("import sys, json, exam.config; "
+         "print(json.dumps({'heavy': [m for m in %r if m in sys.modules], 'config': len(exam.config._cache)}))")
+
+
+def _run(*args):
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, cwd=ROOT, check=True)
+
+
+def imported(stderr):
+    """(name, cumulative microseconds) of top level imports in -X importtime output"""
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line.split("|")
+            # nested imports are indented and already counted in the cumulative time of their parent
+            if not name.startswith("  "):
+                yield name.strip(), int(cumulative)
+
+
+def measure(statement, startup):
+    """(milliseconds of the imports done by statement, heavy modules imported, number of config files read)"""
+    timing = _run("-X", "importtime", "-c", statement)
+    total = sum(cumulative for name, cumulative in imported(timing.stderr) if name not in startup)
+    result = json.loads(_run("-c", f"{statement}; {CHECK % (HEAVY,)}").stdout.strip().splitlines()[-1])
+    return total / 1000, result["heavy"], result["config"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="budget in ms for every statement")
+    args = parser.parse_args(argv)
+    startup = {name for name, _ in imported(_run("-X", "importtime", "-c", "pass").stderr)}
+    failed = False
+    for statement, budget in STATEMENTS.items():
+        budget = args.budget or budget
+        runs = [measure(statement, startup) for _ in range(args.runs)]
+        best = min(milliseconds for milliseconds, _, _ in runs)
+        _, heavy, config = runs[-1]
+        problems = []
+        if best > budget:
+            problems.append(f"over budget {budget} ms")
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+        if config:
+            problems.append("reads config")
+        failed |= bool(problems)
+        print(f"{statement:40} {best:8.1f} ms  {'; '.join(problems) or 'ok'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Timings of the public paths of exam on synthetic presentations of growing size
+
+    python benchmarks/run.py                        # print timings
+    python benchmarks/run.py --save                 # write them to benchmarks/baseline.json
+    python benchmarks/run.py --compare              # fail if slower than baseline.json by more than its threshold
+
+Presentations are generated once into a temporary folder. Every path is timed on a fresh Analyze with the result
+cache off, in an empty working folder, so previews and media caches of earlier runs don't hide the real cost
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.generate import generate  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# median may be this many times slower than the baseline plus SLACK_MS before it's a regression
+THRESHOLD = 1.5
+SLACK_MS = 5.0
+# name -> arguments of generate
+CASES = {
+    "small": dict(slides=3, shapes=2, text=40, images=1, image_size=400),
+    "medium": dict(slides=3, shapes=6, text=200, images=2, image_size=1200),
+    "large": dict(slides=10, shapes=12, text=600, images=4, image_size=2400),
+    "huge_images": dict(slides=3, shapes=2, text=40, images=6, image_size=4000),
+    "cropped_scaled": dict(slides=3, shapes=6, text=200, images=2, image_size=1200, crop=8000, scale=1.4),
+}
+
+
+def paths(backend):
+    """name -> function(presentation path, references folder) of the timed paths"""
+    from exam.analyze import Analyze
+    from exam.analyze.images import Images
+    from exam.utils import layout_to_dict
+
+    # references are the pictures of the deck, so "original images" matches them and compares every picture
+    def analyze(path, references):
+        with Analyze(path, backend, cache=False, references=references) as instance:
+            return instance.get("analyze")
+
+    def warnings(path, references):
+        with Analyze(path, backend, cache=False, references=references) as instance:
+            return instance.warnings
+
+    def images(method, *args):
+        def run(path, references):
+            with Images(path, backend) as instance:
+                return getattr(instance, method)(*[references if arg is None else arg for arg in args])
+        return run
+
+    def layout(path, references):
+        return [layout_to_dict(1280, 720, name) for name in ("DEFAULT", "SOME_LAYOUT")]
+
+    return {
+        "Analyze.get": analyze,
+        "Analyze.warnings": warnings,
+        "Images.compare": images("compare", None),
+        "Images.skeleton": images("skeleton"),
+        "Images.distorted_images": images("distorted_images"),
+        "layout_to_dict": layout,
+    }
+
+
+def measure(function, path, references, repeat):
+    timings = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            previous = os.getcwd()
+            os.chdir(workdir)
+            try:
+                started = time.perf_counter()
+                function(str(path), str(references))
+                timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                os.chdir(previous)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3)}
+
+
+def run(backend="ooxml", repeat=5, cases=None):
+    results, timed = {}, paths(backend)
+    with tempfile.TemporaryDirectory() as folder:
+        for case in cases or CASES:
+            path = Path(folder, f"{case}.pptx")
+            references = Path(folder, f"{case}_references")
+            generate(path, references=references, **CASES[case])
+            results[case] = {name: measure(function, path, references, repeat) for name, function in timed.items()}
+            results[case]["size_kb"] = round(path.stat().st_size / 1024)
+    return results
+
+
+def compare(results, baseline):
+    """Lines of regressions against the baseline"""
+    threshold, slack = baseline.get("threshold", THRESHOLD), baseline.get("slack_ms", SLACK_MS)
+    regressions = []
+    for case, timings in results.items():
+        for name, timing in timings.items():
+            known = baseline["results"].get(case, {}).get(name)
+            if not isinstance(timing, dict) or not known:
+                continue
+            limit = known["median_ms"] * threshold + slack
+            if timing["median_ms"] > limit:
+                regressions.append(f"{case} {name}: {timing['median_ms']:.1f} ms, "
+                                   f"baseline {known['median_ms']:.1f} ms, limit {limit:.1f} ms")
+    return regressions
+
+
+def report(results):
+    names = [name for name in next(iter(results.values())) if name != "size_kb"]
+    print(f"{'':16}" + "".join(f"{name:>26}" for name in names))
+    for case, timings in results.items():
+        print(f"{case:16}" + "".join(f"{timings[name]['median_ms']:>23.1f} ms" for name in names))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of exam on synthetic presentations")
+    parser.add_argument("-b", "--backend", default="ooxml")
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", choices=list(CASES), help="run only these cases")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE.name}")
+    parser.add_argument("--compare", action="store_true", help=f"compare with {BASELINE.name}")
+    parser.add_argument("--output", default=None, help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+    results = run(args.backend, args.repeat, args.case)
+    report(results)
+    document = {"backend": args.backend, "python": platform.python_version(), "platform": platform.platform(),
+                "threshold": THRESHOLD, "slack_ms": SLACK_MS, "cases": {case: CASES[case] for case in results},
+                "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(document, indent=2), encoding="utf-8")
+    if args.save:
+        BASELINE.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    if args.compare:
+        regressions = compare(results, json.loads(BASELINE.read_text(encoding="utf-8")))
+        for line in regressions:
+            print(f"Регрессия: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import argparse
+
+from .backends import BACKENDS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m exam", description="Проверка презентаций ОГЭ по информатике")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="проверить все .pptx в папке")
+    batch.add_argument("directory", help="папка с презентациями")
+    batch.add_argument("-j", "--jobs", type=int, default=None, help="количество процессов, по умолчанию число ядер")
+    batch.add_argument("-o", "--output", default="results.csv", help="файл результатов .csv, .jsonl или .sqlite")
+    batch.add_argument("-b", "--backend", choices=BACKENDS, default="com")
+    batch.add_argument("-r", "--recursive", action="store_true", help="искать презентации во вложенных папках")
+    batch.add_argument("--profile", action="store_true",
+                       help="записать в .jsonl время, обращения к PowerPoint и память каждой проверки")
+    batch.add_argument("--lazy", action="store_true",
+                       help="не выполнять дорогие проверки, если оценка уже 0, они отмечаются «Не проверено»")
+    batch.add_argument("-t", "--timeout", type=float, default=None,
+                       help="время на проверку одного файла, с, по умолчанию grade timeout s из config.ini")
+    batch.add_argument("--references", default=None,
+                       help="папка с оригинальными изображениями, по умолчанию original_images")
+
+    watch = commands.add_parser("watch", help="проверять .pptx по мере появления в папке")
+    watch.add_argument("directory", help="папка, в которую сдаются презентации")
+    watch.add_argument("-j", "--jobs", type=int, default=None, help="количество процессов, по умолчанию число ядер")
+    watch.add_argument("-o", "--output", default="results.sqlite", help="файл результатов .sqlite, .csv или .jsonl")
+    watch.add_argument("-m", "--manifest", default=None,
+                       help="список проверенных файлов, по умолчанию рядом с результатами (.manifest.json)")
+    watch.add_argument("-b", "--backend", choices=BACKENDS, default="com")
+    watch.add_argument("-r", "--recursive", action="store_true", help="искать презентации во вложенных папках")
+    watch.add_argument("--settle", type=float, default=2.0,
+                       help="сколько секунд файл не должен меняться, чтобы считаться записанным")
+    watch.add_argument("--interval", type=float, default=1.0, help="период опроса папки без inotify, с")
+    watch.add_argument("--polling", action="store_true", help="опрашивать папку, даже если есть inotify")
+    watch.add_argument("--lazy", action="store_true",
+                       help="не выполнять дорогие проверки, если оценка уже 0, они отмечаются «Не проверено»")
+    watch.add_argument("-t", "--timeout", type=float, default=None,
+                       help="время на проверку одного файла, с, по умолчанию grade timeout s из config.ini")
+    watch.add_argument("--references", default=None,
+                       help="папка с оригинальными изображениями, по умолчанию original_images")
+
+    export = commands.add_parser("export", help="выгрузить результаты из базы .sqlite в .csv")
+    export.add_argument("database", help="база результатов, созданная batch -o results.sqlite")
+    export.add_argument("-o", "--output", default="results.csv")
+    export.add_argument("--grade", type=int, default=None, help="только презентации с этой оценкой")
+    export.add_argument("--failing", default=None, help="только презентации, не выполнившие критерий")
+
+    serve = commands.add_parser("serve", help="запустить локальный HTTP сервис проверки")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("-p", "--port", type=int, default=8080)
+    serve.add_argument("-j", "--jobs", type=int, default=None, help="количество процессов, по умолчанию число ядер")
+    serve.add_argument("-b", "--backend", choices=BACKENDS, default="com")
+    serve.add_argument("-q", "--queue", type=int, default=32, help="сколько файлов может ждать в очереди")
+    serve.add_argument("-t", "--timeout", type=float, default=60, help="время ожидания оценки, с")
+    serve.add_argument("--references", default="original_images", help="папка с оригинальными изображениями")
+    serve.add_argument("--lazy", action="store_true",
+                       help="не выполнять дорогие проверки, если оценка уже 0, для запроса меняется через ?lazy=0")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        from .batch import run_batch
+        run_batch(args.directory, args.output, args.jobs, args.backend, args.recursive, profile=args.profile,
+                  lazy=args.lazy, timeout=args.timeout, references=args.references)
+    elif args.command == "watch":
+        from .watch import run_watch
+        run_watch(args.directory, args.output, manifest=args.manifest, jobs=args.jobs, backend=args.backend,
+                  recursive=args.recursive, settle=args.settle, interval=args.interval, lazy=args.lazy,
+                  polling=args.polling, timeout=args.timeout, references=args.references)
+    elif args.command == "export":
+        from .results import export
+        export(args.database, args.output, args.grade, args.failing)
+    elif args.command == "serve":
+        from .service import run_service
+        run_service(args.host, args.port, jobs=args.jobs, backend=args.backend, queue_size=args.queue,
+                    timeout=args.timeout, references=args.references, lazy=args.lazy)
+
+
+if __name__ == "__main__":
+    main()
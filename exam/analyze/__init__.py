@@ -1 +1,6 @@
-from .analyze import Analyze
+def __getattr__(name):
+    # Analyze and everything it needs are imported on first use, so importing the package stays cheap
+    if name == "Analyze":
+        from .analyze import Analyze
+        return Analyze
+    raise AttributeError(f"module {__name__} has no attribute {name}")
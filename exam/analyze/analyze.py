@@ -1,230 +1,225 @@
 import csv
+import zipfile
 from pathlib import Path
+from xml.etree.ElementTree import ParseError
 
-from win32com.client import Dispatch
-
+from . import checks
 from .images import Images
-from ..config import get_analyze
-from ..constants import msoOrientationHorizontal
-from ..utils import (layouts, layout_to_dict, pt_to_px, is_text, is_image, is_title, check_collision_between_shapes,
-                     get_shape_dimensions, get_shape_crop_values, get_download_path, dict_to_string)
+from .layouts import match_layouts
+from ..config import get_settings
+from .. import resultcache
+from ..profiling import Profiler, span
+from ..session import get_session
+from ..utils import find_overlaps, get_download_path, dict_to_string
+
+CSV_FIELDNAMES = ['Презентация', 'Структура', 'Шрифты', 'Картинки', 'Предупреждения', 'Слайд 1', 'Слайд 2', 'Слайд 3']
+
 
-Application = Dispatch("PowerPoint.Application")
-config = get_analyze()
+def csv_row(result, warnings):
+    """Row of export_csv for the result of Analyze.get("analyze") and Analyze.warnings"""
+    presentation, structure, fonts, images, layout, grade = result
+    return [
+        dict_to_string(presentation),
+        dict_to_string(structure),
+        dict_to_string(fonts),
+        dict_to_string(images),
+        '\n'.join(warnings[0]),
+        '\n'.join(warnings[1]),
+        '\n'.join(warnings[2]),
+        '\n'.join(warnings[3]),
+    ]
 
 
 class Analyze:
-    def __init__(self, presentation_path):
+    """
+    Opens the presentation once in the session of the backend and shares it with Images. Use as a context manager
+    or call close(), the application isn't quit and the next presentation opens in it.
+    The presentation is opened only when a check isn't in the result cache, cache=False always computes everything.
+    profile=True records time, backend reads and writes and peak memory of every check in self.profile.
+    enabled - names of checks.CHECKS to evaluate, all by default. Fields the enabled checks need are read from the
+    presentation in one pass, with the fields of warnings if warnings=True (by default when all checks are enabled).
+    If some criterion isn't evaluated the grade is None, unless it is 0 whatever that criterion gives.
+    lazy=True evaluates cheap checks first and stops as soon as the grade can only be 0, the rest are "Не проверено".
+    references - folder of the original images the pictures are compared with
+    """
+
+    def __init__(self, presentation_path, backend="com", session=None, cache=True, profile=False, enabled=None,
+                 lazy=False, warnings=None, references=resultcache.REFERENCES):
         super().__init__()
-        self._Images = Images(presentation_path)
-        self._Presentation = Application.Presentations.Open(presentation_path, WithWindow=False)
+        self._path, self._backend = presentation_path, backend
+        self.checks, self.lazy, self.references = checks.enabled(enabled), lazy, references
+        self.fields = checks.needs(self.checks)
+        if enabled is None if warnings is None else warnings:
+            self.fields |= checks.WARNING_FIELDS
+        self.profile = Profiler() if profile else None
+        self._session = session or get_session(backend)
+        self._Presentation, self._images = None, None
+        self._keys = None if cache and get_settings().result_cache_size_mb > 0 else False
 
-    def which_layout(self):
-        for layout in layouts:
-            layout_positions = layout_to_dict(
-                pt_to_px(self._Presentation.PageSetup.SlideWidth),
-                pt_to_px(self._Presentation.PageSetup.SlideHeight),
-                layout
-            )
-            elements, collision = set(), set()
-            for Slide in self._Presentation.Slides:
-                if Slide.SlideIndex == 2 or Slide.SlideIndex == 3:
-                    for Shape in Slide.Shapes:
-                        elements.add(Shape.Name)
-                        layout_position = layout_positions[Slide.SlideIndex]
-                        shape_dims = get_shape_dimensions(Shape)
-                        cur_layout_position = []
-                        if is_title(Shape) or is_text(Shape):
-                            cur_layout_position = layout_position["title"] + layout_position["text"]
-                        elif is_image(Shape):
-                            cur_layout_position = layout_position["images"]
-                        for pos in cur_layout_position:
-                            if check_collision_between_shapes(shape_dims, pos):
-                                collision.add(Shape.Name)
-            if len(elements) == len(collision):
-                return layout
-        return False
+    @property
+    def _Images(self):
+        if self._images is None:
+            self._Presentation = self._session.open(self._path)
+            if self.profile is not None:
+                self._Presentation = self.profile.wrap(self._Presentation)
+            try:
+                self._images = Images(self._path, self._backend, self._Presentation, self._session)
+            except Exception:
+                self.close(error=True)
+                raise
+        return self._images
 
-    def __analyze_count_of_slides(self):
-        if self._Presentation.Slides.Count == int(config['slides']):
-            return True
-        return False
+    @property
+    def images(self):
+        return self._Images
 
-    def __analyze_slides_aspect_ratio(self):
-        PageSetup = self._Presentation.PageSetup
-        aspect_ratio = config['aspect_ratio'].split('/')
-        if (PageSetup.SlideWidth / PageSetup.SlideHeight) / (int(aspect_ratio[0]) / int(aspect_ratio[1])):
-            return True
-        return False
+    @property
+    def snapshot(self):
+        return self._Images.fetch(self.fields)
 
-    def __analyze_typefaces(self):
-        typefaces = set()
-        for Slide in self._Presentation.Slides:
-            for Shape in Slide.Shapes:
-                if is_text(Shape):
-                    typefaces.add(Shape.TextFrame.TextRange.Font.Name)
-
-        if len(typefaces) == 1:
-            return True
-        else:
-            tmp_typefaces = set()
-            for typeface in list(typefaces):
-                tmp_typefaces.add(typeface.split()[0])
-            if len(tmp_typefaces) == 1:
-                return True
-        return False
+    def __result_keys(self):
+        if self._keys is None:
+            try:
+                self._keys = resultcache.result_keys(self._path, self._backend, self.references)
+            except (OSError, KeyError, zipfile.BadZipFile, ParseError):
+                # not a .pptx the cache understands, everything is computed
+                self._keys = False
+        return self._keys
 
-    def __collisions_between_slide_elements(self, slide):
-        overlaps = set()
-        shapes_1, shapes_2 = ([Shape for Shape in self._Presentation.Slides(slide).Shapes],
-                              [Shape for Shape in self._Presentation.Slides(slide).Shapes])
-        for k in range(len(shapes_1) - 1):
-            for j in range(1, len(shapes_2)):
-                dims_1, dims_2 = get_shape_dimensions(shapes_1[k]), get_shape_dimensions(shapes_2[j])
-                if shapes_1[k].Name != shapes_2[j].Name:
-                    collision = check_collision_between_shapes(dims_1, dims_2)
-                    overlaps.add(collision)
-        if len(overlaps) == 1:
-            return True
-        return False
+    def __cached(self, name, compute, slide=None):
+        """Result of compute() from the cache by key of the slide or of the whole presentation"""
+        keys = self.__result_keys()
+        if not keys or (slide is not None and slide > len(keys[1])):
+            return compute()
+        key = resultcache.digest(keys[1][slide - 1] if slide else keys[0], name)
+        with span("result cache", check=name):
+            value = resultcache.load(key)
+        if value is None:
+            value = compute()
+            resultcache.save(key, value)
+        return value
+
+    def slide_count(self):
+        keys = self.__result_keys()
+        return len(keys[1]) if keys else self.snapshot.count
+
+    def layouts(self):
+        """LayoutMatch of every layout of layouts.ini, the one slides 2 and 3 fit best first"""
+        return match_layouts(self._Images.fetch(self.fields | {"kind"}))
 
-    def __analyze_slide_text_image_blocks(self, slide):
-        text, images, title, subtitle = 0, 0, False, False
-        for Shape in self._Presentation.Slides(slide).Shapes:
-            if is_title(Shape):
-                if slide == 1:
-                    if not title and not subtitle:
-                        title = True
-                    elif title and not subtitle:
-                        subtitle = True
-                else:
-                    if not title:
-                        title = True
-            elif is_text(Shape):
-                text += 1
-            elif is_image(Shape):
-                images += 1
-        a_text, a_images, a_title, a_subtitle = False, False, False, False
-        if slide == 1:
-            if text == int(config[f'text_blocks_{slide}']) and not title and not subtitle:
-                a_text, a_title, a_subtitle = True, True, True
-            elif text == int(config[f'text_blocks_{slide}']) - 1 and title and not subtitle:
-                a_text, a_title, a_subtitle = True, True, False
-            elif text == int(config[f'text_blocks_{slide}']) - 2 and title and subtitle:
-                a_text, a_title, a_subtitle = True, True, True
-            if images == int(config[f'images_{slide}']):
-                a_images = True
-            return a_text, a_images, a_title, a_subtitle
-        else:
-            if text == int(config[f'text_blocks_{slide}']) and not title:
-                a_text, a_title = True, True
-            elif text == int(config[f'text_blocks_{slide}']) - 1 and title:
-                a_text = True
-            elif text == int(config[f'text_blocks_{slide}']) - 1 and not title:
-                a_text = True
-            if images == int(config[f'images_{slide}']):
-                a_images = True
-            return a_text, a_images, a_title, a_subtitle
-
-    def __analyze_slide_font_sizes(self, slide):
-        font_sizes, correct_counter = [], 0
-        for Shape in self._Presentation.Slides(slide).Shapes:
-            if is_text(Shape):
-                font_sizes.append(Shape.TextFrame.TextRange.Font.Size)
-        required_font_sizes = config[f'font_sizes_{slide}'].split(",")
-        for f in range(len(required_font_sizes)):
-            required_font_sizes[f] = float(required_font_sizes[f])
-        if len(required_font_sizes) == len(font_sizes) == int(config[f'text_blocks_{slide}']):
-            if required_font_sizes == font_sizes:
-                return True
-        elif len(required_font_sizes) - 1 == len(font_sizes) == int(config[f'text_blocks_{slide}']) - 1:
-            required_font_sizes.pop(0)
-            if required_font_sizes == font_sizes:
-                return True
+    def which_layout(self):
+        """Name of the best fitting layout where every element of slides 2 and 3 is in a region of its role"""
+        for match in self.layouts():
+            if match.matched:
+                return match.name
         return False
 
+    def overlaps(self, slide):
+        """(name, name, intersection area in px) of every pair of overlapping shapes on the slide"""
+        shapes = self._Images.fetch(self.fields | {"bounds"}).shapes(slide)
+        return [(shapes[i].name, shapes[j].name, area)
+                for i, j, area in find_overlaps([shape.dimensions for shape in shapes])]
+
     def presentation(self):
-        analyze = {}
-        layout = self.which_layout()
-        analyze[0] = self.__analyze_count_of_slides()
-        analyze[1] = self.__analyze_slides_aspect_ratio()
-        analyze[2] = self._Presentation.PageSetup.SlideOrientation == msoOrientationHorizontal
-        analyze[3] = self.__analyze_typefaces()
-        analyze[4] = self._Images.compare()
-        analyze[5], analyze[6] = True if layout else False, layout if layout else None
-        analyze[13] = self._Images.distorted_images()
-        return analyze
+        return self.__evaluate("presentation")
 
     def slide_1(self):
-        analyze = {}
-        text, images, title, subtitle = self.__analyze_slide_text_image_blocks(1)
-        analyze[7], analyze[8] = title, subtitle
-        analyze[9] = self.__collisions_between_slide_elements(1)
-        analyze[10] = self.__analyze_slide_font_sizes(1)
-        return analyze
+        return self.__evaluate("slide", 1)
 
     def slide_2(self):
-        analyze = {}
-        text, images, title, subtitle = self.__analyze_slide_text_image_blocks(2)
-        analyze[7] = title
-        analyze[9] = self.__collisions_between_slide_elements(2)
-        analyze[10] = self.__analyze_slide_font_sizes(2)
-        analyze[11], analyze[12] = text, images
-        return analyze
+        return self.__evaluate("slide", 2)
 
     def slide_3(self):
+        return self.__evaluate("slide", 3)
+
+    def __evaluate(self, scope, slide=None):
+        """Results of the enabled checks of scope, all of them on one snapshot"""
         analyze = {}
-        text, images, title, subtitle = self.__analyze_slide_text_image_blocks(3)
-        analyze[7] = title
-        analyze[9] = self.__collisions_between_slide_elements(3)
-        analyze[10] = self.__analyze_slide_font_sizes(3)
-        analyze[11], analyze[12] = text, images
+        for check in self.checks:
+            if check.scope == scope:
+                analyze.update(self.__check(check, slide))
         return analyze
 
+    def __check(self, check, slide=None):
+        """Results of one check, cached by the key of the slide or of the whole presentation"""
+        def compute():
+            with span(check.name, slide=slide):
+                if slide is None:
+                    return check.function(self, self.snapshot)
+                return check.function(self, self.snapshot, slide)
+        return self.__cached(check.name, compute, slide)
+
+    def __units(self, count):
+        """(check, slide) of every enabled check in the order their results are merged, later ones override"""
+        units = [(check, None) for check in self.checks if check.scope == "presentation"]
+        for slide in range(1, min(count, 3) + 1):
+            units.extend((check, slide) for check in self.checks if check.scope == "slide")
+        return units
+
+    @staticmethod
+    def __settled(units, results):
+        """Results that no check still to be evaluated can override"""
+        values, pending = {}, set()
+        for index, (check, slide) in enumerate(units):
+            if index in results:
+                values.update(results[index])
+                pending.difference_update(results[index])
+            else:
+                pending.update(check.results)
+        return {number: value for number, value in values.items() if number not in pending}
+
+    @staticmethod
+    def __errors(data):
+        """Number of failed criteria of structure, fonts and images"""
+        return [[data.get(number) for number, (g, _) in checks.CRITERIA.items() if g == group].count(False)
+                for group in ("structure", "fonts", "images")]
+
+    @staticmethod
+    def __grade(data, evaluated, count):
+        if any(data[number] is None for number in checks.CRITERIA):
+            # a criterion that wasn't evaluated may be failed, only grade 0 can be given for sure
+            return 0 if Analyze.__failed(data, count) else None
+        err_structure, err_fonts, err_images = Analyze.__errors(data)
+        if count >= 3:
+            # check if we can give grade 2 (max)
+            if all(evaluated.values()):
+                return 2
+            # or if we can give 1
+            if err_structure == 1 and not err_fonts and not err_images:
+                return 1
+            if not err_structure and err_fonts == 1 and not err_images:
+                return 1
+            if not err_structure and not err_fonts and err_images == 1:
+                return 1
+        elif err_structure == 1 and not err_fonts and not err_images:
+            return 1
+        return 0
+
+    @staticmethod
+    def __failed(settled, count):
+        """True when the grade is already 0 whatever the checks still to be evaluated give"""
+        err_structure, err_fonts, err_images = Analyze.__errors(settled)
+        if count >= 3:
+            return err_structure + err_fonts + err_images >= 2
+        return err_structure >= 2 or err_fonts or err_images
+
     @staticmethod
     def __translate(analyze, grade):
-        presentation_analyze = {
-            "Соотношение сторон 16:9": "Выполнено" if analyze[1] else "Не выполнено",
-            "Горизонтальная ориентация": "Выполнено" if analyze[2] else "Не выполнено"
-        }
-
-        structure_analyze = {
-            "Три слайда в презентации": "Выполнено" if analyze[0] else "Не выполнено",
-            "Соответствует макету": "Выполнено" if analyze[5] else "Не выполнено",
-            "Заголовки на слайдах": "Выполнено" if analyze[7] else "Не выполнено",
-            "Подзаголовок на первом слайде": "Выполнено" if analyze[8] else "Не выполнено",
-            "Элементы не перекрывают друг друга": "Выполнено" if analyze[9] else "Не выполнено",
-            "Текстовые блоки на 2, 3 слайде": "Выполнено" if analyze[11] else "Не выполнено",
-            "Картинки на 2, 3 слайде": "Выполнено" if analyze[12] else "Не выполнено"
-        }
-
-        fonts_analyze = {
-            "Единый тип шрифта": "Выполнено" if analyze[3] else "Не выполнено",
-            "Размер шрифта": "Выполнено" if analyze[10] else "Не выполнено"
-        }
-
-        images_analyze = {
-            "Оригинальные картинки": "Выполнено" if analyze[4] else "Не выполнено",
-            "Картинки не искажены": "Выполнено" if not analyze[13] else "Не выполнено"
-        }
-        return presentation_analyze, structure_analyze, fonts_analyze, images_analyze, analyze[6], grade
+        groups = {group: {} for group in checks.GROUPS}
+        for number, (group, label) in checks.CRITERIA.items():
+            value = analyze[number]
+            if value is None:
+                groups[group][label] = "Не проверено"
+            else:
+                met = not value if number in checks.INVERTED else value
+                groups[group][label] = "Выполнено" if met else "Не выполнено"
+        return (groups["presentation"], groups["structure"], groups["fonts"], groups["images"], analyze[6],
+                grade)
 
     def __summary(self):
         """
-        0 - does prs have 3 slides
-        1 - right aspect ratio of presentation
-        2 - horizontal orientation
-        3 - right typefaces
-        4 - original photos
-        5 - contatins layout
-        6 - which layout
-        7 - title
-        8 - subtitle
-        9 - overlaps
-        10 - font sizes
-        11 - text blocks
-        12 - image blocks
-        13 - distorted images
+        Results are keyed by numbers of checks.CRITERIA, 6 is the name of the layout. Results of disabled checks and
+        of the ones the lazy mode skipped are None, they aren't counted as errors and the grade is None unless it is 0.
 
         Presentation:
             1, 2
@@ -235,118 +230,120 @@ class Analyze:
         Images:
             4 13
         """
-        # 16 HOURS HERE
-        presentation_info, first_slide, second_slide = (self.presentation(),
-                                                        self.slide_1(),
-                                                        self.slide_2())
-        if self._Presentation.Slides.Count >= 3:
-            third_slide = self.slide_3()
-            data = {**presentation_info, **first_slide, **second_slide, **third_slide}
-            err_structure = [data[k] for k in data if k in [0, 5, 7, 8, 9, 11, 12]].count(False)
-            err_fonts = [data[k] for k in data if k in [3, 10]].count(False)
-            err_images = [data[k] for k in data if k in [4, 13]].count(False)
-            # compute grade
-            r_grade = 0
-            # check if we can give grade 2 (max)
-            if all(value for value in data.values()):
-                r_grade = 2
-                return self.__translate(data, r_grade)
-            # or if we can give 1
-            if err_structure == 1 and not err_fonts and not err_images:
-                r_grade = 1
-            elif not err_structure and err_fonts == 1 and not err_images:
-                r_grade = 1
-            elif not err_structure and not err_fonts and err_images == 1:
-                r_grade = 1
-            return self.__translate(data, r_grade)
-        elif self._Presentation.Slides.Count == 2:
-            data = {**presentation_info, **first_slide, **second_slide}
-            err_structure = [data[k] for k in data if k in [0, 5, 7, 8, 9, 11, 12]].count(False)
-            err_fonts = [data[k] for k in data if k in [3, 10]].count(False)
-            err_images = [data[k] for k in data if k in [4, 13]].count(False)
-            # compute grade
-            r_grade = 0
-            if err_structure == 1 and not err_fonts and not err_images:
-                r_grade = 1
-            return self.__translate(data, r_grade)
+        count = self.slide_count()
+        units, results = self.__units(count), {}
+        # cheap checks first, so that the lazy mode stops before the costly ones when the grade is already 0.
+        # A deck of less than 2 slides isn't graded at all, the lazy mode stops after the slides count
+        for index in sorted(range(len(units)), key=lambda index: units[index][0].cost):
+            if self.lazy and results and (count < 2 or self.__failed(self.__settled(units, results), count)):
+                break
+            check, slide = units[index]
+            results[index] = self.__check(check, slide)
+        if count < 2:
+            return None
+        evaluated = {}
+        for index in sorted(results):
+            evaluated.update(results[index])
+        data = dict.fromkeys(number for check in checks.CHECKS.values() for number in check.results)
+        data.update(evaluated)
+        return self.__translate(data, self.__grade(data, evaluated, count))
+
+    def __profiling(self, name):
+        """Activates self.profile for the call if profiling is on"""
+        if self.profile is None:
+            return span(name)
+        return self.profile.record(name)
 
     def get(self, typeof="analyze"):
         if typeof == "analyze":
-            return self.__summary()
+            with self.__profiling("analyze"):
+                return self.__summary()
+        elif typeof == "profile":
+            return self.profile.as_dict() if self.profile is not None else None
         elif typeof == "thumb":
             return self._Images.get("thumb")
         elif typeof == "slides":
-            return self._Presentation.Slides.Count
+            return self.slide_count()
+
+    def close(self, error=False):
+        """Closes the presentation if it was opened, error=True restarts the application of the session"""
+        images, Presentation = getattr(self, "_images", None), getattr(self, "_Presentation", None)
+        self._images, self._Presentation = None, None
+        if images is not None:
+            images.close()
+        if Presentation is not None:
+            self._session.close(Presentation, error)
 
     def __del__(self):
-        Application.Quit()
+        self.close()
+
+    def __enter__(self):
+        return self
 
-    def __exit__(self):
-        Application.Quit()
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(error=exc_type is not None)
+        return False
 
     @property
     def warnings(self):
+        with self.__profiling("warnings"):
+            return self.__cached("warnings", self.__warnings)
+
+    def __warnings(self):
         warnings = {0: [], 1: [], 2: [], 3: []}
         shape_animations, slide_1_text_blocks = 0, 0
-        for Slide in self._Presentation.Slides:
+        for slide in self._Images.fetch(self.fields | checks.WARNING_FIELDS).slides:
             # count slide animations or entry effects
-            if Slide.TimeLine.MainSequence.Count >= 1:
-                shape_animations += Slide.TimeLine.MainSequence.Count
-            if Slide.SlideShowTransition.EntryEffect:
-                warnings[0].append(f"Анимация перехода на слайде {Slide.SlideIndex}.")
+            if slide.animations >= 1:
+                shape_animations += slide.animations
+            if slide.transition:
+                warnings[0].append(f"Анимация перехода на слайде {slide.index}.")
+
+            if slide.index in warnings:
+                for first, second, area in self.overlaps(slide.index):
+                    warnings[slide.index].append(f"Объекты {first} и {second} перекрываются, площадь {area} px")
 
-            for Shape in Slide.Shapes:
-                crop = get_shape_crop_values(Shape)
+            for shape in slide.shapes:
+                crop = shape.crop
                 if crop:
-                    crop_warning = (f'Объект {Shape.Name}, {Shape.Id} обрезан {crop["left"]}:{crop["right"]}:'
-                                    f':{crop["top"]}:{crop["bottom"]}')
-                if Slide.SlideIndex == 1:
-                    if is_image(Shape):
-                        warnings[1].append(f"Изображение {Shape.Name} с ID {Shape.Id}")
-                    elif is_text(Shape) is True:
+                    crop_warning = (f'Объект {shape.name}, {shape.id} обрезан {crop[0]}:{crop[2]}:'
+                                    f':{crop[1]}:{crop[3]}')
+                if slide.index == 1:
+                    if shape.image:
+                        warnings[1].append(f"Изображение {shape.name} с ID {shape.id}")
+                    elif shape.text is True:
                         slide_1_text_blocks += 1
-                    elif is_text(Shape) is None:
-                        warnings[1].append(f"Пустой текстовый блок {Shape.Name}, {Shape.Id}")
-                    elif not is_text(Shape):
-                        warnings[1].append(f"Неизвестный объект {Shape.Name}, {Shape.Id}")
+                    elif shape.text is None:
+                        warnings[1].append(f"Пустой текстовый блок {shape.name}, {shape.id}")
+                    elif not shape.text:
+                        warnings[1].append(f"Неизвестный объект {shape.name}, {shape.id}")
                     if slide_1_text_blocks > 2:
                         warnings[1].append(f"Больше двух текстовых элементов на слайде.")
-                elif Slide.SlideIndex == 2:
-                    if is_text(Shape) is None:
-                        warnings[2].append(f"Пустой текстовый блок {Shape.Name}, {Shape.Id}")
-                    elif not is_text(Shape) and not is_image(Shape):
-                        warnings[2].append(f"Неизвестный объект {Shape.Name}, {Shape.Id}")
+                elif slide.index == 2:
+                    if shape.text is None:
+                        warnings[2].append(f"Пустой текстовый блок {shape.name}, {shape.id}")
+                    elif not shape.text and not shape.image:
+                        warnings[2].append(f"Неизвестный объект {shape.name}, {shape.id}")
                     if crop:
                         warnings[2].append(crop_warning)
-                elif Slide.SlideIndex == 3:
-                    if is_text(Shape) is None:
-                        warnings[3].append(f"Пустой текстовый блок {Shape.Name}, {Shape.Id}")
-                    elif not is_text(Shape) and not is_image(Shape):
-                        warnings[3].append(f"Неизвестный объект {Shape.Name} с ID {Shape.Id}")
+                elif slide.index == 3:
+                    if shape.text is None:
+                        warnings[3].append(f"Пустой текстовый блок {shape.name}, {shape.id}")
+                    elif not shape.text and not shape.image:
+                        warnings[3].append(f"Неизвестный объект {shape.name} с ID {shape.id}")
                     if crop:
                         warnings[3].append(crop_warning)
         if shape_animations:
             warnings[0].append(f"Анимации в объектах: {shape_animations}.")
+        for slide, name, w, h, distortion in self._Images.image_distortions():
+            if distortion > 10 and slide in warnings:
+                warnings[slide].append(f"Изображение {name} искажено на {distortion}%, ширина {w}%, высота {h}%")
         return warnings
 
     def export_csv(self):
-        warnings = self.warnings
-        presentation, structure, fonts, images, layout, grade = self.get()
-        warn_0, warn_1, warn_2, warn_3 = warnings[0], warnings[1], warnings[2], warnings[3]
-        path = Path.joinpath(Path(get_download_path()), self._Presentation.Name + ".csv")
-        fieldnames = ['Презентация', 'Структура', 'Шрифты', 'Картинки', 'Предупреждения', 'Слайд 1', 'Слайд 2',
-                      'Слайд 3']
+        path = Path.joinpath(Path(get_download_path()), self.snapshot.name + ".csv")
         with open(path, "w", newline='', encoding="windows-1251") as fCsv:
             writer = csv.writer(fCsv, delimiter=',')
-            writer.writerow(fieldnames)
-            writer.writerow([
-                dict_to_string(presentation),
-                dict_to_string(structure),
-                dict_to_string(fonts),
-                dict_to_string(images),
-                '\n'.join(warn_0),
-                '\n'.join(warn_1),
-                '\n'.join(warn_2),
-                '\n'.join(warn_3),
-            ])
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerow(csv_row(self.get(), self.warnings))
         return path
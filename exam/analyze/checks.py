@@ -0,0 +1,160 @@
+"""
+Exam criteria declared in one place: which results a check gives, what it reads from the presentation and how costly
+it is. Analyze reads the union of the fields of the enabled checks in one pass (see snapshot.FIELDS) and evaluates the
+checks on that snapshot, so a disabled check doesn't cost the reads only it needs
+"""
+from collections import namedtuple
+
+from ..config import get_settings
+from ..constants import msoOrientationHorizontal
+
+# number of the result -> (group, label), results without a label are values, not criteria
+CRITERIA = {
+    0: ("structure", "Три слайда в презентации"),
+    1: ("presentation", "Соотношение сторон 16:9"),
+    2: ("presentation", "Горизонтальная ориентация"),
+    3: ("fonts", "Единый тип шрифта"),
+    4: ("images", "Оригинальные картинки"),
+    5: ("structure", "Соответствует макету"),
+    7: ("structure", "Заголовки на слайдах"),
+    8: ("structure", "Подзаголовок на первом слайде"),
+    9: ("structure", "Элементы не перекрывают друг друга"),
+    10: ("fonts", "Размер шрифта"),
+    11: ("structure", "Текстовые блоки на 2, 3 слайде"),
+    12: ("structure", "Картинки на 2, 3 слайде"),
+    13: ("images", "Картинки не искажены"),
+}
+GROUPS = ("presentation", "structure", "fonts", "images")
+# results where True means the criterion is not met
+INVERTED = {13}
+# fields Analyze.warnings reads, they are read in the same pass as the checks
+WARNING_FIELDS = frozenset(("kind", "bounds", "crop", "animations", "transition"))
+
+# name - unique name, also the name of the span when profiling
+# results - numbers of the results the function returns as dict
+# needs - snapshot fields the function reads
+# scope - presentation: function(analyze, snapshot), slide: function(analyze, snapshot, slide) for every slide
+# cost - relative cost, checks reading only the snapshot are 1
+Check = namedtuple("Check", "name results needs scope cost function")
+
+CHECKS = {}
+
+
+def check(name, results, needs=(), scope="presentation", cost=1):
+    """Registers the decorated function as check name"""
+    def register(function):
+        if name in CHECKS:
+            raise ValueError(f"check {name} is already registered")
+        CHECKS[name] = Check(name, tuple(results), frozenset(needs), scope, cost, function)
+        return function
+    return register
+
+
+def enabled(names=None):
+    """Checks by names in the order of registration, all of them for None"""
+    if names is None:
+        return list(CHECKS.values())
+    unknown = set(names) - CHECKS.keys()
+    if unknown:
+        raise ValueError(f"unknown checks: {', '.join(sorted(unknown))}")
+    return [value for name, value in CHECKS.items() if name in names]
+
+
+def needs(checks):
+    fields = set()
+    for value in checks:
+        fields |= value.needs
+    return frozenset(fields)
+
+
+@check("layout", (5, 6), needs=("kind", "bounds"), cost=10)
+def layout(analyze, snapshot):
+    name = analyze.which_layout()
+    return {5: bool(name), 6: name or None}
+
+
+@check("slides count", (0,))
+def slides_count(analyze, snapshot):
+    return {0: snapshot.count == get_settings().slides}
+
+
+@check("aspect ratio", (1,))
+def aspect_ratio(analyze, snapshot):
+    return {1: bool((snapshot.slide_width / snapshot.slide_height) / get_settings().aspect_ratio)}
+
+
+@check("orientation", (2,))
+def orientation(analyze, snapshot):
+    return {2: snapshot.orientation == msoOrientationHorizontal}
+
+
+@check("typefaces", (3,), needs=("kind", "font"))
+def typefaces(analyze, snapshot):
+    names = {shape.font_name for shape in snapshot.shapes() if shape.text}
+    # the same family in different styles, for example Arial and Arial Black
+    return {3: len(names) == 1 or len({name.split()[0] for name in names}) == 1}
+
+
+@check("original images", (4,), needs=("kind",), cost=50)
+def original_images(analyze, snapshot):
+    return {4: analyze.images.compare(analyze.references)}
+
+
+@check("distorted images", (13,), cost=5)
+def distorted_images(analyze, snapshot):
+    return {13: analyze.images.distorted_images()}
+
+
+@check("blocks", (7, 8, 11, 12), needs=("kind",), scope="slide")
+def blocks(analyze, snapshot, slide):
+    text, images, title, subtitle = 0, 0, False, False
+    settings = get_settings()
+    for shape in snapshot.shapes(slide):
+        if shape.title:
+            if slide == 1:
+                if not title and not subtitle:
+                    title = True
+                elif title and not subtitle:
+                    subtitle = True
+            else:
+                if not title:
+                    title = True
+        elif shape.text:
+            text += 1
+        elif shape.image:
+            images += 1
+    a_text, a_images, a_title, a_subtitle = False, False, False, False
+    if slide == 1:
+        if text == settings.text_blocks[slide] and not title and not subtitle:
+            a_text, a_title, a_subtitle = True, True, True
+        elif text == settings.text_blocks[slide] - 1 and title and not subtitle:
+            a_text, a_title, a_subtitle = True, True, False
+        elif text == settings.text_blocks[slide] - 2 and title and subtitle:
+            a_text, a_title, a_subtitle = True, True, True
+        return {7: a_title, 8: a_subtitle}
+    if text == settings.text_blocks[slide] and not title:
+        a_text, a_title = True, True
+    elif text == settings.text_blocks[slide] - 1 and title:
+        a_text = True
+    elif text == settings.text_blocks[slide] - 1 and not title:
+        a_text = True
+    if images == settings.images[slide]:
+        a_images = True
+    return {7: a_title, 11: a_text, 12: a_images}
+
+
+@check("overlaps", (9,), needs=("bounds",), scope="slide")
+def overlaps(analyze, snapshot, slide):
+    return {9: not analyze.overlaps(slide)}
+
+
+@check("font sizes", (10,), needs=("kind", "font"), scope="slide")
+def font_sizes(analyze, snapshot, slide):
+    settings = get_settings()
+    sizes = [shape.font_size for shape in snapshot.shapes(slide) if shape.text]
+    required = list(settings.font_sizes[slide])
+    if len(required) == len(sizes) == settings.text_blocks[slide]:
+        return {10: required == sizes}
+    if len(required) - 1 == len(sizes) == settings.text_blocks[slide] - 1:
+        return {10: required[1:] == sizes}
+    return {10: False}
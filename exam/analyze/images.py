@@ -1,26 +1,68 @@
-import shutil
-import zipfile
+import functools
 from pathlib import Path
 
-from PIL import Image, ImageDraw
-from imagehash import average_hash
-from win32com.client import Dispatch
-
 from ..constants import ppShapeFormatJPG
-from ..utils import is_text, is_image, pt_to_px, get_shape_dimensions, layout_to_dict, get_shape_percentage_width_height
-
-Application = Dispatch("PowerPoint.Application")
+from ..hashindex import get_index, image_hashes
+from ..media import MediaArchive, get_store, link, member_picture_size
+from ..config import get_settings
+from ..profiling import span
+from ..session import get_session
+from ..utils import is_image, layout_to_dict
+from .snapshot import Snapshot, expand
 
 
 class Images:
-    def __init__(self, presentation_path):
+    """
+    Presentation is the already opened presentation_path, for example by Analyze. Without it the file is opened in the
+    session of the backend and closed by close()
+    """
+
+    def __init__(self, presentation_path, backend="com", Presentation=None, session=None):
         super().__init__()
-        self._path = presentation_path
-        self._Presentation = Application.Presentations.Open(presentation_path, WithWindow=False)
+        self._path, self._backend, self._snapshot, self._distortions = presentation_path, backend, None, None
+        self._document, self._renderer = None, None
+        self._session = None
+        if Presentation is None:
+            self._session = session or get_session(backend)
+            Presentation = self._session.open(presentation_path)
+        self._Presentation = Presentation
         Path("temp").mkdir(exist_ok=True, parents=True)
         self.destination = Path(f"temp/{self._Presentation.Name}").resolve()
         self.destination.mkdir(exist_ok=True, parents=True)
 
+    @property
+    def snapshot(self):
+        """Snapshot with all fields"""
+        return self.fetch()
+
+    def fetch(self, fields=None):
+        """Snapshot with at least fields, the presentation is read again only if the last one lacks some of them"""
+        fields = expand(fields)
+        if self._snapshot is None or not fields <= self._snapshot.fields:
+            if self._snapshot is not None:
+                fields |= self._snapshot.fields
+            with span("snapshot", fields=",".join(sorted(fields))):
+                self._snapshot = Snapshot(self._Presentation, fields)
+        return self._snapshot
+
+    @property
+    def document(self):
+        """The presentation opened with ooxml backend, the same as _Presentation when it's the backend in use"""
+        if self._document is None:
+            from ..backends import ooxml
+            if self._backend == "ooxml":
+                self._document = self._Presentation
+            else:
+                self._document = ooxml.Presentation(self._path)
+        return self._document
+
+    @property
+    def renderer(self):
+        if self._renderer is None:
+            from .render import Renderer
+            self._renderer = Renderer(self.document)
+        return self._renderer
+
     @staticmethod
     def __draw_rectangle(draw, shape_dimensions, color, outline="red"):
         draw.rectangle(
@@ -33,60 +75,77 @@ class Images:
         )
 
     def skeleton(self):
-        paths = []
-        for Slide in self._Presentation.Slides:
-            path = Path.joinpath(self.destination, f"skeleton_{Slide.SlideIndex}.jpg")
-            image = Image.new(
-                "RGB",
-                color="white",
-                size=(pt_to_px(self._Presentation.PageSetup.SlideWidth),
-                      pt_to_px(self._Presentation.PageSetup.SlideHeight))
-            )
-            skeleton_draw = ImageDraw.Draw(image)
-            for Shape in Slide.Shapes:
-                shape_dimensions = get_shape_dimensions(Shape)
-                if is_text(Shape) is True:
-                    self.__draw_rectangle(skeleton_draw, shape_dimensions, "yellow", "red")
-                elif is_text(Shape) is None:
-                    self.__draw_rectangle(skeleton_draw, shape_dimensions, "orange", "yellow")
-                elif is_image(Shape) is True:
-                    self.__draw_rectangle(skeleton_draw, shape_dimensions, "blue", "yellow")
-                else:
-                    self.__draw_rectangle(skeleton_draw, shape_dimensions, "red", "yellow")
-            image.save(path)
+        from .render import cached_image, digest
+        paths, snapshot = [], self.fetch({"kind"})
+        for slide in snapshot.slides:
+            path = Path.joinpath(self.destination, f"skeleton_{slide.index}.jpg")
+            key = digest("skeleton", snapshot.width, snapshot.height, repr(slide.shapes))
+            link(cached_image(key, lambda: self.__skeleton(slide, snapshot.width, snapshot.height)), path)
             paths.append(path)
         return paths
 
+    def __skeleton(self, slide, width, height):
+        from PIL import Image, ImageDraw
+        image = Image.new("RGB", color="white", size=(width, height))
+        skeleton_draw = ImageDraw.Draw(image)
+        for shape in slide.shapes:
+            shape_dimensions = shape.dimensions
+            if shape.text is True:
+                self.__draw_rectangle(skeleton_draw, shape_dimensions, "yellow", "red")
+            elif shape.text is None:
+                self.__draw_rectangle(skeleton_draw, shape_dimensions, "orange", "yellow")
+            elif shape.image is True:
+                self.__draw_rectangle(skeleton_draw, shape_dimensions, "blue", "yellow")
+            else:
+                self.__draw_rectangle(skeleton_draw, shape_dimensions, "red", "yellow")
+        return image
+
     def layout(self, lt="DEFAULT"):
         """
         Experimental
         """
-        paths = []
-        color = (250, 250, 250, 1)
-        layout = layout_to_dict(pt_to_px(self._Presentation.PageSetup.SlideWidth),
-                                pt_to_px(self._Presentation.PageSetup.SlideHeight),
-                                lt)
+        from .render import cached_image, digest
+        paths, snapshot = [], self.fetch(())
+        layout = layout_to_dict(snapshot.width, snapshot.height, lt)
         for slide in layout:
             path = Path.joinpath(self.destination, f"layout_{slide}.png")
-            image = Image.new(
-                "RGB",
-                (pt_to_px(self._Presentation.PageSetup.SlideWidth), pt_to_px(self._Presentation.PageSetup.SlideHeight)),
-                "white"
-            )
-            draw = ImageDraw.Draw(image, "RGBA")
-            for block_type in layout[slide]:
-                if block_type == "title":
-                    color = (27, 94, 32, 100)
-                elif block_type == "images":
-                    color = (245, 127, 23, 120)
-                elif block_type == "text":
-                    color = (26, 35, 126, 175)
-                for dims in layout[slide][block_type]:
-                    self.__draw_rectangle(draw, dims, color)
-            image.save(path)
+            key = digest("layout", snapshot.width, snapshot.height, repr(layout[slide]))
+            link(cached_image(key, lambda: self.__layout(layout[slide], snapshot.width, snapshot.height), ".png"),
+                 path)
             paths.append(path)
         return paths
 
+    def __layout(self, blocks, width, height):
+        from PIL import Image, ImageDraw
+        color = (250, 250, 250, 1)
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image, "RGBA")
+        for block_type in blocks:
+            if block_type == "title":
+                color = (27, 94, 32, 100)
+            elif block_type == "images":
+                color = (245, 127, 23, 120)
+            elif block_type == "text":
+                color = (26, 35, 126, 175)
+            for dims in blocks[block_type]:
+                self.__draw_rectangle(draw, dims, color)
+        return image
+
+    def previews(self, scale=1.0):
+        """Slides drawn from shapes and embedded media without Office, cached by content of the slide"""
+        paths = []
+        for Slide in self.document.Slides:
+            path = Path.joinpath(self.destination, f"preview_{Slide.SlideIndex}.jpg")
+            paths.append(link(self.renderer.preview(Slide, scale), path))
+        return paths
+
+    def thumbnail(self, slide=1):
+        return link(self.renderer.thumbnail(self.document.Slides(slide)), Path(self.destination, "thumb.jpg"))
+
+    def contact_sheet(self):
+        """Thumbnails of all slides on one image"""
+        return link(self.renderer.contact_sheet(), Path(self.destination, "contact_sheet.jpg"))
+
     def get_shape_images(self):
         """
         Reserved for internal use
@@ -103,55 +162,92 @@ class Images:
         return paths
 
     def save_original_images(self):
-        paths = []
-        file = zipfile.ZipFile(self._path)
+        paths, store = [], get_store()
         destination = Path.joinpath(self.destination, "media")
         destination.mkdir(parents=True, exist_ok=True)
-        for f in file.namelist():
-            if f.startswith('ppt/media'):
-                path = Path.joinpath(destination, Path(f).name)
-                shutil.copyfileobj(file.open(f), open(path, "wb"))
-                paths.append(path)
+        with MediaArchive(self._path) as archive:
+            for media in archive.media():
+                paths.append(link(store.put(archive, media), Path.joinpath(destination, media.name)))
         return paths
 
-    def compare(self, path='original_images'):
+    def compare(self, path='original_images', tolerance=None):
         if Path(path).exists():
-            original_images, compare_counter, shape_images, images_counter = [], 0, self.save_original_images(), 0
-            for extension in ['*.png', '*.jpg', '*.jpeg']:
-                original_images.extend(Path(path).resolve().glob(extension))
-            for o_path in original_images:
-                for s_path in shape_images:
-                    o_image = Image.open(o_path)
-                    s_image = Image.open(s_path)
-                    if average_hash(o_image) == average_hash(s_image):
-                        compare_counter += 1
-                        break
-            for Slide in self._Presentation.Slides:
-                for Shape in Slide.Shapes:
-                    if is_image(Shape):
-                        images_counter += 1
+            index, matched, images_counter = get_index(path), set(), 0
+            tolerance = get_settings().image_hash_tolerance if tolerance is None else tolerance
+            with MediaArchive(self._path) as archive:
+                openers = [functools.partial(archive.open, media) for media in archive.media()]
+                # None for formats Pillow can't read, for example svg
+                for value in image_hashes(openers, index.kind):
+                    if value is not None:
+                        matched.update(index.search(value, tolerance))
+            compare_counter = len(matched)
+            for shape in self.fetch({"kind"}).shapes():
+                if shape.image:
+                    images_counter += 1
             if compare_counter == images_counter:
                 return True
         return False
 
-    def distorted_images(self):
-        for Slide in self._Presentation.Slides:
-            for Shape in Slide.Shapes:
-                if is_image(Shape):
-                    w, h = get_shape_percentage_width_height(Shape)
-                    if abs(w - h) > 10:
-                        return True
+    def image_distortions(self):
+        """
+        (slide, shape name, width %, height %, distortion %) of every picture. Width and height are percentages of
+        the cropped original size, as ScaleWidth and ScaleHeight of PowerPoint, distortion is the difference between
+        them. Pixel size and resolution are read from the media header, the presentation isn't changed
+        """
+        if self._distortions is None:
+            self._distortions = []
+            presentation = self.document
+            archive = presentation.package.zip
+            for Slide in presentation.Slides:
+                for Shape in Slide.Shapes:
+                    name = Shape.media() if is_image(Shape) else None
+                    size = member_picture_size(archive, name) if name else None
+                    if not size or not size[0] or not size[1]:
+                        continue
+                    crop = Shape.srcRect.attrib if Shape.srcRect is not None else {}
+                    l, t, r, b = (int(crop.get(k, 0)) / 100000 for k in ("l", "t", "r", "b"))
+                    original_width, original_height = size[0] * (1 - l - r), size[1] * (1 - t - b)
+                    if original_width <= 0 or original_height <= 0:
+                        continue
+                    w, h = Shape.Width / original_width * 100, Shape.Height / original_height * 100
+                    self._distortions.append((Slide.SlideIndex, Shape.Name, round(w), round(h), round(abs(w - h), 1)))
+        return self._distortions
+
+    def distorted_images(self, tolerance=10):
+        for slide, name, w, h, distortion in self.image_distortions():
+            if distortion > tolerance:
+                return True
         return False
 
     def get(self, thumb=False):
+        if self._backend == "ooxml":
+            # there is no Office to export slides, previews are drawn instead
+            return self.thumbnail() if thumb else self.previews()
         paths = []
         for Slide in self._Presentation.Slides:
             path = Path.joinpath(self.destination, f"screenshot_{Slide.SlideIndex}.jpg")
             Slide.Export(path, "JPG")
             paths.append(path)
             if thumb:
-                image = Image.open(path)
-                image.thumbnail((200, 200), Image.ANTIALIAS)
-                image.save(Path(self.destination, "thumb.jpg"))
+                from PIL import Image
+                with Image.open(path) as image:
+                    image.draft("RGB", (200, 200))
+                    image.thumbnail((200, 200), Image.LANCZOS)
+                    image.save(Path(self.destination, "thumb.jpg"))
                 return Path(self.destination, "thumb.jpg")
         return paths
+
+    def close(self):
+        if self._document is not None and self._document is not self._Presentation:
+            self._document.Close()
+        self._document, self._renderer = None, None
+        if self._session is not None and self._Presentation is not None:
+            self._session.close(self._Presentation)
+            self._Presentation = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,164 @@
+"""
+Slide previews drawn from the shape geometry and embedded media of the .pptx, without Office.
+Rendered images are cached in temp/previews by a hash of what they are drawn from
+"""
+import math
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+import exam.config as configuration
+from ..media import MediaStore
+from ..resultcache import digest
+from ..text import frame_bounds, load_font
+from ..utils import is_image, pt_to_px
+
+# change when drawing changes, so old cached previews are not used
+RENDER_VERSION = 1
+THUMB_SIZE = (200, 200)
+SHEET_COLUMNS = 4
+SHEET_PADDING = 10
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = MediaStore("temp/previews", configuration.get_settings().preview_cache_size_mb * 1024 * 1024)
+    return _store
+
+
+def cached_image(key, render, suffix=".jpg"):
+    """Path of the cached image for key, render() is called to make PIL image only when it isn't cached"""
+    store = get_store()
+    path = store.get(key)
+    if path is not None:
+        return path
+    data = BytesIO()
+    render().save(data, Image.registered_extensions()[suffix])
+    return store.write(key, data.getvalue(), suffix)
+
+
+def _font(name, size):
+    font = load_font(name)
+    if font is not None:
+        return font.font_variant(size=max(size, 1))
+    try:
+        return ImageFont.load_default(size=max(size, 1))
+    except TypeError:
+        # Pillow older than 10.1 has only the bitmap font
+        return ImageFont.load_default()
+
+
+class Renderer:
+    """Draws slides of an ooxml Presentation"""
+
+    def __init__(self, presentation):
+        self.presentation = presentation
+        self.archive = presentation.package.zip
+        self.width = pt_to_px(presentation.PageSetup.SlideWidth)
+        self.height = pt_to_px(presentation.PageSetup.SlideHeight)
+
+    def slide_key(self, Slide, scale):
+        """Hash of the slide, its layout and master parts and crc of the media it references"""
+        package, parts = self.presentation.package, [RENDER_VERSION, scale, self.width, self.height]
+        for part in (Slide.part, Slide.layout, Slide.master):
+            if part:
+                parts.append(package.read(part))
+        for target, typeof in sorted(package.rels(Slide.part).values()):
+            if target in self.archive.NameToInfo:
+                info = self.archive.getinfo(target)
+                parts.append(f"{target}:{info.CRC}:{info.file_size}")
+        return digest(*parts)
+
+    def render(self, Slide, scale=1.0, shapes=None):
+        """The slide drawn at scale, only shapes of it if they are given"""
+        image = Image.new("RGB", (max(round(self.width * scale), 1), max(round(self.height * scale), 1)), "white")
+        draw = ImageDraw.Draw(image)
+        for Shape in Slide.Shapes if shapes is None else shapes:
+            box = [round(pt_to_px(value) * scale) for value in (Shape.Left, Shape.Top, Shape.Width, Shape.Height)]
+            if box[2] <= 0 or box[3] <= 0:
+                continue
+            if is_image(Shape) and Shape.media():
+                self.__picture(image, Shape, box)
+            elif Shape.HasTextFrame and Shape.TextFrame.HasText:
+                self.__text(draw, Shape, scale)
+            else:
+                draw.rectangle([box[0], box[1], box[0] + box[2], box[1] + box[3]], outline=(200, 200, 200))
+        return image
+
+    def __picture(self, image, Shape, box):
+        try:
+            crop = Shape.srcRect.attrib if Shape.srcRect is not None else {}
+            l, t, r, b = (int(crop.get(k, 0)) / 100000 for k in ("l", "t", "r", "b"))
+            # decoded straight from the zip member, the compressed picture is never read into memory as a whole
+            with self.archive.open(Shape.media()) as member, Image.open(member) as picture:
+                # JPEG is decoded at 1/2, 1/4 or 1/8 of its size when it's still bigger than the box
+                picture.draft("RGB", (max(round(box[2] / max(1 - l - r, 0.01)), 1),
+                                      max(round(box[3] / max(1 - t - b, 0.01)), 1)))
+                picture = picture.convert("RGBA")
+            width, height = picture.size
+            picture = picture.crop((round(width * l), round(height * t), round(width * (1 - r)),
+                                    round(height * (1 - b))))
+            picture = picture.resize((box[2], box[3]), Image.BILINEAR)
+        except (OSError, ValueError):
+            # not a raster image, for example EMF on Linux
+            ImageDraw.Draw(image).rectangle([box[0], box[1], box[0] + box[2], box[1] + box[3]], fill=(180, 200, 230))
+            return
+        image.paste(picture, (box[0], box[1]), picture)
+
+    @staticmethod
+    def __text(draw, Shape, scale):
+        frame = Shape.TextFrame.frame()
+        left, top, width, height = frame_bounds(frame, Shape.Left, Shape.Top, Shape.Width, Shape.Height)
+        left, y, width = pt_to_px(left) * scale, pt_to_px(top) * scale, pt_to_px(width) * scale
+        for paragraph in frame.paragraphs:
+            size = max([run.size for run in paragraph.runs if run.text.strip()] or [paragraph.size])
+            size *= frame.font_scale
+            name = next((run.name for run in paragraph.runs if run.text.strip()), "")
+            font = _font(name, round(pt_to_px(size) * scale))
+            for line in paragraph.text.split("\x0b"):
+                line = line.strip()
+                if line:
+                    x, line_width = left, draw.textlength(line, font=font)
+                    if paragraph.align == "ctr":
+                        x += (width - line_width) / 2
+                    elif paragraph.align == "r":
+                        x += width - line_width
+                    draw.text((x, y), line, fill="black", font=font)
+                y += pt_to_px(size) * 1.2 * scale
+
+    def render_shape(self, Shape, scale=1.0):
+        """The shape alone on white, cropped to its box"""
+        box = [round(pt_to_px(value) * scale) for value in (Shape.Left, Shape.Top, Shape.Width, Shape.Height)]
+        image = self.render(Shape.Parent, scale, [Shape])
+        return image.crop((box[0], box[1], box[0] + max(box[2], 1), box[1] + max(box[3], 1)))
+
+    def preview(self, Slide, scale=1.0):
+        return cached_image(self.slide_key(Slide, scale), lambda: self.render(Slide, scale))
+
+    def thumbnail(self, Slide, size=THUMB_SIZE):
+        scale = min(size[0] / self.width, size[1] / self.height)
+        return self.preview(Slide, scale)
+
+    def contact_sheet(self, size=THUMB_SIZE):
+        """All slides as thumbnails on one image"""
+        thumbs = [self.thumbnail(Slide, size) for Slide in self.presentation.Slides]
+        key = digest(RENDER_VERSION, "sheet", *(path.stem for path in thumbs))
+
+        def render():
+            scale = min(size[0] / self.width, size[1] / self.height)
+            cell_width, cell_height = max(round(self.width * scale), 1), max(round(self.height * scale), 1)
+            columns = min(SHEET_COLUMNS, len(thumbs)) or 1
+            rows = math.ceil(len(thumbs) / columns) or 1
+            sheet = Image.new("RGB", (columns * (cell_width + SHEET_PADDING) + SHEET_PADDING,
+                                      rows * (cell_height + SHEET_PADDING) + SHEET_PADDING), (235, 235, 235))
+            for number, path in enumerate(thumbs):
+                with Image.open(path) as thumb:
+                    x = SHEET_PADDING + number % columns * (cell_width + SHEET_PADDING)
+                    y = SHEET_PADDING + number // columns * (cell_height + SHEET_PADDING)
+                    sheet.paste(thumb, (x, y))
+            return sheet
+
+        return cached_image(key, render)
@@ -0,0 +1,139 @@
+from ..constants import msoPlaceholder
+from ..utils import pt_to_px, is_text, is_image, is_title, get_shape_dimensions, get_shape_crop_values
+
+# attributes a snapshot can read besides names, ids and page setup, which are always read
+SHAPE_FIELDS = ("bounds", "kind", "font", "crop", "placeholder_type")
+SLIDE_FIELDS = ("animations", "transition")
+FIELDS = frozenset(SHAPE_FIELDS + SLIDE_FIELDS)
+# field -> fields it is computed from
+DEPENDENCIES = {"kind": ("bounds",), "font": ("kind",)}
+
+
+def expand(fields=None):
+    """fields with everything they depend on, all fields for None"""
+    if fields is None:
+        return FIELDS
+    result, pending = set(), list(fields)
+    while pending:
+        field = pending.pop()
+        if field not in FIELDS:
+            raise ValueError(f"unknown snapshot field {field}")
+        if field not in result:
+            result.add(field)
+            pending.extend(DEPENDENCIES.get(field, ()))
+    return frozenset(result)
+
+
+class Record:
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self):
+        values = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__ if hasattr(self, k))
+        return f"{type(self).__name__}({values})"
+
+
+class ShapeRecord(Record):
+    """
+    Attributes of fields the snapshot wasn't asked for are not set and raise AttributeError.
+    kind - title, text, empty (text frame without text), image or other
+    text - result of is_text: True, None for empty or out of bounds text, False if shape has no text frame
+    bounds - (left, top, width, height) in px as returned by get_shape_dimensions
+    crop - (left, top, right, bottom) in px or None
+    """
+    __slots__ = ("kind", "name", "id", "text", "image", "title", "bounds", "crop", "font_name", "font_size",
+                 "placeholder_type")
+
+    @property
+    def dimensions(self):
+        return dict(zip(("left", "top", "width", "height"), self.bounds))
+
+
+class SlideRecord(Record):
+    __slots__ = ("index", "shapes", "animations", "transition")
+
+
+class Snapshot(Record):
+    """
+    What the checks need from a presentation, read in one pass over slides and shapes. Only the given fields
+    (see FIELDS) are read, all of them by default
+    """
+    __slots__ = ("name", "slide_width", "slide_height", "orientation", "slides", "fields")
+
+    def __init__(self, Presentation, fields=None):
+        PageSetup, fields = Presentation.PageSetup, expand(fields)
+        super().__init__(
+            name=Presentation.Name,
+            slide_width=PageSetup.SlideWidth,
+            slide_height=PageSetup.SlideHeight,
+            orientation=PageSetup.SlideOrientation,
+            slides=tuple(self.__slide(Slide, fields) for Slide in Presentation.Slides),
+            fields=fields,
+        )
+
+    @staticmethod
+    def __slide(Slide, fields):
+        values = dict(index=Slide.SlideIndex, shapes=tuple(Snapshot.__shape(Shape, fields) for Shape in Slide.Shapes))
+        if "animations" in fields:
+            values["animations"] = Slide.TimeLine.MainSequence.Count
+        if "transition" in fields:
+            values["transition"] = Slide.SlideShowTransition.EntryEffect
+        return SlideRecord(**values)
+
+    @staticmethod
+    def __shape(Shape, fields):
+        values = dict(name=Shape.Name, id=Shape.Id)
+        if "bounds" in fields:
+            dims = get_shape_dimensions(Shape)
+            values["bounds"] = (dims["left"], dims["top"], dims["width"], dims["height"])
+        if "kind" in fields:
+            text, image, title = is_text(Shape, dims), is_image(Shape), is_title(Shape)
+            if title:
+                kind = "title"
+            elif text:
+                kind = "text"
+            elif text is None:
+                kind = "empty"
+            elif image:
+                kind = "image"
+            else:
+                kind = "other"
+            values.update(kind=kind, text=text, image=image, title=title)
+        if "font" in fields:
+            font_name = font_size = None
+            if values["text"]:
+                Font = Shape.TextFrame.TextRange.Font
+                font_name, font_size = Font.Name, Font.Size
+            values.update(font_name=font_name, font_size=font_size)
+        if "crop" in fields:
+            crop = get_shape_crop_values(Shape)
+            values["crop"] = (crop["left"], crop["top"], crop["right"], crop["bottom"]) if crop else None
+        if "placeholder_type" in fields:
+            values["placeholder_type"] = Shape.PlaceholderFormat.Type if Shape.Type == msoPlaceholder else None
+        return ShapeRecord(**values)
+
+    @property
+    def width(self):
+        return pt_to_px(self.slide_width)
+
+    @property
+    def height(self):
+        return pt_to_px(self.slide_height)
+
+    @property
+    def count(self):
+        return len(self.slides)
+
+    def slide(self, index):
+        return self.slides[index - 1]
+
+    def shapes(self, index=None):
+        if index is not None:
+            return self.slide(index).shapes
+        return tuple(shape for slide in self.slides for shape in slide.shapes)
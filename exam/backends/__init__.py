@@ -0,0 +1,19 @@
+from importlib import import_module
+
+BACKENDS = ("com", "ooxml")
+
+
+def _module(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+    return import_module(f".{backend}", __name__)
+
+
+def get_application(backend="com"):
+    """Returns Application object of the backend, com - PowerPoint through pywin32, ooxml - reads .pptx directly"""
+    return _module(backend).Application
+
+
+def new_application(backend="com"):
+    """Starts a new Application of the backend, used by sessions that quit and restart it"""
+    return _module(backend).new_application()
@@ -0,0 +1,14 @@
+from win32com.client import Dispatch
+
+
+def new_application():
+    return Dispatch("PowerPoint.Application")
+
+
+def __getattr__(name):
+    # PowerPoint is started on first use of Application, not on import
+    if name == "Application":
+        global Application
+        Application = new_application()
+        return Application
+    raise AttributeError(f"module {__name__} has no attribute {name}")
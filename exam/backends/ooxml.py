@@ -0,0 +1,614 @@
+"""
+Read-only PowerPoint object model built straight from the .pptx package (presentation, slides, layouts, masters,
+theme and their rels). Mirrors the part of the COM API used by exam, so the checks work without Office.
+"""
+import posixpath
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+from ..constants import (msoTrue, msoFalse, msoAutoShape, msoChart, msoGroup, msoEmbeddedOLEObject, msoLine,
+                         msoPicture, msoLinkedPicture, msoPlaceholder, msoTextBox, msoTable, msoOrientationHorizontal,
+                         msoOrientationVertical, ppPlaceholderTitle, ppPlaceholderBody, ppPlaceholderCenterTitle,
+                         ppPlaceholderSubtitle, ppPlaceholderObject, ppPlaceholderChart, ppPlaceholderBitmap,
+                         ppPlaceholderMediaClip, ppPlaceholderOrgChart, ppPlaceholderTable, ppPlaceholderSlideNumber,
+                         ppPlaceholderHeader, ppPlaceholderFooter, ppPlaceholderDate, ppPlaceholderPicture,
+                         ppEffectNone, ppShapeFormatGIF, ppShapeFormatJPG, ppShapeFormatPNG, ppShapeFormatBMP)
+from ..media import member_picture_size
+from ..text import Run, Paragraph, Frame, frame_bounds
+
+EMU_PER_PT = 12700
+# Pillow formats of FilterName of Slide.Export and of Filter of Shape.Export
+SLIDE_FORMATS = {"JPG": "JPEG", "JPEG": "JPEG", "PNG": "PNG", "GIF": "GIF", "BMP": "BMP"}
+SHAPE_FORMATS = {ppShapeFormatGIF: "GIF", ppShapeFormatJPG: "JPEG", ppShapeFormatPNG: "PNG", ppShapeFormatBMP: "BMP"}
+
+NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+R_ID, R_EMBED, R_LINK = (f"{{{NS['r']}}}id", f"{{{NS['r']}}}embed", f"{{{NS['r']}}}link")
+
+PLACEHOLDER_TYPES = {
+    "title": ppPlaceholderTitle,
+    "body": ppPlaceholderBody,
+    "ctrTitle": ppPlaceholderCenterTitle,
+    "subTitle": ppPlaceholderSubtitle,
+    "obj": ppPlaceholderObject,
+    "chart": ppPlaceholderChart,
+    "clipArt": ppPlaceholderBitmap,
+    "media": ppPlaceholderMediaClip,
+    "dgm": ppPlaceholderOrgChart,
+    "tbl": ppPlaceholderTable,
+    "sldNum": ppPlaceholderSlideNumber,
+    "hdr": ppPlaceholderHeader,
+    "ftr": ppPlaceholderFooter,
+    "dt": ppPlaceholderDate,
+    "pic": ppPlaceholderPicture,
+    "sldImg": ppPlaceholderObject,
+}
+TITLE_PLACEHOLDERS = ("title", "ctrTitle")
+OTHER_PLACEHOLDERS = ("dt", "ftr", "sldNum", "hdr")
+GRAPHIC_FRAME_TYPES = {
+    "http://schemas.openxmlformats.org/drawingml/2006/table": msoTable,
+    "http://schemas.openxmlformats.org/drawingml/2006/chart": msoChart,
+}
+# default insets of a:bodyPr, in emu
+BODY_INSETS = {"lIns": 91440, "tIns": 45720, "rIns": 91440, "bIns": 45720}
+
+
+def emu_to_pt(value):
+    return int(value) / EMU_PER_PT
+
+
+def _export_scale(width, height, ScaleWidth=0, ScaleHeight=0):
+    """Scale of an exported image of width x height px to ScaleWidth or ScaleHeight px, 1 if neither is given"""
+    if ScaleWidth and width:
+        return ScaleWidth / width
+    if ScaleHeight and height:
+        return ScaleHeight / height
+    return 1.0
+
+
+class Package:
+    def __init__(self, path):
+        self.path = str(path)
+        self.zip = zipfile.ZipFile(self.path)
+        self._parts, self._rels = {}, {}
+
+    def read(self, name):
+        return self.zip.read(name)
+
+    def part(self, name):
+        if name not in self._parts:
+            self._parts[name] = ElementTree.fromstring(self.zip.read(name))
+        return self._parts[name]
+
+    def rels(self, name):
+        """rId -> (target part name or external url, relationship type) for the part"""
+        if name not in self._rels:
+            directory, filename = posixpath.split(name)
+            rels_name = posixpath.join(directory, "_rels", f"{filename}.rels")
+            rels = {}
+            if rels_name in self.zip.NameToInfo:
+                for rel in ElementTree.fromstring(self.zip.read(rels_name)).findall("rel:Relationship", NS):
+                    target = rel.get("Target")
+                    if rel.get("TargetMode") != "External":
+                        target = posixpath.normpath(posixpath.join(directory, target)).lstrip("/")
+                    rels[rel.get("Id")] = (target, rel.get("Type").rsplit("/", 1)[-1])
+            self._rels[name] = rels
+        return self._rels[name]
+
+    def related(self, name, rel_type):
+        for target, typeof in self.rels(name).values():
+            if typeof == rel_type:
+                return target
+        return None
+
+    def close(self):
+        self.zip.close()
+
+
+def _placeholder(element):
+    """Returns p:ph element of a shape or None"""
+    for nv in element:
+        if nv.tag.split("}")[-1].startswith("nv"):
+            return nv.find("p:nvPr/p:ph", NS)
+    return None
+
+
+def _placeholder_key(ph):
+    return ph.get("type", "obj"), ph.get("idx", "0")
+
+
+def _find_placeholder(spTree, typeof, idx, by_idx=True):
+    if spTree is None:
+        return None
+    candidates = [(element, _placeholder(element)) for element in spTree]
+    candidates = [(element, ph) for element, ph in candidates if ph is not None]
+    if by_idx:
+        for element, ph in candidates:
+            if ph.get("idx", "0") == idx:
+                return element
+    for element, ph in candidates:
+        if ph.get("type", "obj") == typeof:
+            return element
+    if typeof in TITLE_PLACEHOLDERS:
+        for element, ph in candidates:
+            if ph.get("type", "obj") in TITLE_PLACEHOLDERS:
+                return element
+    elif typeof not in OTHER_PLACEHOLDERS:
+        for element, ph in candidates:
+            if ph.get("type", "obj") == "body":
+                return element
+    return None
+
+
+def _xfrm(element):
+    tag = element.tag.split("}")[-1]
+    if tag == "graphicFrame":
+        return element.find("p:xfrm", NS)
+    if tag == "grpSp":
+        return element.find("p:grpSpPr/a:xfrm", NS)
+    return element.find("p:spPr/a:xfrm", NS)
+
+
+def _level_props(styles, level):
+    """Yields a:lvlNpPr elements of the paragraph level from the closest list style to the farthest"""
+    tag = f"a:lvl{level + 1}pPr"
+    for style in styles:
+        if style is not None:
+            props = style.find(tag, NS)
+            if props is not None:
+                yield props
+
+
+class Font:
+    def __init__(self, name, size):
+        self.Name, self.Size = name, size
+
+
+class TextRange:
+    def __init__(self, frame, start=1, length=None):
+        self._frame, self._start, self._length = frame, start, length
+
+    @property
+    def Text(self):
+        text = self._frame.text
+        if self._length is None:
+            return text[self._start - 1:]
+        return text[self._start - 1:self._start - 1 + self._length]
+
+    @property
+    def Length(self):
+        return len(self.Text)
+
+    @property
+    def Font(self):
+        for paragraph in self._frame.paragraphs:
+            for run in paragraph.runs:
+                if run.text.strip():
+                    return Font(run.name, run.size)
+        if self._frame.paragraphs:
+            paragraph = self._frame.paragraphs[0]
+            return Font(paragraph.runs[0].name if paragraph.runs else "", paragraph.size)
+        return Font("", 0)
+
+    def Characters(self, start, length):
+        return TextRange(self._frame, self._start + start - 1, length)
+
+    def Delete(self):
+        text = self._frame.text
+        end = len(text) if self._length is None else self._start - 1 + self._length
+        self._frame.text = text[:self._start - 1] + text[end:]
+
+    @property
+    def BoundLeft(self):
+        return self._frame.bounds()[0]
+
+    @property
+    def BoundTop(self):
+        return self._frame.bounds()[1]
+
+    @property
+    def BoundWidth(self):
+        return self._frame.bounds()[2]
+
+    @property
+    def BoundHeight(self):
+        return self._frame.bounds()[3]
+
+
+class TextFrame:
+    def __init__(self, shape, paragraphs, body_props):
+        self._shape, self.paragraphs, self._body_props = shape, paragraphs, body_props
+        self.text = "\r".join(p.text for p in paragraphs)
+        self.MarginLeft, self.MarginTop, self.MarginRight, self.MarginBottom = (
+            emu_to_pt(body_props.get(k, BODY_INSETS[k])) for k in ("lIns", "tIns", "rIns", "bIns")
+        )
+        self.WordWrap = msoFalse if body_props.get("wrap") == "none" else msoTrue
+        self.anchor = body_props.get("anchor", "t")
+
+    @property
+    def HasText(self):
+        return bool(self.text)
+
+    @property
+    def TextRange(self):
+        return TextRange(self)
+
+    def frame(self):
+        props = self._body_props
+        return Frame(
+            self.paragraphs,
+            (self.MarginLeft, self.MarginTop, self.MarginRight, self.MarginBottom),
+            wrap=self.WordWrap != msoFalse,
+            anchor=self.anchor,
+            font_scale=int(props.get("fontScale", 100000)) / 100000,
+            spacing_reduction=int(props.get("lnSpcReduction", 0)) / 100000,
+            fit_shape=props.get("autofit") == "spAutoFit",
+        )
+
+    def bounds(self):
+        """(left, top, width, height) of the visible text, in points"""
+        shape = self._shape
+        return frame_bounds(self.frame(), shape.Left, shape.Top, shape.Width, shape.Height)
+
+
+class PlaceholderFormat:
+    def __init__(self, typeof):
+        self.Type = typeof
+
+
+class PictureFormat:
+    def __init__(self, left=0, top=0, right=0, bottom=0):
+        self.CropLeft, self.CropTop, self.CropRight, self.CropBottom = left, top, right, bottom
+
+
+class Shape:
+    def __init__(self, slide, element, layout_element=None, master_element=None):
+        self.Application, self.Parent = Application, slide
+        self._element, self._inherited = element, [e for e in (layout_element, master_element) if e is not None]
+        self.tag = element.tag.split("}")[-1]
+        cNvPr = next(nv for nv in element if nv.tag.split("}")[-1].startswith("nv"))[0]
+        self.Name, self.Id = cNvPr.get("name", ""), int(cNvPr.get("id", 0))
+        self.Visible = msoFalse if cNvPr.get("hidden") in ("1", "true") else msoTrue
+        self.ph = _placeholder(element)
+        self.Left, self.Top, self.Width, self.Height = self.__geometry()
+        self.Type = self.__type()
+        self.HasTextFrame = msoTrue if self.tag == "sp" else msoFalse
+        self.blip = element.find("p:blipFill/a:blip", NS)
+        self.srcRect = element.find("p:blipFill/a:srcRect", NS)
+
+    def __geometry(self):
+        for element in [self._element] + self._inherited:
+            xfrm = _xfrm(element)
+            if xfrm is not None and xfrm.find("a:off", NS) is not None:
+                off, ext = xfrm.find("a:off", NS), xfrm.find("a:ext", NS)
+                return (emu_to_pt(off.get("x", 0)), emu_to_pt(off.get("y", 0)),
+                        emu_to_pt(ext.get("cx", 0)), emu_to_pt(ext.get("cy", 0)))
+        return 0.0, 0.0, 0.0, 0.0
+
+    def __type(self):
+        if self.ph is not None:
+            return msoPlaceholder
+        if self.tag == "pic":
+            blip = self._element.find("p:blipFill/a:blip", NS)
+            if blip is not None and blip.get(R_LINK) and not blip.get(R_EMBED):
+                return msoLinkedPicture
+            return msoPicture
+        if self.tag == "grpSp":
+            return msoGroup
+        if self.tag == "cxnSp":
+            return msoLine
+        if self.tag == "graphicFrame":
+            data = self._element.find("a:graphic/a:graphicData", NS)
+            return GRAPHIC_FRAME_TYPES.get(data.get("uri") if data is not None else None, msoEmbeddedOLEObject)
+        if self._element.find("p:nvSpPr/p:cNvSpPr", NS).get("txBox") in ("1", "true"):
+            return msoTextBox
+        return msoAutoShape
+
+    @property
+    def PlaceholderFormat(self):
+        if self.ph is None:
+            raise AttributeError(f"Shape {self.Name} is not a placeholder")
+        return PlaceholderFormat(PLACEHOLDER_TYPES.get(self.ph.get("type", "obj"), ppPlaceholderObject))
+
+    @property
+    def TextFrame(self):
+        if not self.HasTextFrame:
+            raise AttributeError(f"Shape {self.Name} has no text frame")
+        if not hasattr(self, "_text_frame"):
+            self._text_frame = self.Parent.Parent.text_frame(self)
+        return self._text_frame
+
+    @property
+    def PictureFormat(self):
+        if self.srcRect is None:
+            return PictureFormat()
+        # srcRect is in 1/1000 of percent of the picture, crop in COM is relative to the uncropped picture size
+        l, t, r, b = (int(self.srcRect.get(k, 0)) / 100000 for k in ("l", "t", "r", "b"))
+        width, height = self.Width / max(1 - l - r, 0.01), self.Height / max(1 - t - b, 0.01)
+        return PictureFormat(l * width, t * height, r * width, b * height)
+
+    def media(self):
+        """Part name of the embedded picture or None"""
+        if self.blip is None or not self.blip.get(R_EMBED):
+            return None
+        return self.Parent.Parent.package.rels(self.Parent.part).get(self.blip.get(R_EMBED), (None,))[0]
+
+    def __original_size(self):
+        name = self.media()
+        size = member_picture_size(self.Parent.Parent.package.zip, name) if name else None
+        if size is None:
+            return self.Width, self.Height
+        width, height = size
+        if self.srcRect is not None:
+            l, t, r, b = (int(self.srcRect.get(k, 0)) / 100000 for k in ("l", "t", "r", "b"))
+            width, height = width * (1 - l - r), height * (1 - t - b)
+        return width, height
+
+    def ScaleWidth(self, Factor, RelativeToOriginalSize=msoFalse, fScale=0):
+        self.Width = (self.__original_size()[0] if RelativeToOriginalSize else self.Width) * Factor
+
+    def ScaleHeight(self, Factor, RelativeToOriginalSize=msoFalse, fScale=0):
+        self.Height = (self.__original_size()[1] if RelativeToOriginalSize else self.Height) * Factor
+
+    def Export(self, PathName, Filter=ppShapeFormatPNG, ScaleWidth=0, ScaleHeight=0, ExportMode=1):
+        """The shape drawn by analyze.render alone, ScaleWidth or ScaleHeight are the size of the image in px"""
+        from ..analyze.render import Renderer
+        from ..utils import pt_to_px
+        if Filter not in SHAPE_FORMATS:
+            raise ValueError(f"unsupported shape export filter {Filter}")
+        scale = _export_scale(pt_to_px(self.Width), pt_to_px(self.Height), ScaleWidth, ScaleHeight)
+        Renderer(self.Parent.Parent).render_shape(self, scale).save(str(PathName), SHAPE_FORMATS[Filter])
+
+
+class Collection:
+    def __init__(self, items):
+        self._items = items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __call__(self, index):
+        if isinstance(index, str):
+            return next(item for item in self._items if item.Name == index)
+        return self._items[index - 1]
+
+    @property
+    def Count(self):
+        return len(self._items)
+
+
+class _Count:
+    def __init__(self, count):
+        self.Count = count
+
+
+class TimeLine:
+    def __init__(self, count):
+        self.MainSequence = _Count(count)
+
+
+class SlideShowTransition:
+    def __init__(self, effect):
+        self.EntryEffect = effect
+
+
+class Slide:
+    def __init__(self, presentation, part, index):
+        self.Application, self.Parent = Application, presentation
+        self.part, self.SlideIndex = part, index
+        package = presentation.package
+        self.root = package.part(part)
+        self.layout = package.related(part, "slideLayout")
+        self.master = package.related(self.layout, "slideMaster") if self.layout else None
+        self.Name = f"Slide{index}"
+        self.SlideID = index
+
+    @property
+    def Shapes(self):
+        if not hasattr(self, "_shapes"):
+            package, shapes = self.Parent.package, []
+            layout_tree = package.part(self.layout).find("p:cSld/p:spTree", NS) if self.layout else None
+            master_tree = package.part(self.master).find("p:cSld/p:spTree", NS) if self.master else None
+            for element in self.__elements(self.root.find("p:cSld/p:spTree", NS)):
+                layout_element = master_element = None
+                ph = _placeholder(element)
+                if ph is not None:
+                    typeof, idx = _placeholder_key(ph)
+                    layout_element = _find_placeholder(layout_tree, typeof, idx)
+                    if layout_element is not None:
+                        typeof = _placeholder_key(_placeholder(layout_element))[0]
+                    master_element = _find_placeholder(master_tree, typeof, idx, by_idx=False)
+                shapes.append(Shape(self, element, layout_element, master_element))
+            self._shapes = Collection(shapes)
+        return self._shapes
+
+    @staticmethod
+    def __elements(spTree):
+        for element in spTree:
+            tag = element.tag.split("}")[-1]
+            if tag in ("sp", "pic", "grpSp", "graphicFrame", "cxnSp"):
+                yield element
+            elif tag == "AlternateContent":
+                branch = element.find("mc:Fallback", NS)
+                if branch is None:
+                    branch = element.find("mc:Choice", NS)
+                if branch is not None:
+                    yield from Slide.__elements(branch)
+
+    @property
+    def TimeLine(self):
+        main = None
+        for cTn in self.root.iterfind(".//p:timing//p:cTn", NS):
+            if cTn.get("nodeType") == "mainSeq":
+                main = cTn
+                break
+        count = 0 if main is None else sum(1 for cTn in main.iterfind(".//p:cTn", NS) if cTn.get("presetClass"))
+        return TimeLine(count)
+
+    @property
+    def SlideShowTransition(self):
+        for transition in self.root.iter(f"{{{NS['p']}}}transition"):
+            if len(transition):
+                return SlideShowTransition(1)
+        return SlideShowTransition(ppEffectNone)
+
+    def Export(self, FileName, FilterName="JPG", ScaleWidth=0, ScaleHeight=0):
+        """
+        The slide drawn by analyze.render: pictures, text and outlines of other shapes, without effects of Office.
+        ScaleWidth or ScaleHeight are the size of the image in px
+        """
+        from ..analyze.render import Renderer
+        image_format = SLIDE_FORMATS.get(str(FilterName).upper())
+        if image_format is None:
+            raise ValueError(f"unsupported slide export filter {FilterName}")
+        renderer = Renderer(self.Parent)
+        scale = _export_scale(renderer.width, renderer.height, ScaleWidth, ScaleHeight)
+        renderer.render(self, scale).save(str(FileName), image_format)
+
+
+class PageSetup:
+    def __init__(self, width, height):
+        self.SlideWidth, self.SlideHeight = width, height
+        self.SlideOrientation = msoOrientationHorizontal if width >= height else msoOrientationVertical
+
+
+class Presentation:
+    def __init__(self, path):
+        self.Application = Application
+        self.FullName, self.Name = str(path), Path(path).name
+        self.package = Package(path)
+        package = self.package
+        self.part = package.related("", "officeDocument") or "ppt/presentation.xml"
+        self.root = package.part(self.part)
+        size = self.root.find("p:sldSz", NS)
+        self.PageSetup = PageSetup(emu_to_pt(size.get("cx", 9144000)), emu_to_pt(size.get("cy", 6858000)))
+        rels, slides = package.rels(self.part), []
+        for number, sldId in enumerate(self.root.findall("p:sldIdLst/p:sldId", NS), start=1):
+            slides.append(Slide(self, rels[sldId.get(R_ID)][0], number))
+        self.Slides = Collection(slides)
+        self._themes = {}
+
+    def __theme_fonts(self, master):
+        if master not in self._themes:
+            fonts, theme = {}, self.package.related(master, "theme")
+            if theme:
+                scheme = self.package.part(theme).find("a:themeElements/a:fontScheme", NS)
+                for prefix, tag in (("+mj", "a:majorFont"), ("+mn", "a:minorFont")):
+                    font = scheme.find(tag, NS) if scheme is not None else None
+                    for script, child in (("lt", "a:latin"), ("ea", "a:ea"), ("cs", "a:cs")):
+                        element = font.find(child, NS) if font is not None else None
+                        fonts[f"{prefix}-{script}"] = element.get("typeface", "") if element is not None else ""
+            self._themes[master] = fonts
+        return self._themes[master]
+
+    def text_frame(self, shape):
+        """Builds TextFrame of the shape resolving text styles through layout, master and presentation defaults"""
+        slide, package = shape.Parent, self.package
+        body = shape._element.find("p:txBody", NS)
+        elements = [shape._element] + shape._inherited
+        body_props = {}
+        for element in reversed(elements):
+            bodyPr = element.find("p:txBody/a:bodyPr", NS)
+            if bodyPr is not None:
+                body_props.update(bodyPr.attrib)
+                for autofit in ("a:spAutoFit", "a:normAutofit", "a:noAutofit"):
+                    fit = bodyPr.find(autofit, NS)
+                    if fit is not None:
+                        body_props["autofit"] = autofit[2:]
+                        body_props.update(fit.attrib)
+        styles = [element.find("p:txBody/a:lstStyle", NS) for element in elements]
+        if slide.master:
+            txStyles = package.part(slide.master).find("p:txStyles", NS)
+            if shape.ph is None:
+                style = "p:otherStyle"
+            elif shape.ph.get("type", "obj") in TITLE_PLACEHOLDERS:
+                style = "p:titleStyle"
+            elif shape.ph.get("type", "obj") in OTHER_PLACEHOLDERS:
+                style = "p:otherStyle"
+            else:
+                style = "p:bodyStyle"
+            styles.append(txStyles.find(style, NS) if txStyles is not None else None)
+        styles.append(self.root.find("p:defaultTextStyle", NS))
+        theme_fonts = self.__theme_fonts(slide.master) if slide.master else {}
+        paragraphs = []
+        for p in (body.findall("a:p", NS) if body is not None else []):
+            pPr = p.find("a:pPr", NS)
+            level = int(pPr.get("lvl", 0)) if pPr is not None else 0
+            level_props = ([pPr] if pPr is not None else []) + list(_level_props(styles, level))
+            align, spacing, points = "l", 1.0, None
+            for props in level_props:
+                if props.get("algn"):
+                    align = props.get("algn")
+                    break
+            for props in level_props:
+                spcPct, spcPts = props.find("a:lnSpc/a:spcPct", NS), props.find("a:lnSpc/a:spcPts", NS)
+                if spcPct is not None:
+                    spacing = int(spcPct.get("val", 100000)) / 100000
+                    break
+                if spcPts is not None:
+                    points = int(spcPts.get("val", 0)) / 100
+                    break
+            defaults = [props.find("a:defRPr", NS) for props in level_props]
+            defaults = [d for d in defaults if d is not None]
+            runs = []
+            for child in p:
+                tag = child.tag.split("}")[-1]
+                if tag in ("r", "fld", "br"):
+                    rPr = child.find("a:rPr", NS)
+                    text = "\x0b" if tag == "br" else "".join(t.text or "" for t in child.findall("a:t", NS))
+                    runs.append(self.__run(text, ([rPr] if rPr is not None else []) + defaults, theme_fonts))
+            end = p.find("a:endParaRPr", NS)
+            size = self.__run("", ([end] if end is not None else []) + defaults, theme_fonts).size
+            paragraphs.append(Paragraph(runs, align, level, spacing, size, points))
+        return TextFrame(shape, paragraphs, body_props)
+
+    @staticmethod
+    def __run(text, props, theme_fonts):
+        size, name, bold, italic = None, None, None, None
+        for rPr in props:
+            if size is None and rPr.get("sz"):
+                size = int(rPr.get("sz")) / 100
+            if name is None and rPr.find("a:latin", NS) is not None:
+                name = rPr.find("a:latin", NS).get("typeface")
+            if bold is None and rPr.get("b") is not None:
+                bold = rPr.get("b") in ("1", "true")
+            if italic is None and rPr.get("i") is not None:
+                italic = rPr.get("i") in ("1", "true")
+        name = name or "+mn-lt"
+        return Run(text, size or 18.0, theme_fonts.get(name, name) if name.startswith("+") else name,
+                   bool(bold), bool(italic))
+
+    def Close(self):
+        self.package.close()
+
+
+class Presentations:
+    @staticmethod
+    def Open(FileName, ReadOnly=msoTrue, Untitled=msoFalse, WithWindow=msoFalse):
+        return Presentation(FileName)
+
+
+class _Application:
+    Presentations = Presentations()
+
+    def StartNewUndoEntry(self):
+        pass
+
+    def Quit(self):
+        pass
+
+
+Application = _Application()
+
+
+def new_application():
+    return _Application()
@@ -0,0 +1,177 @@
+"""
+Grading of whole directories of presentations on supervised worker processes
+"""
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+import traceback
+from concurrent.futures import as_completed
+from pathlib import Path
+
+import exam.config as configuration
+from .analyze.analyze import Analyze, CSV_FIELDNAMES, csv_row
+from .hashindex import get_index, file_digest
+from .resultcache import REFERENCES
+from .session import get_session
+from .templates import compiled_layouts
+
+BATCH_FIELDNAMES = ['Файл', 'Оценка', 'Макет', 'Время, с', 'Ошибка']
+_backend, _references = "com", REFERENCES
+
+
+def find_presentations(directory, recursive=False):
+    pattern = "**/*.pptx" if recursive else "*.pptx"
+    # skip lock files of opened presentations
+    return sorted(p for p in Path(directory).glob(pattern) if not p.name.startswith("~$"))
+
+
+def init_worker(backend, config_cache=None, references=None):
+    """
+    Keeps one backend per worker process, so it starts only once, installs already parsed configuration and loads
+    hash index of the reference images folder (original_images by default) the files are compared with
+    """
+    global _backend, _references
+    _backend, _references = backend, references or REFERENCES
+    if config_cache:
+        configuration.install_cache(config_cache)
+    get_session(backend).Application
+    compiled_layouts()
+    if Path(_references).is_dir():
+        get_index(_references).tree
+
+
+def grade(path, backend=None, profile=False, lazy=False):
+    """
+    Grades one presentation, never raises. Returns dict with file, sha256 digest of the file, result of
+    Analyze.get("analyze"), warnings, seconds spent and error text if grading failed. profile=True adds
+    Analyze.get("profile") as profile, lazy=True skips costly checks once the grade is 0
+    """
+    started = time.perf_counter()
+    result = {"file": str(path), "digest": None, "result": None, "warnings": None, "error": None}
+    try:
+        result["digest"] = file_digest(path)
+        with Analyze(str(Path(path).resolve()), backend or _backend, profile=profile, lazy=lazy,
+                     references=_references) as analyze:
+            result["result"], result["warnings"] = analyze.get("analyze"), analyze.warnings
+            if profile:
+                result["profile"] = analyze.get("profile")
+    except Exception as e:
+        result["error"] = "".join(traceback.format_exception_only(type(e), e)).strip()
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def status(graded):
+    """Short text of the result of grade for the log"""
+    if graded["error"] or not graded["result"]:
+        return graded["error"] or "не оценена"
+    mark = graded["result"][5]
+    return "оценка не определена" if mark is None else f"оценка {mark}"
+
+
+class CsvWriter:
+    def __init__(self, file, header=True):
+        self._writer = csv.writer(file, delimiter=',')
+        if header:
+            self._writer.writerow(BATCH_FIELDNAMES + CSV_FIELDNAMES)
+
+    def write(self, graded):
+        row = [graded["file"], "", "", f"{graded['seconds']:.3f}", graded["error"] or ""]
+        if graded["result"] is not None:
+            row[1], row[2] = graded["result"][5], graded["result"][4] or ""
+            row.extend(csv_row(graded["result"], graded["warnings"]))
+        self._writer.writerow(row)
+
+
+def to_record(graded):
+    """Result of grade as JSON-serializable dict with named parts of the analyze result"""
+    record = {"file": graded["file"], "digest": graded.get("digest"), "seconds": round(graded["seconds"], 3),
+              "error": graded["error"]}
+    if graded["result"] is not None:
+        presentation, structure, fonts, images, layout, mark = graded["result"]
+        record.update(presentation=presentation, structure=structure, fonts=fonts, images=images, layout=layout,
+                      grade=mark, warnings={str(k): v for k, v in graded["warnings"].items()})
+    if graded.get("profile"):
+        record["profile"] = graded["profile"]
+    return record
+
+
+class JsonlWriter:
+    def __init__(self, file):
+        self._file = file
+
+    def write(self, graded):
+        self._file.write(json.dumps(to_record(graded), ensure_ascii=False) + "\n")
+
+
+class SqliteWriter:
+    def __init__(self, database):
+        self._database = database
+
+    def write(self, graded):
+        self._database.write(to_record(graded))
+
+
+def open_writer(output, append=False):
+    """
+    (file, writer) for output by its suffix. append=True keeps what was written before and makes every flush of
+    .sqlite commit, so the written results are on disk before the caller records them as done
+    """
+    output = Path(output)
+    if output.suffix in (".sqlite", ".db"):
+        from .results import ResultsDB
+        database = ResultsDB(output, interval=0) if append else ResultsDB(output)
+        return database, SqliteWriter(database)
+    mode = "a" if append else "w"
+    if output.suffix == ".jsonl":
+        file = open(output, mode, encoding="utf-8")
+        return file, JsonlWriter(file)
+    # the same encoding as Analyze.export_csv
+    header = not append or not output.exists() or output.stat().st_size == 0
+    file = open(output, mode, newline='', encoding="windows-1251", errors="replace")
+    return file, CsvWriter(file, header)
+
+
+def summary(latencies, failed, elapsed):
+    total = len(latencies)
+    lines = [f"Файлов: {total}, ошибок: {failed}, время: {elapsed:.1f} с, "
+             f"{total / elapsed * 60 if elapsed else 0:.1f} файлов в минуту"]
+    if latencies:
+        ordered = sorted(latencies)
+        lines.append(f"Время на файл, с: среднее {statistics.mean(ordered):.3f}, "
+                     f"медиана {statistics.median(ordered):.3f}, "
+                     f"p95 {ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]:.3f}, максимум {ordered[-1]:.3f}")
+    return "\n".join(lines)
+
+
+def run_batch(directory, output, jobs=None, backend="com", recursive=False, log=sys.stderr, profile=False,
+              lazy=False, timeout=None, references=None):
+    """
+    Grades every .pptx in directory with jobs worker processes and streams rows to output (.csv, .jsonl or .sqlite)
+    as soon as each file is graded, .sqlite gets them in batched transactions. Failed files are written with their
+    error and don't stop the batch, a file not graded in timeout seconds (grade timeout s of config.ini by default)
+    is failed and its worker is started again. Pictures are compared with the images in references (original_images by
+    default).
+    profile=True adds time, backend reads and writes and memory of every check to .jsonl records, lazy=True skips
+    costly checks of files whose grade is already 0
+    """
+    from .supervisor import WorkerPool
+    paths = find_presentations(directory, recursive)
+    jobs = jobs or os.cpu_count() or 1
+    latencies, failed, started = [], 0, time.perf_counter()
+    file, writer = open_writer(output)
+    with file, WorkerPool(jobs, backend, timeout, references) as pool:
+        futures = [pool.submit(path, profile, lazy) for path in paths]
+        for done, future in enumerate(as_completed(futures), start=1):
+            graded = future.result()
+            writer.write(graded)
+            file.flush()
+            latencies.append(graded["seconds"])
+            failed += graded["error"] is not None
+            print(f"[{done}/{len(paths)}] {graded['file']}: {status(graded)} ({graded['seconds']:.2f} с)", file=log)
+    report = summary(latencies, failed, time.perf_counter() - started)
+    print(report, file=log)
+    return report
@@ -1,6 +1,96 @@
 import configparser
+import os
+import re
 from pathlib import Path
 
+CONFIG_PATH = Path.joinpath(Path(__file__).parent, 'config.ini')
+LAYOUTS_PATH = Path.joinpath(Path(__file__).parent, 'layouts.ini')
+# (path, key) -> (mtime of the file when the value was built, value)
+_cache = {}
+
+
+class Settings:
+    """
+    config.ini parsed into typed values. Dicts of analyze parameters are keyed by slide number
+    """
+
+    def __init__(self, parser):
+        constants, analyze = parser['CONSTANTS'], parser['ANALYZE']
+        self.text_out_of_bounds = int(constants['text out of bounds'])
+        self.fonts_directory = constants.get('fonts directory', '')
+        self.image_hash = constants.get('image hash', 'average')
+        self.image_hash_tolerance = int(constants.get('image hash tolerance', '0'))
+        self.media_cache_size_mb = int(constants.get('media cache size mb', '512'))
+        self.recycle_after = int(constants.get('recycle after files', '50'))
+        self.result_cache_size_mb = int(constants.get('result cache size mb', '64'))
+        self.preview_cache_size_mb = int(constants.get('preview cache size mb', '128'))
+        self.media_memory_mb = int(constants.get('media memory mb', '32'))
+        self.grade_timeout = float(constants.get('grade timeout s', '120'))
+        self.slides = int(analyze['slides'])
+        self.aspect_ratio = self.__ratio(analyze['aspect_ratio'])
+        self.text_blocks, self.images, self.font_sizes = {}, {}, {}
+        for key, value in analyze.items():
+            match = re.fullmatch(r"(text_blocks|images|font_sizes)_(\d+)", key)
+            if match is None:
+                continue
+            name, slide = match.group(1), int(match.group(2))
+            if name == "font_sizes":
+                self.font_sizes[slide] = tuple(float(size) for size in value.split(","))
+            else:
+                getattr(self, name)[slide] = int(value)
+
+    @staticmethod
+    def __ratio(value):
+        if "/" in value:
+            width, height = value.split("/")
+            return int(width) / int(height)
+        return float(value)
+
+    @classmethod
+    def load(cls, path=CONFIG_PATH):
+        config = configparser.ConfigParser()
+        config.read(path)
+        return cls(config)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def cached(path, key, build):
+    """
+    Returns build(path), it is called again only when modification time of the file changes or after invalidate
+    """
+    entry = _cache.get((str(path), key))
+    if entry is None or entry[0] != _mtime(path):
+        entry = _cache[(str(path), key)] = (_mtime(path), build(path))
+    return entry[1]
+
+
+def invalidate(path=None):
+    for cache_key in list(_cache):
+        if path is None or cache_key[0] == str(path):
+            del _cache[cache_key]
+
+
+def export_cache():
+    """Already parsed values with modification times of their files, for install in worker processes"""
+    return dict(_cache)
+
+
+def install_cache(entries):
+    """
+    Uses parsed values from export_cache, a file is read again only if it was changed after the values were parsed
+    """
+    _cache.update(entries)
+
+
+def get_settings():
+    return cached(CONFIG_PATH, "settings", Settings.load)
+
 
 def get_config():
     config = configparser.ConfigParser()
@@ -30,8 +120,9 @@ def modify_analyze(what_to_modify):
     cfg = get_config()
     for k in what_to_modify:
         cfg.set("ANALYZE", k, what_to_modify[k])
-    with open(Path.joinpath(Path(__file__).parent, 'config.ini'), "w") as config_file:
+    with open(CONFIG_PATH, "w") as config_file:
         cfg.write(config_file)
+    invalidate(CONFIG_PATH)
 
 
 def add_layout(name, layout_props):
@@ -65,5 +156,6 @@ def add_layout(name, layout_props):
             if layout_props[k].index(j) != len(layout_props[k]) - 1:
                 result_str += "|"
         cfg.set(name, k, result_str)
-    with open(Path.joinpath(Path(__file__).parent, 'layouts.ini'), "w") as config_file:
+    with open(LAYOUTS_PATH, "w") as config_file:
         cfg.write(config_file)
+    invalidate(LAYOUTS_PATH)
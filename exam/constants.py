@@ -7,5 +7,32 @@ ppPlaceholderTitle = 0x1
 ppPlaceholderSubtitle = 0x4
 msoScaleFromTopLeft = 0
 msoOrientationHorizontal = 1
+ppShapeFormatGIF = 0x0
 ppShapeFormatJPG = 0x1
+ppShapeFormatPNG = 0x2
+ppShapeFormatBMP = 0x3
 ppPlaceholderPicture = 0x12
+msoFalse = 0
+msoAutoShape = 1
+msoChart = 3
+msoGroup = 6
+msoEmbeddedOLEObject = 7
+msoLine = 9
+msoMedia = 16
+msoTextBox = 17
+msoTable = 19
+msoOrientationVertical = 2
+ppPlaceholderBody = 0x2
+ppPlaceholderVerticalTitle = 0x5
+ppPlaceholderVerticalBody = 0x6
+ppPlaceholderObject = 0x7
+ppPlaceholderChart = 0x8
+ppPlaceholderBitmap = 0x9
+ppPlaceholderMediaClip = 0xa
+ppPlaceholderOrgChart = 0xb
+ppPlaceholderTable = 0xc
+ppPlaceholderSlideNumber = 0xd
+ppPlaceholderHeader = 0xe
+ppPlaceholderFooter = 0xf
+ppPlaceholderDate = 0x10
+ppEffectNone = 0
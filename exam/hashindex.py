@@ -0,0 +1,250 @@
+"""
+On-disk perceptual hash index of the reference images used by Images.compare
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import exam.config as configuration
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg')
+INDEX_VERSION = 2
+HASH_KINDS = ("average", "difference", "perceptual")
+# images are decoded to GRID x GRID grayscale, 64 bit hashes are derived from it
+GRID, HASH_SIZE = 32, 8
+_indexes = {}
+_dct = _columns = None
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _grid(source):
+    """
+    GRID x GRID grayscale of an image path or a function returning an opened file, decoded at reduced scale.
+    None if it isn't an image Pillow can read
+    """
+    import numpy as np
+    from PIL import Image
+    file = source() if callable(source) else source
+    try:
+        with Image.open(file) as image:
+            # JPEG is decoded straight to 1/2..1/8 of its size, other formats are reduced by whole factors first
+            image.draft("L", (GRID * 4, GRID * 4))
+            if image.mode not in ("L", "RGB", "RGBA"):
+                image = image.convert("L")
+            image = image.resize((GRID, GRID), Image.LANCZOS, reducing_gap=2.0).convert("L")
+            return np.asarray(image, dtype=np.float32)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        if callable(source):
+            file.close()
+
+
+def _dct_matrix():
+    global _dct
+    if _dct is None:
+        import numpy as np
+        n = np.arange(GRID)
+        _dct = np.cos(np.pi * np.outer(n, 2 * n + 1) / (2 * GRID)).astype(np.float32)
+    return _dct
+
+
+def _column_weights():
+    """(GRID, HASH_SIZE + 1) matrix averaging grid columns into HASH_SIZE + 1 equal bins, the same as resizing"""
+    global _columns
+    if _columns is None:
+        import numpy as np
+        edges = np.linspace(0, GRID, HASH_SIZE + 2)
+        left = np.maximum(np.arange(GRID)[:, None], edges[None, :-1])
+        right = np.minimum(np.arange(GRID)[:, None] + 1, edges[None, 1:])
+        _columns = (np.clip(right - left, 0, None) / (GRID / (HASH_SIZE + 1))).astype(np.float32)
+    return _columns
+
+
+def grid_hashes(grids, kind="average"):
+    """64 bit hashes as ints of a (count, GRID, GRID) array of grayscale images, computed for all of them at once"""
+    import numpy as np
+    count, block = len(grids), GRID // HASH_SIZE
+    if not count:
+        return []
+    if kind == "average":
+        cells = grids.reshape(count, HASH_SIZE, block, HASH_SIZE, block).mean(axis=(2, 4)).reshape(count, -1)
+        bits = cells > cells.mean(axis=1, keepdims=True)
+    elif kind == "difference":
+        rows = grids.reshape(count, HASH_SIZE, block, GRID).mean(axis=2)
+        # HASH_SIZE + 1 column averages, every bit is whether brightness grows to the right
+        columns = rows @ _column_weights()
+        bits = (columns[:, :, 1:] > columns[:, :, :-1]).reshape(count, -1)
+    elif kind == "perceptual":
+        dct = _dct_matrix()
+        low = np.einsum("ij,njk,lk->nil", dct, grids, dct)[:, :HASH_SIZE, :HASH_SIZE].reshape(count, -1)
+        bits = low > np.median(low, axis=1, keepdims=True)
+    else:
+        raise ValueError(f"unknown hash kind {kind}, expected one of {', '.join(HASH_KINDS)}")
+    return [int.from_bytes(row.tobytes(), "big") for row in np.packbits(bits, axis=1)]
+
+
+def image_hashes(sources, kind="average", jobs=None):
+    """
+    Hashes of image paths or functions returning opened files, None for the ones that aren't images. Images are
+    decoded on a thread pool, Pillow releases the GIL while it decodes and resizes
+    """
+    import numpy as np
+    sources = list(sources)
+    if not sources:
+        return []
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(sources)))
+    if jobs == 1:
+        grids = [_grid(source) for source in sources]
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            grids = list(executor.map(_grid, sources))
+    decoded = [grid for grid in grids if grid is not None]
+    values = iter(grid_hashes(np.stack(decoded), kind) if decoded else [])
+    return [None if grid is None else next(values) for grid in grids]
+
+
+def hamming(first, second):
+    return bin(first ^ second).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over hamming distance, finds all hashes within tolerance without a full scan"""
+
+    def __init__(self):
+        self._root = None
+
+    def add(self, value, item):
+        if self._root is None:
+            self._root = (value, [item], {})
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            if distance not in node[2]:
+                node[2][distance] = (value, [item], {})
+                return
+            node = node[2][distance]
+
+    def search(self, value, tolerance=0):
+        found, stack = [], [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= tolerance:
+                found.extend(node[1])
+            for child_distance, child in node[2].items():
+                if distance - tolerance <= child_distance <= distance + tolerance:
+                    stack.append(child)
+        return found
+
+
+class HashIndex:
+    """
+    Hashes of the images in directory, stored in directory/.hash_index.json. Files are keyed by sha256 of their content,
+    a file is re-hashed only when its size or mtime changed and its digest is new. Files that aren't images Pillow can
+    read are kept with hash None, so they aren't digested again, and never match
+    """
+    FILENAME = ".hash_index.json"
+
+    def __init__(self, directory, kind="average"):
+        self.directory, self.kind = Path(directory).resolve(), kind
+        self.path = Path.joinpath(self.directory, self.FILENAME)
+        self.files, self.hashes = {}, {}
+        self._tree = None
+        self.load()
+        self.update()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("kind") == self.kind:
+            self.files, self.hashes = data.get("files", {}), data.get("hashes", {})
+
+    def save(self):
+        """Replaces the file at once, workers loading the index never find it half written"""
+        data = {"version": INDEX_VERSION, "kind": self.kind, "files": self.files, "hashes": self.hashes}
+        temp = self.path.with_name(f"{self.FILENAME}.{os.getpid()}.tmp")
+        try:
+            with open(temp, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temp, self.path)
+        except OSError:
+            # read-only reference folder, the index is still usable in memory
+            try:
+                temp.unlink()
+            except OSError:
+                pass
+
+    def update(self, jobs=None):
+        """Digests and hashes of new and changed files are computed on a thread pool, hashes in one batch"""
+        changed, files, pending = False, {}, []
+        for path in sorted(self.directory.iterdir()):
+            if path.suffix.lower() not in IMAGE_SUFFIXES or not path.is_file():
+                continue
+            stat, known = path.stat(), self.files.get(path.name)
+            if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+                files[path.name] = known
+                continue
+            pending.append((path, stat))
+        if pending:
+            changed = True
+            with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+                digests = list(executor.map(file_digest, [path for path, _ in pending]))
+            new = {digest: path for (path, _), digest in zip(pending, digests) if digest not in self.hashes}
+            for digest, value in zip(new, image_hashes(new.values(), self.kind, jobs)):
+                self.hashes[digest] = None if value is None else f"{value:0{HASH_SIZE * HASH_SIZE // 4}x}"
+            for (path, stat), digest in zip(pending, digests):
+                files[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "digest": digest}
+        used = {entry["digest"] for entry in files.values()}
+        if changed or files.keys() != self.files.keys() or used != self.hashes.keys():
+            self.files, self.hashes = files, {k: v for k, v in self.hashes.items() if k in used}
+            self._tree = None
+            self.save()
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = BKTree()
+            for name, entry in self.files.items():
+                if self.hashes[entry["digest"]] is not None:
+                    self._tree.add(int(self.hashes[entry["digest"]], 16), name)
+        return self._tree
+
+    def search(self, value, tolerance=0):
+        """Names of reference images whose hash is within tolerance bits from value"""
+        return self.tree.search(value, tolerance)
+
+    def __len__(self):
+        """Number of reference images, files that aren't images aren't counted"""
+        return sum(self.hashes[entry["digest"]] is not None for entry in self.files.values())
+
+
+def get_index(directory, kind=None):
+    """
+    HashIndex of directory kept for the life of the process, only checks the files for changes on next calls.
+    kind is 'image hash' of config.ini by default
+    """
+    directory = Path(directory).resolve()
+    kind = kind or configuration.get_settings().image_hash
+    index = _indexes.get((directory, kind))
+    if index is None:
+        index = _indexes[(directory, kind)] = HashIndex(directory, kind)
+    else:
+        index.update()
+    return index
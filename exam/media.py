@@ -0,0 +1,409 @@
+"""
+Access to ppt/media of presentations and content-addressed cache of extracted media shared by all presentations
+"""
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import struct
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+
+import exam.config as configuration
+
+MEDIA_PREFIX = "ppt/media/"
+CHUNK_SIZE = 1 << 20
+# JPEG start of frame markers, they hold the size of the image
+JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# resolution of pictures without one in the header, PowerPoint assumes it as well
+PICTURE_DPI = 96
+INCHES_PER_METER = 39.3701
+# suffix -> content type of media that are pictures, everything else in ppt/media (video, audio, ole) is skipped
+IMAGE_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".jpe": "image/jpeg",
+               ".gif": "image/gif", ".bmp": "image/bmp", ".tif": "image/tiff", ".tiff": "image/tiff",
+               ".emf": "image/x-emf", ".wmf": "image/x-wmf", ".svg": "image/svg+xml"}
+# signature, 22 bytes of fields not needed here, file name length and extra field length of a local file header
+LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+
+def media_members(archive, images_only=False):
+    """ZipInfo of every media file of opened presentation archive"""
+    return [info for info in archive.infolist() if info.filename.startswith(MEDIA_PREFIX) and not info.is_dir()
+            and (not images_only or is_image_name(info.filename))]
+
+
+def is_image_name(name):
+    return Path(name).suffix.lower() in IMAGE_TYPES
+
+
+class Media(namedtuple("Media", "name info size compressed_size content_type")):
+    """Media file listed from the central directory of the archive, size is uncompressed"""
+    __slots__ = ()
+
+    @property
+    def is_image(self):
+        return self.content_type.startswith("image/")
+
+    @classmethod
+    def from_info(cls, info):
+        suffix = Path(info.filename).suffix.lower()
+        return cls(Path(info.filename).name, info, info.file_size, info.compress_size,
+                   IMAGE_TYPES.get(suffix, "application/octet-stream"))
+
+
+def _read_exactly(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise EOFError
+    return data
+
+
+def _jpeg_size(file):
+    """(width, height, dpi) from the start of frame, dpi from the JFIF segment before it"""
+    dpi = None
+    while True:
+        marker = _read_exactly(file, 2)
+        while marker[0] != 0xFF or marker[1] == 0xFF:
+            # fill bytes before a marker
+            marker = marker[1:] + _read_exactly(file, 1)
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack(">H", _read_exactly(file, 2))[0]
+        if code in JPEG_SOF:
+            height, width = struct.unpack(">xHH", _read_exactly(file, 5))
+            return width, height, dpi
+        segment = _read_exactly(file, length - 2)
+        if code == 0xE0 and segment[:5] == b"JFIF\0" and len(segment) >= 12:
+            units, x, y = struct.unpack(">BHH", segment[7:12])
+            # 1 - dots per inch, 2 - dots per cm, 0 - only the aspect ratio of pixels
+            if units in (1, 2):
+                dpi = (x, y) if units == 1 else (x * 2.54, y * 2.54)
+
+
+def _png_dpi(file, head):
+    """dpi from the pHYs chunk, it comes before the image data. head - bytes of the chunks already read"""
+    def read(size):
+        nonlocal head
+        data, head = head[:size], head[size:]
+        return data + _read_exactly(file, size - len(data))
+
+    while True:
+        length, kind = struct.unpack(">I4s", read(8))
+        if kind in (b"IDAT", b"IEND"):
+            return None
+        data = read(length + 4)
+        if kind == b"pHYs" and length == 9:
+            x, y, unit = struct.unpack(">IIB", data[:9])
+            # unit 1 is meter, 0 is only the aspect ratio of pixels
+            return (x / INCHES_PER_METER, y / INCHES_PER_METER) if unit == 1 else None
+
+
+def image_info(file):
+    """
+    (width, height, dpi) of PNG, JPEG, GIF, BMP, EMF or WMF from the file-like object, only the header is read.
+    width and height are in pixels, dpi is (horizontal, vertical) or None if the header has no resolution.
+    None for other formats
+    """
+    try:
+        head = _read_exactly(file, 2)
+        if head == b"\xff\xd8":
+            return _jpeg_size(file)
+        head += file.read(44)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            width, height = struct.unpack(">II", head[16:24])
+            # signature and IHDR take 33 bytes, the other chunks follow
+            return width, height, _png_dpi(file, head[33:])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10]) + (None,)
+        if head.startswith(b"BM"):
+            width, height, x, y = struct.unpack("<ii12xii", head[18:46])
+            return width, abs(height), (x / INCHES_PER_METER, y / INCHES_PER_METER) if x > 0 and y > 0 else None
+        if head[:4] == b"\x01\x00\x00\x00" and head[40:44] == b" EMF":
+            # EMF header record, rclBounds is inclusive
+            left, top, right, bottom = struct.unpack("<iiii", head[8:24])
+            return right - left + 1, bottom - top + 1, None
+        if head[:4] == b"\xd7\xcd\xc6\x9a":
+            # placeable WMF, bounding box in metafile units
+            left, top, right, bottom = struct.unpack("<hhhh", head[6:14])
+            return right - left, bottom - top, None
+    except (EOFError, struct.error):
+        pass
+    return None
+
+
+def image_size(file):
+    """(width, height) in pixels from the header of the file-like object, None for unknown formats"""
+    info = image_info(file)
+    return info[:2] if info else None
+
+
+def member_picture_size(archive, name):
+    """
+    (width, height) in points of the picture at 100%, the pixel size at the resolution of its header or PICTURE_DPI,
+    None if the format is unknown
+    """
+    with archive.open(name) as member:
+        info = image_info(member)
+    if not info:
+        return None
+    width, height, dpi = info
+    x, y = dpi if dpi and dpi[0] > 0 and dpi[1] > 0 else (PICTURE_DPI, PICTURE_DPI)
+    return width / x * 72, height / y * 72
+
+
+class _MappedFile(io.RawIOBase):
+    """Seekable file over a memoryview of the mapped archive, reads copy only what was asked for"""
+
+    def __init__(self, view):
+        super().__init__()
+        self._view, self._position = view, 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._view = memoryview(b"")
+        super().close()
+
+
+class MediaArchive:
+    """
+    ppt/media of a presentation for random access through mmap of the archive. The listing comes from the zip central
+    directory without reading members, members are streamed in chunks and a member bigger than max_bytes is never
+    held in memory as a whole
+    """
+
+    def __init__(self, path, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = configuration.get_settings().media_memory_mb * 1024 * 1024
+        self.path, self.max_bytes = Path(path), max_bytes
+        self._file, self._map, self.zip = open(self.path, "rb"), None, None
+        try:
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # empty file or a file system without mmap, the zip is read through the file
+                pass
+            self.zip = zipfile.ZipFile(_MappedFile(memoryview(self._map)) if self._map is not None else self._file)
+        except Exception:
+            self.close()
+            raise
+
+    def media(self, images_only=True):
+        """Media of ppt/media, only pictures by default"""
+        return [Media.from_info(info) for info in media_members(self.zip, images_only)]
+
+    def view(self, media):
+        """memoryview of a stored (not compressed) member in the mapped archive or None"""
+        info = media.info
+        if self._map is None or info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return None
+        signature, name_length, extra_length = LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        if signature != b"PK\x03\x04":
+            return None
+        start = info.header_offset + LOCAL_HEADER.size + name_length + extra_length
+        return memoryview(self._map)[start:start + info.file_size]
+
+    def stream(self, media, chunk_size=CHUNK_SIZE):
+        """Yields the member in chunks of at most chunk_size bytes"""
+        view = self.view(media)
+        if view is not None:
+            for start in range(0, len(view), chunk_size):
+                yield view[start:start + chunk_size]
+            return
+        with self.zip.open(media.info) as member:
+            for chunk in iter(lambda: member.read(chunk_size), b""):
+                yield chunk
+
+    def digest(self, media):
+        digest = hashlib.sha256()
+        for chunk in self.stream(media):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def open(self, media):
+        """
+        Seekable binary file of the member: the mapped bytes if it's stored, bytes in memory if it's not bigger than
+        max_bytes, otherwise the member decompressed on the fly
+        """
+        view = self.view(media)
+        if view is not None:
+            return io.BufferedReader(_MappedFile(view))
+        if media.size <= self.max_bytes:
+            return io.BytesIO(self.zip.read(media.info))
+        return self.zip.open(media.info)
+
+    def image_size(self, media):
+        with self.open(media) as file:
+            return image_size(file)
+
+    def close(self):
+        if self.zip is not None:
+            self.zip.close()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # a view of a member is still alive, the map is closed when it's collected
+                pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_media(presentation_path, max_bytes=None):
+    """
+    Yields (Media, seekable file) of every picture straight from the archive, nothing is written to disk. The file
+    is valid until the next item
+    """
+    with MediaArchive(presentation_path, max_bytes) as archive:
+        for media in archive.media():
+            with archive.open(media) as file:
+                yield media, file
+
+
+def link(source, destination):
+    """Hard link destination to source, copies if the file system can't link"""
+    destination = Path(destination)
+    if destination.exists():
+        if destination.samefile(source):
+            return destination
+        destination.unlink()
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+    return destination
+
+
+class MediaStore:
+    """
+    Media files stored once by sha256 of their content in root/<2 first chars>/<digest><suffix>. Modification time
+    of stored file is its last use, least recently used files are removed when the store is bigger than max_bytes.
+    Files hard linked elsewhere by link() are not counted and not removed, removing them frees no space
+    """
+
+    def __init__(self, root="temp/media", max_bytes=512 * 1024 * 1024):
+        self.root, self.max_bytes = Path(root).resolve(), max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size = None
+
+    def path(self, digest, suffix=""):
+        return Path.joinpath(self.root, digest[:2], f"{digest}{suffix.lower()}")
+
+    def get(self, digest):
+        for path in Path.joinpath(self.root, digest[:2]).glob(f"{digest}*"):
+            if path.suffix == ".tmp":
+                continue
+            self.__touch(path)
+            return path
+        return None
+
+    def write(self, digest, data, suffix=""):
+        """Stores bytes under digest, replaces what was stored before"""
+        path = self.path(digest, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, path)
+        if self._size is not None:
+            self._size += len(data)
+        if self.size > self.max_bytes:
+            self.evict()
+        return path
+
+    def put(self, archive, media):
+        """
+        Stores Media of opened MediaArchive if it isn't stored yet, returns path to the stored file. The member is
+        streamed to disk in chunks
+        """
+        digest = archive.digest(media)
+        path = self.path(digest, Path(media.name).suffix)
+        if path.exists():
+            self.__touch(path)
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp, "wb") as file:
+            for chunk in archive.stream(media):
+                file.write(chunk)
+        os.replace(temp, path)
+        if self._size is not None:
+            self._size += media.size
+        if self.size > self.max_bytes:
+            self.evict()
+        return path
+
+    @property
+    def size(self):
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self.__owned())
+        return self._size
+
+    def evict(self, max_bytes=None):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        files = sorted(self.__owned())
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._size <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                # removed by another process
+                pass
+            self._size -= size
+
+    def __files(self):
+        return (path for path in self.root.glob("??/*") if path.suffix != ".tmp")
+
+    def __owned(self):
+        """(last use, size, path) of stored files that have no other hard links"""
+        for path in self.__files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if stat.st_nlink == 1:
+                yield stat.st_mtime_ns, stat.st_size, path
+
+    @staticmethod
+    def __touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = MediaStore(max_bytes=configuration.get_settings().media_cache_size_mb * 1024 * 1024)
+    return _store
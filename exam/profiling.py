@@ -0,0 +1,247 @@
+"""
+Opt-in profiling of grading: wall time, reads and writes of backend properties and peak memory of every check and
+of coarse helpers (opening a presentation, overlaps, layouts). Costs one global lookup per such call when it's off,
+small hot helpers like pt_to_px aren't wrapped at all
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# only objects of these modules are backend objects, everything else they return is used as is
+BACKEND_MODULES = ("exam.backends", "win32com")
+
+_active = None
+
+
+class Span:
+    __slots__ = ("name", "args", "start", "duration", "reads", "writes", "peak", "memory", "child_peak", "depth")
+
+    def __init__(self, name, args, depth):
+        self.name, self.args, self.depth = name, args, depth
+        self.start, self.duration = time.perf_counter(), 0.0
+        self.reads = self.writes = self.peak = 0
+        self.memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.child_peak = 0
+
+
+class Profiler:
+    """
+    Collects spans while active. Reads and writes of backend objects wrapped by wrap() are added to every open span,
+    so a check includes what its helpers read
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.spans, self._stack = [], []
+        self.reads = self.writes = 0
+        self.started = time.perf_counter()
+        self._owns_tracing = False
+
+    def activate(self):
+        return _Activation(self)
+
+    def span(self, name, **args):
+        return _SpanContext(self, name, args)
+
+    def record(self, name, **args):
+        """Activates the profiler and records one span, for the public entry points"""
+        return _Recording(self, name, args)
+
+    def wrap(self, value):
+        """Backend object whose attribute reads, writes and calls are counted"""
+        return Counted(value, self)
+
+    def count(self, reads=0, writes=0):
+        self.reads += reads
+        self.writes += writes
+        for span in self._stack:
+            span.reads += reads
+            span.writes += writes
+
+    def _enter(self, name, args):
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # peak of the parent before this span resets it
+                self._stack[-1].child_peak = max(self._stack[-1].child_peak, peak)
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        span = Span(name, args, len(self._stack))
+        self._stack.append(span)
+        return span
+
+    def _exit(self, span):
+        span.duration = time.perf_counter() - span.start
+        self._stack.pop()
+        if self.memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], span.child_peak)
+            span.peak = max(peak - span.memory, 0)
+            if self._stack:
+                self._stack[-1].child_peak = max(self._stack[-1].child_peak, peak)
+        self.spans.append(span)
+
+    def summary(self):
+        """name -> calls, seconds, reads, writes and peak bytes, summed over all spans with this name"""
+        result = {}
+        for span in self.spans:
+            entry = result.setdefault(span.name, {"calls": 0, "seconds": 0.0, "reads": 0, "writes": 0, "peak": 0})
+            entry["calls"] += 1
+            entry["seconds"] += span.duration
+            entry["reads"] += span.reads
+            entry["writes"] += span.writes
+            entry["peak"] = max(entry["peak"], span.peak)
+        for entry in result.values():
+            entry["seconds"] = round(entry["seconds"], 6)
+        return result
+
+    def as_dict(self):
+        return {"reads": self.reads, "writes": self.writes, "spans": self.summary()}
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.as_dict(), file, ensure_ascii=False, indent=2)
+        return path
+
+    def chrome_trace(self):
+        """Trace Event Format, opens in chrome://tracing or Perfetto"""
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [{"name": span.name, "ph": "X", "pid": pid, "tid": tid,
+                   "ts": round((span.start - self.started) * 1e6, 3), "dur": round(span.duration * 1e6, 3),
+                   "args": {**span.args, "reads": span.reads, "writes": span.writes, "peak": span.peak}}
+                  for span in sorted(self.spans, key=lambda span: (span.start, span.depth))]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.chrome_trace(), file, ensure_ascii=False)
+        return path
+
+
+class _Activation:
+    def __init__(self, profiler):
+        self.profiler, self.previous = profiler, None
+
+    def __enter__(self):
+        global _active
+        self.previous, _active = _active, self.profiler
+        if self.profiler.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.profiler._owns_tracing = True
+        return self.profiler
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active
+        _active = self.previous
+        if self.profiler._owns_tracing:
+            tracemalloc.stop()
+            self.profiler._owns_tracing = False
+        return False
+
+
+class _SpanContext:
+    __slots__ = ("profiler", "name", "args", "current")
+
+    def __init__(self, profiler, name, args):
+        self.profiler, self.name, self.args = profiler, name, args
+
+    def __enter__(self):
+        self.current = self.profiler._enter(self.name, self.args)
+        return self.current
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._exit(self.current)
+        return False
+
+
+class _Recording:
+    def __init__(self, profiler, name, args):
+        self.activation, self.span = _Activation(profiler), _SpanContext(profiler, name, args)
+
+    def __enter__(self):
+        self.activation.__enter__()
+        return self.span.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.span.__exit__(exc_type, exc_value, traceback)
+        return self.activation.__exit__(exc_type, exc_value, traceback)
+
+
+class _Nothing:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_nothing = _Nothing()
+
+
+def span(name, **args):
+    """Span of the active profiler, does nothing when profiling is off"""
+    if _active is None:
+        return _nothing
+    return _active.span(name, **args)
+
+
+def active():
+    return _active
+
+
+def profiled(function):
+    """Records every call of function as a span named by its qualified name when profiling is on"""
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return function(*args, **kwargs)
+        with _active.span(name):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class Counted:
+    """Proxy of a COM or ooxml object, every attribute read, write and call is counted by the profiler"""
+    __slots__ = ("_target", "_profiler")
+
+    def __init__(self, target, profiler):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def _wrap(self, value):
+        if isinstance(value, Counted) or not type(value).__module__.startswith(BACKEND_MODULES):
+            return value
+        return Counted(value, self._profiler)
+
+    def __getattr__(self, name):
+        self._profiler.count(reads=1)
+        return self._wrap(getattr(self._target, name))
+
+    def __setattr__(self, name, value):
+        self._profiler.count(writes=1)
+        setattr(self._target, name, value)
+
+    def __call__(self, *args, **kwargs):
+        self._profiler.count(reads=1)
+        return self._wrap(self._target(*args, **kwargs))
+
+    def __iter__(self):
+        for item in self._target:
+            self._profiler.count(reads=1)
+            yield self._wrap(item)
+
+    def __len__(self):
+        return len(self._target)
+
+    def __bool__(self):
+        return bool(self._target)
+
+    def __eq__(self, other):
+        return self._target == (other._target if isinstance(other, Counted) else other)
+
+    def __hash__(self):
+        return hash(self._target)
@@ -0,0 +1,110 @@
+"""
+Results of the checks stored on disk by digests of the parts of the presentation they depend on and of the criteria.
+Digests are computed from the archive without opening the presentation, so a resubmitted deck that didn't change
+is answered without Office at all
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import exam.config as configuration
+from .hashindex import file_digest
+from .media import MediaStore
+
+# change when checks change, so results of the old code are not used
+RESULT_VERSION = 3
+REFERENCES = "original_images"
+
+_store = None
+
+
+def digest(*parts):
+    value = hashlib.sha256()
+    for part in parts:
+        value.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        value.update(b"\0")
+    return value.hexdigest()
+
+
+def criteria_digest(references=REFERENCES):
+    """Digest of config.ini, layouts.ini and the list of reference images, everything the checks compare with"""
+    parts = [configuration.cached(path, "digest", file_digest)
+             for path in (configuration.CONFIG_PATH, configuration.LAYOUTS_PATH)]
+    references = Path(references)
+    if references.is_dir():
+        for path in sorted(references.iterdir()):
+            if path.is_file() and not path.name.startswith("."):
+                stat = path.stat()
+                parts.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return digest(*parts)
+
+
+def fonts_digest():
+    """Digest of the installed fonts text is measured with, a new font changes the text bounds"""
+    from .text import font_files
+    files = sorted(font_files().items())
+    return digest(*(f"{family}:{bold}:{italic}:{path}" for (family, bold, italic), path in files))
+
+
+def _part_digest(package, parts):
+    """Digest of xml parts and of the CRC of the files they refer to, read from the zip directory"""
+    archive, values = package.zip, []
+    for part in parts:
+        values.append(package.read(part))
+        for target, typeof in sorted(package.rels(part).values()):
+            info = archive.NameToInfo.get(target)
+            values.append(f"{typeof}:{target}:{info.CRC}:{info.file_size}" if info else f"{typeof}:{target}")
+    return digest(*values)
+
+
+def result_keys(path, backend="com", references=REFERENCES):
+    """
+    (key of the presentation checks, keys of the checks of every slide). A slide key depends on the slide, its layout,
+    master and theme, the slide size and default text style of presentation.xml, the presentation key on all slides
+    and presentation.xml. Both depend on the criteria and the installed fonts. references - folder of the original
+    images the presentation is compared with
+    """
+    from xml.etree import ElementTree
+    from .backends.ooxml import Package, NS, R_ID
+    package = Package(path)
+    try:
+        part = package.related("", "officeDocument") or "ppt/presentation.xml"
+        criteria = digest(RESULT_VERSION, backend, criteria_digest(references), fonts_digest())
+        # the rest of presentation.xml is the list of slides, reordering slides must not change the slide keys
+        shared = [ElementTree.tostring(element) for tag in ("p:sldSz", "p:defaultTextStyle")
+                  for element in package.part(part).findall(tag, NS)]
+        rels, slide_keys = package.rels(part), []
+        for number, sldId in enumerate(package.part(part).findall("p:sldIdLst/p:sldId", NS), start=1):
+            slide = rels[sldId.get(R_ID)][0]
+            layout = package.related(slide, "slideLayout")
+            master = package.related(layout, "slideMaster") if layout else None
+            theme = package.related(master, "theme") if master else None
+            parts = [p for p in (slide, layout, master, theme) if p]
+            slide_keys.append(digest(criteria, "slide", number, *shared, _part_digest(package, parts)))
+        presentation_key = digest(criteria, "presentation", _part_digest(package, [part]), *slide_keys)
+        return presentation_key, slide_keys
+    finally:
+        package.close()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = MediaStore("temp/results", configuration.get_settings().result_cache_size_mb * 1024 * 1024)
+    return _store
+
+
+def load(key):
+    """Cached dict or None, int keys are restored after JSON"""
+    path = get_store().get(key)
+    if path is None:
+        return None
+    try:
+        value = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return {int(k) if k.isdigit() else k: v for k, v in value.items()}
+
+
+def save(key, value):
+    get_store().write(key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ".json")
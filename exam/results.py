@@ -0,0 +1,196 @@
+"""
+Results of graded presentations in a local SQLite database for queries across a whole cohort. Presentations are keyed
+by the path of the file, so a resubmitted file replaces its old result, sha256 of the file is kept to find identical
+files of different students. CSV is written from the database, nothing is graded again
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS presentations (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    digest TEXT,
+    grade INTEGER,
+    layout TEXT,
+    seconds REAL,
+    error TEXT,
+    graded_at REAL NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS presentations_digest ON presentations (digest);
+CREATE INDEX IF NOT EXISTS presentations_grade ON presentations (grade);
+CREATE INDEX IF NOT EXISTS presentations_layout ON presentations (layout, grade);
+CREATE TABLE IF NOT EXISTS criteria (
+    presentation INTEGER NOT NULL REFERENCES presentations (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    criterion TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (presentation, criterion)
+);
+CREATE INDEX IF NOT EXISTS criteria_status ON criteria (criterion, status);
+CREATE TABLE IF NOT EXISTS warnings (
+    presentation INTEGER NOT NULL REFERENCES presentations (id) ON DELETE CASCADE,
+    slide INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS warnings_presentation ON warnings (presentation);
+"""
+# keys of a record holding criteria, the category of each of them
+CATEGORIES = ("presentation", "structure", "fonts", "images")
+FAILED = "Не выполнено"
+
+
+class ResultsDB:
+    """
+    Records of batch.to_record with the digest of the file. write() buffers them and commits batch_size records in one
+    transaction, flush() commits earlier if the oldest buffered record waits longer than interval seconds
+    """
+
+    def __init__(self, path="results.sqlite", batch_size=50, interval=2.0):
+        self.path, self.batch_size, self.interval = Path(path), batch_size, interval
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._pending, self._oldest = [], None
+        self.__migrate()
+
+    def __migrate(self):
+        """Creates the schema, records of a database keyed by digest are written again keyed by their file"""
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        records = []
+        if version == 0 and self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'presentations'").fetchone():
+            records = [json.loads(row[0]) for row in
+                       self._connection.execute("SELECT record FROM presentations ORDER BY graded_at")]
+            for record in records:
+                # files that couldn't be read were keyed by their path
+                if (record.get("digest") or "").startswith("file:"):
+                    record["digest"] = None
+            with self._connection:
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS warnings; DROP TABLE IF EXISTS criteria; DROP TABLE presentations;")
+        self._connection.executescript(SCHEMA)
+        self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._pending = records
+        self.commit()
+
+    def write(self, record):
+        if not self._pending:
+            self._oldest = time.monotonic()
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.commit()
+
+    def flush(self):
+        if self._pending and time.monotonic() - self._oldest >= self.interval:
+            self.commit()
+
+    def commit(self):
+        """Writes buffered records in one transaction, a record replaces the earlier one of the same file"""
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        now = time.time()
+        # the last result of the same file wins
+        records = list({record["file"]: record for record in records}.values())
+        with self._connection:
+            # criteria and warnings of replaced results are removed by cascade
+            self._connection.executemany("DELETE FROM presentations WHERE file = ?",
+                                         [(record["file"],) for record in records])
+            criteria, warnings = [], []
+            for record in records:
+                cursor = self._connection.execute(
+                    "INSERT INTO presentations (file, digest, grade, layout, seconds, error, graded_at, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record["file"], record.get("digest"), record.get("grade"), record.get("layout"),
+                     record["seconds"], record["error"], now, json.dumps(record, ensure_ascii=False)))
+                criteria.extend((cursor.lastrowid, category, criterion, status) for category in CATEGORIES
+                                for criterion, status in (record.get(category) or {}).items())
+                warnings.extend((cursor.lastrowid, int(slide), message)
+                                for slide, messages in (record.get("warnings") or {}).items() for message in messages)
+            self._connection.executemany(
+                "INSERT INTO criteria (presentation, category, criterion, status) VALUES (?, ?, ?, ?)", criteria)
+            self._connection.executemany("INSERT INTO warnings (presentation, slide, message) VALUES (?, ?, ?)",
+                                         warnings)
+
+    def get(self, file):
+        row = self._connection.execute("SELECT record FROM presentations WHERE file = ?", (str(file),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def records(self, where="", parameters=()):
+        """Records of presentations matching where, a condition on presentations table"""
+        query = "SELECT record FROM presentations" + (f" WHERE {where}" if where else "") + " ORDER BY file"
+        return [json.loads(row[0]) for row in self._connection.execute(query, parameters)]
+
+    def failing(self, criterion):
+        """(file, digest) of presentations where criterion isn't met, for example "Размер шрифта" """
+        return self._connection.execute(
+            "SELECT p.file, p.digest FROM criteria c JOIN presentations p ON p.id = c.presentation "
+            "WHERE c.criterion = ? AND c.status = ? ORDER BY p.file", (criterion, FAILED)).fetchall()
+
+    def copies(self):
+        """Groups of files with the same content, byte-identical submissions of different students"""
+        groups = {}
+        for digest, file in self._connection.execute(
+                "SELECT digest, file FROM presentations WHERE digest IN "
+                "(SELECT digest FROM presentations WHERE digest IS NOT NULL GROUP BY digest HAVING COUNT(*) > 1) "
+                "ORDER BY digest, file"):
+            groups.setdefault(digest, []).append(file)
+        return list(groups.values())
+
+    def grade_distribution(self):
+        """layout -> grade -> number of presentations, None is a presentation without layout or grade"""
+        distribution = {}
+        for layout, grade, count in self._connection.execute(
+                "SELECT layout, grade, COUNT(*) FROM presentations GROUP BY layout, grade ORDER BY layout, grade"):
+            distribution.setdefault(layout, {})[grade] = count
+        return distribution
+
+    def export_csv(self, path, where="", parameters=()):
+        """The same CSV as python -m exam batch -o results.csv, from the stored records"""
+        from .batch import CsvWriter
+        with open(path, "w", newline='', encoding="windows-1251", errors="replace") as file:
+            writer = CsvWriter(file)
+            for record in self.records(where, parameters):
+                writer.write(from_record(record))
+        return path
+
+    def close(self):
+        self.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def from_record(record):
+    """Result of batch.grade back from its record"""
+    graded = {"file": record["file"], "seconds": record["seconds"], "error": record["error"], "result": None,
+              "warnings": None}
+    if "grade" in record:
+        graded["result"] = (record["presentation"], record["structure"], record["fonts"], record["images"],
+                            record["layout"], record["grade"])
+        graded["warnings"] = {int(slide): messages for slide, messages in record["warnings"].items()}
+    return graded
+
+
+def export(database, output, grade=None, failing=None):
+    """CSV of the presentations in database, only with grade and only failing criterion if they are given"""
+    conditions, parameters = [], []
+    if grade is not None:
+        conditions.append("grade = ?")
+        parameters.append(grade)
+    if failing is not None:
+        conditions.append("id IN (SELECT presentation FROM criteria WHERE criterion = ? AND status = ?)")
+        parameters.extend((failing, FAILED))
+    with ResultsDB(database) as results:
+        return results.export_csv(output, " AND ".join(conditions), parameters)
@@ -0,0 +1,233 @@
+"""
+Local HTTP service grading uploaded presentations on a pool of warm supervised worker processes
+
+POST /grade - body is the .pptx file, answers with JSON of the grade (the same record as batch .jsonl),
+              ?lazy=1 or ?lazy=0 overrides the lazy mode of the service for the request
+GET /health - workers and queue state, 503 with the error if workers can't start the backend
+GET /metrics - queue depth, counters and latency percentiles
+"""
+import asyncio
+import collections
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+from .batch import to_record
+from .supervisor import WorkerPool
+
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+MAX_HEADER_SIZE = 64 * 1024
+LATENCY_WINDOW = 1000
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+           413: "Payload Too Large", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    __slots__ = ("path", "future", "lazy", "queued")
+
+    def __init__(self, path, future, lazy=False):
+        self.path, self.future, self.lazy, self.queued = path, future, lazy, time.perf_counter()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else None
+
+
+class GradingService:
+    """
+    jobs worker processes are started once with parsed configuration, layouts and the reference hash index.
+    At most queue_size uploads wait for a worker, others are refused with 503 until the queue has room.
+    A request waits timeout seconds for its grade counted from the upload, time in the queue included, then gets 504
+    and its file is skipped if no worker took it yet. A worker grading one file longer than timeout seconds or crashing
+    is killed and started again, the others go on, so one bad file never takes the service down.
+    lazy=True stops grading a file as soon as its grade is 0, see Analyze
+    """
+
+    def __init__(self, jobs=None, backend="com", queue_size=32, timeout=60, references="original_images",
+                 uploads="temp/uploads", lazy=False):
+        self.jobs, self.backend, self.lazy = jobs or os.cpu_count() or 1, backend, lazy
+        self.queue_size, self.timeout, self.references = queue_size, timeout, references
+        self.uploads = Path(uploads).resolve()
+        self.started = time.time()
+        self.counters = collections.Counter()
+        self.busy = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._queue, self._pool, self._consumers = None, None, []
+
+    async def start(self):
+        self.uploads.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._pool = WorkerPool(self.jobs, self.backend, self.timeout, self.references)
+        # wait for all workers now, so the first requests don't wait for Office and configuration
+        if not await asyncio.get_running_loop().run_in_executor(None, self._pool.ready):
+            self._pool.shutdown(cancel_futures=True)
+            raise RuntimeError(self._pool.error)
+        self._consumers = [asyncio.create_task(self.__consume()) for _ in range(self.jobs)]
+
+    async def stop(self):
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def __consume(self):
+        while True:
+            job = await self._queue.get()
+            # the request timed out while the job was queued, nobody waits for the grade
+            busy = not job.future.done()
+            self.busy += busy
+            try:
+                if busy:
+                    graded = await asyncio.wrap_future(self._pool.submit(job.path, False, job.lazy))
+                    if not job.future.done():
+                        job.future.set_result(graded)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self.busy -= busy
+                self._queue.task_done()
+                try:
+                    job.path.unlink()
+                except OSError:
+                    pass
+
+    async def submit(self, data, name="presentation.pptx", lazy=None):
+        """Queues uploaded file and waits for its grade, raises HttpError when the queue is full or on timeout"""
+        if self._queue.full():
+            self.counters["rejected"] += 1
+            raise HttpError(503, "очередь заполнена, повторите позже")
+        path = Path.joinpath(self.uploads, f"{uuid.uuid4().hex}_{Path(name).name or 'presentation.pptx'}")
+        loop = asyncio.get_running_loop()
+        job = Job(path, loop.create_future(), self.lazy if lazy is None else lazy)
+        await loop.run_in_executor(None, path.write_bytes, data)
+        try:
+            # other uploads could fill the queue while this one was written
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            path.unlink()
+            self.counters["rejected"] += 1
+            raise HttpError(503, "очередь заполнена, повторите позже")
+        self.counters["accepted"] += 1
+        try:
+            graded = await asyncio.wait_for(asyncio.shield(job.future), self.timeout)
+        except asyncio.TimeoutError:
+            job.future.cancel()
+            self.counters["timeouts"] += 1
+            raise HttpError(504, f"оценка не получена за {self.timeout} с")
+        self.latencies.append(time.perf_counter() - job.queued)
+        self.counters["failed" if graded["error"] else "graded"] += 1
+        record = to_record(graded)
+        record["file"] = Path(name).name
+        return record
+
+    def health(self):
+        """status is error with the error text if workers can't start the backend, the service can't grade then"""
+        if self._pool.error:
+            return {"status": "error", "error": self._pool.error, "backend": self.backend,
+                    "uptime": round(time.time() - self.started, 1)}
+        return {"status": "ok", "backend": self.backend, "workers": self.jobs, "busy": self.busy,
+                "queue": self._queue.qsize(), "uptime": round(time.time() - self.started, 1)}
+
+    def metrics(self):
+        ordered = sorted(self.latencies)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "busy": self.busy,
+            "workers": self.jobs,
+            **{key: self.counters[key] for key in ("accepted", "graded", "failed", "rejected", "timeouts")},
+            "worker_crashes": self._pool.counters["crashes"],
+            "worker_deadlines": self._pool.counters["deadlines"],
+            "worker_restarts": self._pool.counters["restarts"],
+            "latency": {"p50": percentile(ordered, 0.5), "p95": percentile(ordered, 0.95),
+                        "p99": percentile(ordered, 0.99), "max": ordered[-1] if ordered else None},
+        }
+
+    async def handle(self, reader, writer):
+        status, body = 200, None
+        try:
+            method, target, headers = await read_head(reader)
+            url = urlsplit(target)
+            if url.path == "/health":
+                body = self.health()
+                status = 200 if body["status"] == "ok" else 503
+            elif url.path == "/metrics":
+                body = self.metrics()
+            elif url.path == "/grade":
+                if method != "POST":
+                    raise HttpError(405, "нужен POST")
+                if "content-length" not in headers:
+                    raise HttpError(411, "нужен Content-Length")
+                length = int(headers["content-length"])
+                if length > MAX_UPLOAD_SIZE:
+                    raise HttpError(413, "файл слишком большой")
+                data = await reader.readexactly(length)
+                query = parse_qs(url.query)
+                name = query.get("name", ["presentation.pptx"])[0]
+                lazy = query["lazy"][0] not in ("0", "false") if "lazy" in query else None
+                body = await self.submit(data, name, lazy)
+            else:
+                raise HttpError(404, "нет такого адреса")
+        except HttpError as e:
+            status, body = e.status, {"error": str(e)}
+        except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            status, body = 400, {"error": "некорректный запрос"}
+        try:
+            content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(content)}\r\nConnection: close\r\n\r\n".encode("latin-1") + content)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def read_head(reader):
+    """(method, target, headers with lower case names) of HTTP request"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    if len(head) > MAX_HEADER_SIZE:
+        raise ValueError("header is too large")
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+async def serve(host="127.0.0.1", port=8080, log=sys.stderr, **options):
+    service = GradingService(**options)
+    try:
+        await service.start()
+    except RuntimeError as e:
+        print(f"Сервис проверки не запущен: {e}", file=log)
+        return
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_SIZE)
+    print(f"Сервис проверки запущен на http://{host}:{port}, процессов: {service.jobs}", file=log)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def run_service(host="127.0.0.1", port=8080, **options):
+    try:
+        asyncio.run(serve(host, port, **options))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,86 @@
+"""
+One application of a backend per process, shared by everything that opens presentations
+"""
+import atexit
+from contextlib import contextmanager
+
+import exam.config as configuration
+from .backends import new_application
+
+_sessions = {}
+
+
+class Session:
+    """
+    Owns an Application of the backend. Presentations are closed without quitting it, the application is restarted
+    after recycle_after opened files or after an error, so a stuck or leaking PowerPoint doesn't live forever
+    """
+
+    def __init__(self, backend="com", recycle_after=None):
+        self.backend = backend
+        self.recycle_after = recycle_after or configuration.get_settings().recycle_after
+        self.files = 0
+        self._Application = None
+
+    @property
+    def Application(self):
+        if self._Application is None:
+            self._Application = new_application(self.backend)
+            self.files = 0
+        return self._Application
+
+    def open(self, path):
+        return self.Application.Presentations.Open(str(path), WithWindow=False)
+
+    def close(self, Presentation, error=False):
+        """Closes presentation opened by open(), restarts the application if it's time or error is True"""
+        try:
+            Presentation.Close()
+        except Exception:
+            error = True
+        self.files += 1
+        if error or self.files >= self.recycle_after:
+            self.recycle()
+
+    @contextmanager
+    def presentation(self, path):
+        Presentation, error = self.open(path), False
+        try:
+            yield Presentation
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.close(Presentation, error)
+
+    def recycle(self):
+        if self._Application is not None:
+            try:
+                self._Application.Quit()
+            except Exception:
+                # already dead, a new one is started anyway
+                pass
+        self._Application, self.files = None, 0
+
+    def quit(self):
+        self.recycle()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.quit()
+        return False
+
+
+def get_session(backend="com"):
+    """Session of the backend shared by the process, its application is quit when the process exits"""
+    if backend not in _sessions:
+        _sessions[backend] = Session(backend)
+    return _sessions[backend]
+
+
+@atexit.register
+def _quit_sessions():
+    for session in _sessions.values():
+        session.quit()
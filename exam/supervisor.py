@@ -0,0 +1,282 @@
+"""
+Supervised worker processes grading presentations. Every worker has its own backend and grades one file at a time,
+each file has a hard deadline: a worker that hangs (a modal dialog of PowerPoint, a broken deck) or crashes is killed
+and started again, the file gets a result with the error and the other workers go on.
+
+Protocol over a multiprocessing Pipe, messages are pickled tuples:
+    worker -> supervisor: ("ready", pid) when the backend is started
+    supervisor -> worker: ("grade", job, args) - grade(*args), ("stop",) - exit
+    worker -> supervisor: ("done", job, result) or ("failed", job, error text) if grade raised
+"""
+import collections
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+import exam.config as configuration
+from .batch import grade, init_worker
+from .templates import compiled_layouts
+
+# seconds a worker has to start its backend
+STARTUP_TIMEOUT = 120.0
+# after this many failed starts in a row the backend is considered broken, files get its error instead of waiting
+STARTUP_ATTEMPTS = 3
+
+
+def _work(connection, function, initargs):
+    """Main of a worker process"""
+    init_worker(*initargs)
+    connection.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            # the supervisor is gone
+            break
+        if message[0] == "stop":
+            break
+        _, job, args = message
+        try:
+            connection.send(("done", job, function(*args)))
+        except Exception as e:
+            connection.send(("failed", job, "".join(traceback.format_exception_only(type(e), e)).strip()))
+
+
+def failed(path, error, seconds=0.0):
+    """Result of grade for a file the worker didn't grade"""
+    return {"file": str(path), "digest": None, "result": None, "warnings": None, "error": error, "seconds": seconds}
+
+
+class _Worker:
+    __slots__ = ("process", "connection", "ready", "job", "started")
+
+    def __init__(self, process, connection):
+        self.process, self.connection = process, connection
+        self.ready, self.job, self.started = False, None, time.monotonic()
+
+
+class _Job:
+    __slots__ = ("id", "path", "args", "future")
+
+    def __init__(self, id, path, args, future):
+        self.id, self.path, self.args, self.future = id, path, args, future
+
+
+class WorkerPool:
+    """
+    jobs supervised worker processes with the backend, configuration and the reference hash index loaded once.
+    submit() returns concurrent.futures.Future of the result of grade, it is never an exception: a file not graded
+    within deadline seconds (grade timeout s of config.ini by default) or killing its worker gets a result with the
+    error. function is called in workers instead of grade, a stand-in with the same arguments and result.
+    If workers can't start their backend STARTUP_ATTEMPTS times in a row, error is set and every file gets it
+    """
+
+    def __init__(self, jobs=None, backend="com", deadline=None, references=None, function=grade):
+        self.jobs, self.backend, self.function = jobs or os.cpu_count() or 1, backend, function
+        settings = configuration.get_settings()
+        self.deadline = settings.grade_timeout if deadline is None else deadline
+        compiled_layouts()
+        self._initargs = (backend, configuration.export_cache(), references)
+        # crashes - workers died during a file, deadlines - killed after deadline, restarts - workers started again
+        self.counters = collections.Counter()
+        # spawn everywhere, a forked worker would inherit the supervisor thread state and COM of the parent
+        self._context = multiprocessing.get_context("spawn")
+        self._lock, self._ids = threading.Lock(), itertools.count()
+        self._pending, self._closing, self._cancel, self._startup_failures = collections.deque(), False, False, 0
+        self._wakeup, self._wake = self._context.Pipe(duplex=False)
+        self._ready, self.error = threading.Event(), None
+        self._workers = [self.__spawn() for _ in range(self.jobs)]
+        self._thread = threading.Thread(target=self.__supervise, name="exam-supervisor", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, profile=False, lazy=False):
+        future = Future()
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("cannot submit to a pool after shutdown")
+            self._pending.append(_Job(next(self._ids), str(path), (str(path), None, profile, lazy), future))
+            self._wake.send_bytes(b"")
+        return future
+
+    def ready(self, timeout=None):
+        """Waits until every worker has started its backend, False on timeout or if they can't start"""
+        return self._ready.wait(timeout) and self.error is None
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        Workers exit when the submitted files are graded. cancel_futures=True cancels waiting files and kills workers in
+        the middle of a file, their files get a result with the error
+        """
+        with self._lock:
+            self._closing, self._cancel = True, self._cancel or cancel_futures
+            if not self._wake.closed:
+                self._wake.send_bytes(b"")
+        if wait:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(cancel_futures=exc_type is not None)
+        return False
+
+    def __spawn(self):
+        connection, child = self._context.Pipe()
+        process = self._context.Process(target=_work, args=(child, self.function, self._initargs),
+                                        name="exam-worker", daemon=True)
+        process.start()
+        child.close()
+        return _Worker(process, connection)
+
+    def __replace(self, worker):
+        """Kills the worker and starts a new one in its place"""
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(5)
+        worker.connection.close()
+        self._workers[self._workers.index(worker)] = self.__spawn()
+        self.counters["restarts"] += 1
+
+    def __finish(self, worker, result=None, error=None):
+        job, worker.job = worker.job, None
+        if job is None or job.future.done():
+            return
+        if error is not None:
+            result = failed(job.path, error, time.monotonic() - worker.started)
+        job.future.set_result(result)
+
+    def __supervise(self):
+        while True:
+            done = self.__dispatch()
+            if self._cancel:
+                for worker in self._workers:
+                    self.__finish(worker, error="Проверка прервана")
+            if done and not any(worker.job for worker in self._workers):
+                break
+            self.__wait()
+        self.__stop()
+
+    def __dispatch(self):
+        """Sends waiting files to idle workers, True when the pool is closing and nothing waits"""
+        assigned = []
+        with self._lock:
+            if self._cancel or self.error:
+                while self._pending:
+                    job = self._pending.popleft()
+                    if self.error and (job.future.running() or job.future.set_running_or_notify_cancel()):
+                        job.future.set_result(failed(job.path, self.error))
+                    elif not job.future.cancel():
+                        job.future.set_result(failed(job.path, "Проверка прервана"))
+            for worker in self._workers:
+                while worker.ready and worker.job is None and self._pending:
+                    job = self._pending.popleft()
+                    # a job is already running if it's back from a worker that died before getting it
+                    if job.future.running() or job.future.set_running_or_notify_cancel():
+                        worker.job, worker.started = job, time.monotonic()
+                        assigned.append(worker)
+            done = self._closing and not self._pending
+        for worker in assigned:
+            try:
+                worker.connection.send(("grade", worker.job.id, worker.job.args))
+            except OSError:
+                # died while it was idle, the file waits for the next worker
+                with self._lock:
+                    self._pending.appendleft(worker.job)
+                worker.job = None
+                self.__replace(worker)
+        return done
+
+    def __wait(self):
+        now, timeout = time.monotonic(), None
+        for worker in self._workers:
+            limit = self.deadline if worker.ready else STARTUP_TIMEOUT
+            if worker.ready and worker.job is None:
+                continue
+            left = max(worker.started + limit - now, 0)
+            timeout = left if timeout is None else min(timeout, left)
+        handles = {self._wakeup: None}
+        for worker in self._workers:
+            handles[worker.connection] = worker
+            handles[worker.process.sentinel] = worker
+        ready = wait(list(handles), timeout)
+        if self._wakeup in ready:
+            while self._wakeup.poll():
+                self._wakeup.recv_bytes()
+        for worker in {handles[handle] for handle in ready if handles[handle] is not None}:
+            self.__receive(worker)
+        now = time.monotonic()
+        for worker in list(self._workers):
+            if worker.ready and worker.job is not None and now - worker.started > self.deadline:
+                self.counters["deadlines"] += 1
+                self.__finish(worker, error=f"Проверка не закончилась за {self.deadline:g} с, процесс остановлен")
+                self.__replace(worker)
+            elif not worker.ready and now - worker.started > STARTUP_TIMEOUT:
+                self.__startup_failed(worker, f"Процесс проверки не запустился за {STARTUP_TIMEOUT:g} с")
+
+    def __receive(self, worker):
+        """Handles messages of the worker, then its exit"""
+        try:
+            while worker.connection.poll():
+                message = worker.connection.recv()
+                if message[0] == "ready":
+                    worker.ready, worker.started, self._startup_failures = True, time.monotonic(), 0
+                    if all(other.ready for other in self._workers):
+                        self._ready.set()
+                elif worker.job is None or worker.job.id != message[1]:
+                    # a result of a file that was already given up
+                    continue
+                elif message[0] == "done":
+                    self.__finish(worker, message[2])
+                elif message[0] == "failed":
+                    self.__finish(worker, error=message[2])
+        except (EOFError, OSError):
+            # the pipe is closed, the process is exiting
+            pass
+        if worker.process.is_alive():
+            return
+        worker.process.join()
+        if not worker.ready:
+            self.__startup_failed(worker, f"Процесс проверки не запустился, код {worker.process.exitcode}")
+            return
+        if worker.job is not None:
+            self.counters["crashes"] += 1
+            self.__finish(worker, error=f"Процесс проверки завершился аварийно, код {worker.process.exitcode}")
+        self.__replace(worker)
+
+    def __startup_failed(self, worker, error):
+        self._startup_failures += 1
+        if self._startup_failures < STARTUP_ATTEMPTS:
+            self.__replace(worker)
+            return
+        # the backend can't start, workers aren't started again and waiting files get the error at once
+        self.error = error
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(5)
+        worker.connection.close()
+        self._workers.remove(worker)
+        self._ready.set()
+
+    def __stop(self):
+        for worker in self._workers:
+            try:
+                worker.connection.send(("stop",))
+            except OSError:
+                pass
+        # cancelled workers may be in the middle of a file, they are killed at once
+        deadline = time.monotonic() + (0 if self._cancel else 5)
+        for worker in self._workers:
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.connection.close()
+        with self._lock:
+            self._wake.close()
+        self._wakeup.close()
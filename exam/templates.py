@@ -0,0 +1,128 @@
+"""
+Layouts from layouts.ini compiled once into fractions of slide width and height
+"""
+import configparser
+import re
+from functools import lru_cache
+
+import exam.config as configuration
+
+ROLES = ("title", "images", "text")
+# "3*2-w" is 2/3 of width, "4-h" is 1/4 of height, "0-e" is zero
+TOKEN = re.compile(r"^\s*(\d+)\s*(?:\*\s*(\d+)\s*)?-\s*([ewh])\s*$")
+AXES = {"w": 0, "h": 1}
+
+# compiled layouts the scaled cache was built for
+_scaled_for = None
+
+
+def parse_token(token):
+    """Returns (axis, divisor, multiplier) of one value of a layout rectangle, the value is size[axis] / d * m"""
+    match = TOKEN.match(token)
+    if match is None:
+        raise ValueError(f"Wrong layout value {token!r}, expected something like 2-w, 3*2-h or 0-e")
+    divisor, multiplier, axis = match.groups()
+    if axis == "e":
+        return 0, 1, 0
+    if int(divisor) == 0:
+        raise ValueError(f"Wrong layout value {token!r}, divisor can't be zero")
+    return AXES[axis], int(divisor), int(multiplier or 1)
+
+
+def compile_rectangles(value):
+    """
+    "0-e,0-e,3-w,2-h|3-w,2-h,3-w,2-h" -> array of shape (rectangles, 4, 3) with axis, divisor and multiplier
+    for left, top, width and height of each rectangle
+    """
+    import numpy as np
+    rectangles = []
+    for rectangle in value.split("|"):
+        tokens = rectangle.split(",")
+        if len(tokens) != 4:
+            raise ValueError(f"Wrong layout rectangle {rectangle!r}, expected left,top,width,height")
+        rectangles.append([parse_token(token) for token in tokens])
+    return np.array(rectangles, dtype=float).reshape(-1, 4, 3)
+
+
+def compile_layout(section):
+    """{slide: {role: rectangles}} for a section of layouts.ini, keys are like title_2 or images_3"""
+    import numpy as np
+    result = {2: {role: np.empty((0, 4, 3)) for role in ROLES}, 3: {role: np.empty((0, 4, 3)) for role in ROLES}}
+    for place, value in section.items():
+        role, slide = place.rsplit("_", 1)
+        result.setdefault(int(slide), {r: np.empty((0, 4, 3)) for r in ROLES})[role] = compile_rectangles(value)
+    return result
+
+
+def compile_layouts(path):
+    layouts = configparser.ConfigParser()
+    layouts.read(path)
+    return {name: compile_layout(layouts[name]) for name in layouts}
+
+
+def compiled_layouts():
+    """Compiled layouts.ini, parsed again only when the file changes"""
+    global _scaled_for
+    compiled = configuration.cached(configuration.LAYOUTS_PATH, "layouts", compile_layouts)
+    if compiled is not _scaled_for:
+        _scaled_for = compiled
+        _scaled_layout.cache_clear()
+        _stacked_layouts.cache_clear()
+    return compiled
+
+
+def layout_names():
+    return list(compiled_layouts())
+
+
+def scaled_layout(lt, width, height):
+    """{slide: {role: array of shape (rectangles, 4)}} in px for the slide size, None for unknown layout"""
+    compiled_layouts()
+    return _scaled_layout(lt, width, height)
+
+
+@lru_cache(maxsize=256)
+def _scaled_layout(lt, width, height):
+    layout = _scaled_for.get(lt)
+    if layout is None:
+        return None
+    import numpy as np
+    size = np.array([width, height], dtype=float)
+    return {
+        slide: {
+            role: size[rectangles[..., 0].astype(int)] / rectangles[..., 1] * rectangles[..., 2]
+            for role, rectangles in roles.items()
+        }
+        for slide, roles in layout.items()
+    }
+
+
+def stacked_layouts(width, height, slides=(2, 3)):
+    """
+    Every layout scaled to the slide size in one array per slide, for matching all of them at once.
+    Returns (names, {slide: (regions, roles)}): regions is an array of shape (layouts, most regions, 4) with left, top,
+    width and height in px, roles has shape (layouts, most regions) with indexes of ROLES and -1 for padding
+    """
+    compiled_layouts()
+    return _stacked_layouts(width, height, tuple(slides))
+
+
+@lru_cache(maxsize=64)
+def _stacked_layouts(width, height, slides):
+    import numpy as np
+    names = tuple(_scaled_for)
+    scaled = [_scaled_layout(name, width, height) for name in names]
+    stacked = {}
+    for slide in slides:
+        per_layout = [[(ROLES.index(role), rectangles) for role, rectangles in layout.get(slide, {}).items()]
+                      for layout in scaled]
+        most = max([sum(len(rectangles) for _, rectangles in roles) for roles in per_layout] + [1])
+        regions, roles = np.zeros((len(names), most, 4)), np.full((len(names), most), -1)
+        for index, layout in enumerate(per_layout):
+            position = 0
+            for role, rectangles in layout:
+                regions[index, position:position + len(rectangles)] = rectangles
+                roles[index, position:position + len(rectangles)] = role
+                position += len(rectangles)
+        stacked[slide] = regions, roles
+    return names, stacked
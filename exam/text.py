@@ -0,0 +1,260 @@
+"""
+Measurement of the visible text of a text frame from its runs, with glyph metrics of local font files.
+Never changes the presentation, works the same for COM and ooxml backends
+"""
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import exam.config as configuration
+from .constants import msoTrue, msoFalse
+
+# fonts are loaded once at this size, widths are scaled linearly
+UNIT_SIZE = 100
+# used when the font file isn't found: average glyph width and line height relative to the font size
+AVERAGE_GLYPH_WIDTH = 0.5
+LINE_HEIGHT = 1.2
+FONT_SUFFIXES = ('.ttf', '.otf', '.ttc')
+# ppParagraphAlignment and msoVerticalAnchor values of COM
+COM_ALIGNMENTS = {1: "l", 2: "ctr", 3: "r", 4: "just", 5: "dist"}
+COM_ANCHORS = {1: "t", 2: "t", 3: "ctr", 4: "b", 5: "b"}
+ppAutoSizeShapeToFitText = 1
+
+
+class Run:
+    __slots__ = ("text", "size", "name", "bold", "italic")
+
+    def __init__(self, text, size, name, bold=False, italic=False):
+        self.text, self.size, self.name, self.bold, self.italic = text, size, name, bold, italic
+
+
+class Paragraph:
+    """line_spacing is a multiple of the line height, line_points is an exact line height in points if set"""
+    __slots__ = ("runs", "align", "level", "line_spacing", "size", "line_points")
+
+    def __init__(self, runs, align, level, line_spacing, size, line_points=None):
+        self.runs, self.align, self.level, self.line_spacing, self.size = runs, align, level, line_spacing, size
+        self.line_points = line_points
+
+    @property
+    def text(self):
+        return "".join(run.text for run in self.runs)
+
+
+class Frame:
+    """
+    Text of a shape and how it's placed: margins (left, top, right, bottom) in points, wrap, anchor t/ctr/b,
+    font_scale and spacing_reduction of normal autofit, fit_shape if the shape is resized to fit the text
+    """
+    __slots__ = ("paragraphs", "margins", "wrap", "anchor", "font_scale", "spacing_reduction", "fit_shape")
+
+    def __init__(self, paragraphs, margins, wrap=True, anchor="t", font_scale=1.0, spacing_reduction=0.0,
+                 fit_shape=False):
+        self.paragraphs, self.margins, self.wrap, self.anchor = paragraphs, margins, wrap, anchor
+        self.font_scale, self.spacing_reduction, self.fit_shape = font_scale, spacing_reduction, fit_shape
+
+
+def font_directories():
+    directories = []
+    custom = configuration.get_settings().fonts_directory
+    if custom:
+        directories.append(Path(custom))
+    if os.name == 'nt':
+        directories.append(Path(os.environ.get("WINDIR", "C:/Windows"), "Fonts"))
+        directories.append(Path(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Fonts"))
+    elif sys.platform == "darwin":
+        directories.extend([Path("/Library/Fonts"), Path("/System/Library/Fonts"), Path.home() / "Library/Fonts"])
+    else:
+        directories.extend([Path("/usr/share/fonts"), Path("/usr/local/share/fonts"), Path.home() / ".fonts",
+                            Path.home() / ".local/share/fonts"])
+    return [directory for directory in directories if directory.is_dir()]
+
+
+@lru_cache(maxsize=None)
+def font_files():
+    """(family in lower case, bold, italic) -> path of the font file for every font in font_directories"""
+    from PIL import ImageFont
+    files = {}
+    for directory in font_directories():
+        for path in sorted(directory.rglob("*")):
+            if path.suffix.lower() not in FONT_SUFFIXES:
+                continue
+            try:
+                family, style = ImageFont.truetype(str(path), 10).getname()
+            except OSError:
+                continue
+            style = (style or "").lower()
+            key = ((family or path.stem).lower(), "bold" in style, "italic" in style or "oblique" in style)
+            files.setdefault(key, str(path))
+    return files
+
+
+@lru_cache(maxsize=256)
+def load_font(name, bold=False, italic=False):
+    """FreeTypeFont of UNIT_SIZE or None if there is no such font on this machine"""
+    from PIL import ImageFont
+    files, family = font_files(), (name or "").lower()
+    for key in ((family, bold, italic), (family, bold, False), (family, False, False)):
+        if key in files:
+            return ImageFont.truetype(files[key], UNIT_SIZE)
+    for (font_family, font_bold, font_italic), path in files.items():
+        if font_family == family:
+            return ImageFont.truetype(path, UNIT_SIZE)
+    return None
+
+
+@lru_cache(maxsize=8192)
+def text_width(name, size, text, bold=False, italic=False):
+    """Width of text in points"""
+    font = load_font(name, bold, italic)
+    if font is None:
+        return len(text) * size * AVERAGE_GLYPH_WIDTH
+    return font.getlength(text) * size / UNIT_SIZE
+
+
+@lru_cache(maxsize=1024)
+def line_height(name, size, bold=False, italic=False):
+    """Height of one line with single spacing in points"""
+    font = load_font(name, bold, italic)
+    if font is None:
+        return size * LINE_HEIGHT
+    ascent, descent = font.getmetrics()
+    return max((ascent + descent) / UNIT_SIZE, LINE_HEIGHT) * size
+
+
+def _lines(paragraph):
+    """Splits paragraph by line breaks into lists of runs"""
+    lines = [[]]
+    for run in paragraph.runs:
+        parts = run.text.split("\x0b")
+        for number, part in enumerate(parts):
+            if number:
+                lines.append([])
+            if part:
+                lines[-1].append(Run(part, run.size, run.name, run.bold, run.italic))
+    return lines
+
+
+def _break_word(run, size, word, available):
+    """Widths of the lines of a word wider than available broken between characters, each line has a character"""
+    widths, start = [], 0
+    for end in range(2, len(word) + 1):
+        # end is at least start + 2, a line never gets less than one character
+        if text_width(run.name, size, word[start:end], run.bold, run.italic) > available:
+            widths.append(text_width(run.name, size, word[start:end - 1], run.bold, run.italic))
+            start = end - 1
+    widths.append(text_width(run.name, size, word[start:], run.bold, run.italic))
+    return widths
+
+
+def _wrap(runs, available, scale):
+    """
+    Greedy word wrap of the runs of one line, returns width of every wrapped line. A word wider than available starts
+    a new line and is broken between characters, as PowerPoint does
+    """
+    widths, current, pending_space = [], 0.0, 0.0
+    for run in runs:
+        size = run.size * scale
+        for number, word in enumerate(run.text.split(" ")):
+            if number:
+                pending_space += text_width(run.name, size, " ", run.bold, run.italic)
+            if not word:
+                continue
+            width = text_width(run.name, size, word, run.bold, run.italic)
+            if available is not None and width > available:
+                if current:
+                    widths.append(current)
+                *lines, current = _break_word(run, size, word, available)
+                widths.extend(lines)
+            elif current and available is not None and current + pending_space + width > available:
+                widths.append(current)
+                current = width
+            else:
+                current += pending_space + width
+            pending_space = 0.0
+    widths.append(current)
+    return widths
+
+
+def frame_bounds(frame, left, top, width, height):
+    """Tight (left, top, width, height) of the visible text of the frame in the shape geometry, in points"""
+    margin_left, margin_top, margin_right, margin_bottom = frame.margins
+    available = max(width - margin_left - margin_right, 0)
+    boxes = []
+    for paragraph in frame.paragraphs:
+        for runs in _lines(paragraph):
+            visible = [run for run in runs if run.text.strip()]
+            sizes = visible or [Run("", paragraph.size, runs[0].name if runs else "")]
+            tallest = max(sizes, key=lambda run: run.size)
+            scale = frame.font_scale
+            if paragraph.line_points:
+                single = paragraph.line_points
+            else:
+                single = (line_height(tallest.name, tallest.size * scale, tallest.bold, tallest.italic) *
+                          paragraph.line_spacing * (1 - frame.spacing_reduction))
+            if not visible:
+                boxes.append((0.0, single, paragraph.align, False))
+                continue
+            runs[-1] = Run(runs[-1].text.rstrip(), runs[-1].size, runs[-1].name, runs[-1].bold, runs[-1].italic)
+            for line_width in _wrap(runs, available if frame.wrap else None, scale):
+                boxes.append((line_width, single, paragraph.align, True))
+    while boxes and not boxes[-1][3]:
+        boxes.pop()
+    if not boxes:
+        return left + margin_left, top + margin_top, 0, 0
+    text_height = sum(box[1] for box in boxes)
+    text_top = top + margin_top
+    if not frame.fit_shape:
+        if frame.anchor == "ctr":
+            text_top += (height - margin_top - margin_bottom - text_height) / 2
+        elif frame.anchor == "b":
+            text_top = top + height - margin_bottom - text_height
+    lefts, rights = [], []
+    for line_width, _, align, visible in boxes:
+        if not visible:
+            continue
+        line_left = left + margin_left
+        if align == "ctr":
+            line_left += (available - line_width) / 2
+        elif align == "r":
+            line_left += available - line_width
+        lefts.append(line_left)
+        rights.append(line_left + line_width)
+    return min(lefts), text_top, max(rights) - min(lefts), text_height
+
+
+def com_frame(Shape):
+    """Frame of a COM shape, reads runs and paragraph formats without changing anything"""
+    TextFrame = Shape.TextFrame
+    paragraphs, Range = [], TextFrame.TextRange
+    for i in range(1, Range.Paragraphs().Count + 1):
+        ParagraphRange = Range.Paragraphs(i)
+        runs = []
+        for j in range(1, ParagraphRange.Runs().Count + 1):
+            RunRange = ParagraphRange.Runs(j)
+            Font = RunRange.Font
+            runs.append(Run(RunRange.Text.rstrip("\r"), Font.Size, Font.Name, Font.Bold == msoTrue,
+                            Font.Italic == msoTrue))
+        Format = ParagraphRange.ParagraphFormat
+        spacing, points = 1.0, None
+        if Format.LineRuleWithin == msoTrue:
+            spacing = Format.SpaceWithin
+        else:
+            points = Format.SpaceWithin
+        paragraphs.append(Paragraph(runs, COM_ALIGNMENTS.get(Format.Alignment, "l"), ParagraphRange.IndentLevel - 1,
+                                    spacing, ParagraphRange.Font.Size, points))
+    return Frame(
+        paragraphs,
+        (TextFrame.MarginLeft, TextFrame.MarginTop, TextFrame.MarginRight, TextFrame.MarginBottom),
+        wrap=TextFrame.WordWrap != msoFalse,
+        anchor=COM_ANCHORS.get(TextFrame.VerticalAnchor, "t"),
+        fit_shape=TextFrame.AutoSize == ppAutoSizeShapeToFitText,
+    )
+
+
+def text_bounds(Shape):
+    """Tight (left, top, width, height) of the visible text of a shape of any backend, in points"""
+    TextFrame = Shape.TextFrame
+    frame = TextFrame.frame() if hasattr(TextFrame, "frame") else com_frame(Shape)
+    return frame_bounds(frame, Shape.Left, Shape.Top, Shape.Width, Shape.Height)
@@ -2,26 +2,25 @@ import os
 import shutil
 from pathlib import Path
 
-from win32com.client import Dispatch
-
 import exam.config as configuration
+from .profiling import profiled
+from .session import get_session
+from .hashindex import get_index
+from .templates import scaled_layout
+from .text import text_bounds
 from .constants import (msoTrue, msoPicture, msoLinkedPicture, msoPlaceholder, ppPlaceholderCenterTitle,
                         ppPlaceholderTitle, ppPlaceholderSubtitle, ppPlaceholderPicture, msoScaleFromTopLeft)
 
-Application = Dispatch("PowerPoint.Application")
-config, layouts = configuration.get_constants(), configuration.get_layouts()
-text_out_of_bounds = int(config['text out of bounds'])
-text_dimensions_average = int(config['text dimensions average'])
-
 
 def pt_to_px(value):
     return round(value / 72 * 96)
 
 
-def is_text(Shape):
+def is_text(Shape, dims=None):
     if Shape.HasTextFrame and Shape.Visible == msoTrue:
         if Shape.TextFrame.HasText:
-            dims = get_shape_dimensions(Shape)
+            dims = dims or get_shape_dimensions(Shape)
+            text_out_of_bounds = configuration.get_settings().text_out_of_bounds
             if dims["left"] < text_out_of_bounds or dims['top'] < text_out_of_bounds:
                 return None
             return True
@@ -51,33 +50,14 @@ def is_title(Shape):
 def get_shape_dimensions(Shape):
     if Shape.HasTextFrame:
         if Shape.TextFrame.HasText:
-            movement_counter = 0
-            text_length = Shape.TextFrame.TextRange.Length
-            # if shape has text, we delete all end characters like enter, vertical tab, spaces, etc
-            while (Shape.TextFrame.TextRange.Characters(text_length, 1).Text == chr(13) or
-                   Shape.TextFrame.TextRange.Characters(text_length, 1).Text == chr(11) or
-                   Shape.TextFrame.TextRange.Characters(text_length, 1).Text == chr(10) or
-                   Shape.TextFrame.TextRange.Characters(text_length, 1).Text == chr(32)):
-                Shape.TextFrame.TextRange.Characters(text_length, 1).Delete()
-                text_length -= 1
-                movement_counter += 1
-            else:
-                Range = Shape.TextFrame.TextRange
-                TextFrame = Shape.TextFrame
-                # int 7 that is experimental average value
-                shape_t = pt_to_px(Range.BoundTop) - pt_to_px(TextFrame.MarginTop) + text_dimensions_average
-                shape_l = pt_to_px(Range.BoundLeft) - pt_to_px(TextFrame.MarginLeft) + text_dimensions_average
-                shape_w = pt_to_px(Range.BoundWidth) - pt_to_px(TextFrame.MarginRight) - text_dimensions_average
-                shape_h = pt_to_px(Range.BoundHeight) - pt_to_px(TextFrame.MarginBottom) - text_dimensions_average
-                # undo all what we deleted, because for some reason, this changes saved in presentation
-                for i in range(movement_counter):
-                    Application.StartNewUndoEntry()
-                return {
-                    'left': shape_l,
-                    'top': shape_t,
-                    'width': shape_w,
-                    'height': shape_h
-                }
+            # bounds of the visible text, trailing line breaks and spaces are not counted
+            left, top, width, height = text_bounds(Shape)
+            return {
+                'left': pt_to_px(left),
+                'top': pt_to_px(top),
+                'width': pt_to_px(width),
+                'height': pt_to_px(height)
+            }
     return {
         'top': pt_to_px(Shape.Top),
         'left': pt_to_px(Shape.Left),
@@ -100,6 +80,7 @@ def get_shape_crop_values(Shape):
         return None
 
 
+@profiled
 def get_shape_percentage_width_height(Shape, original_w_h=False):
     shape_width, shape_height = Shape.Width, Shape.Height
     Shape.ScaleWidth(1, msoTrue, msoScaleFromTopLeft)
@@ -137,6 +118,27 @@ def check_collision_between_shapes(first_shape, second_shape):
     return False
 
 
+@profiled
+def find_overlaps(rectangles):
+    """
+    Sweep and prune over rectangles sorted by left edge. Returns (i, j, area) for every pair of intersecting
+    rectangles where i < j are their indexes and area is the intersection area. Touching edges don't intersect,
+    like in check_collision_between_shapes
+    """
+    bounds = [(r['left'], r['top'], r['left'] + r['width'], r['top'] + r['height']) for r in rectangles]
+    overlaps, active = [], []
+    for i in sorted(range(len(bounds)), key=lambda k: bounds[k][0]):
+        left, top, right, bottom = bounds[i]
+        active = [j for j in active if bounds[j][2] > left]
+        for j in active:
+            other = bounds[j]
+            if right > other[0] and left < other[2] and bottom > other[1] and top < other[3]:
+                area = (min(right, other[2]) - max(left, other[0])) * (min(bottom, other[3]) - max(top, other[1]))
+                overlaps.append((min(i, j), max(i, j), area))
+        active.append(i)
+    return sorted(overlaps)
+
+
 def get_download_path():
     """Returns the default downloads path for linux or windows"""
     if os.name == 'nt':
@@ -166,53 +168,37 @@ def dict_to_string(dictionary, qml_color_wrongs=None):
         return '\n'.join(result)
 
 
-def open_presentation(path):
-    Application.Presentations.Open(path)
+@profiled
+def open_presentation(path, backend="com"):
+    """Opens the presentation in the session of the backend, close it with get_session(backend).close(Presentation)"""
+    return get_session(backend).open(path)
 
 
-def upload_images(from_directory):
+@profiled
+def upload_images(from_directory, to_directory="original_images"):
     f_dir = Path(from_directory).resolve()
     if f_dir.is_dir():
-        path = Path('original_images').resolve()
+        path = Path(to_directory).resolve()
         if path.exists():
             shutil.rmtree(path, ignore_errors=True)
         path.mkdir(parents=True)
         for filename in f_dir.iterdir():
             if filename.suffix in ['.png', '.jpg', '.jpeg']:
                 shutil.copy(filename, path, follow_symlinks=True)
+        get_index(path)
         return True
     return False  # TODO generate expression here
 
 
+@profiled
 def layout_to_dict(width, height, lt="DEFAULT"):
-    result = {
-        2: {"title": [], "images": [], "text": []},
-        3: {"title": [], "images": [], "text": []},
+    layout = scaled_layout(lt, width, height)
+    if layout is None:
+        return False
+    return {
+        slide: {
+            role: [dict(zip(("left", "top", "width", "height"), rectangle.tolist())) for rectangle in rectangles]
+            for role, rectangles in roles.items()
+        }
+        for slide, roles in layout.items()
     }
-    for layout in layouts:
-        if layout == lt:
-            for place in layouts[layout]:
-                slide, properties = int(place[-1]), layouts[layout][place].split("|")
-                for prop in properties:
-                    prop, temp, = prop.split(","), []
-                    for p in prop:
-                        if "e" in p:
-                            temp.append(0)
-                        elif "w" in p:
-                            if "*" in p:
-                                temp.append(float((width / int(p[0])) * int(p[2])))
-                            else:
-                                temp.append(float(width / int(p[0])))
-                        elif "h" in p:
-                            if "*" in p:
-                                temp.append(float((height / int(p[0])) * int(p[2])))
-                            else:
-                                temp.append(float(height / int(p[0])))
-                    result[slide][place.split("_")[0]].append({
-                        "left": temp[0],
-                        "top": temp[1],
-                        "width": temp[2],
-                        "height": temp[3],
-                    })
-            return result
-    return False
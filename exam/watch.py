@@ -0,0 +1,275 @@
+"""
+Grading of a folder while presentations are being submitted into it. A file is graded once it stops changing, graded
+files are recorded in a manifest that survives restarts, so only new and changed presentations are graded
+"""
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import sys
+import threading
+import time
+from concurrent.futures import wait
+from pathlib import Path
+
+from .batch import find_presentations, open_writer, status
+from .hashindex import file_digest
+from .supervisor import WorkerPool
+
+MANIFEST_VERSION = 1
+# with inotify the folder is still scanned this often, network file systems don't report changes made on other machines
+RESCAN = 30.0
+IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x4, 0x8, 0x40, 0x80, 0x100, 0x200
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class Manifest:
+    """
+    Graded files, path -> {size, mtime, digest, grade, error}, in a JSON file. A file is graded again only when its
+    size or mtime changed and then its sha256 differs from the graded one
+    """
+
+    def __init__(self, path):
+        self.path, self.files = Path(path), {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.files = data.get("files", {})
+
+    def save(self):
+        """Replaces the file at once, a restart never finds it half written"""
+        temp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, file, ensure_ascii=False)
+        os.replace(temp, self.path)
+
+    def unchanged(self, path, stat):
+        known = self.files.get(str(path))
+        return bool(known) and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns
+
+    def graded(self, path, digest):
+        """True if the content with digest was already graded at path, the file was only touched or copied over"""
+        known = self.files.get(str(path))
+        return bool(known) and digest is not None and known["digest"] == digest
+
+    def update(self, path, stat, digest, graded=None):
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "digest": digest}
+        if graded is not None:
+            entry.update(grade=graded["result"][5] if graded["result"] else None, error=graded["error"])
+        else:
+            entry.update(self.files.get(str(path), {}), size=stat.st_size, mtime=stat.st_mtime_ns)
+        self.files[str(path)] = entry
+
+    def __len__(self):
+        return len(self.files)
+
+
+class Inotify:
+    """Changes of watched directories through inotify of Linux, without any dependency"""
+    name = "inotify"
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watched = set()
+
+    def watch(self, directory):
+        directory = str(directory)
+        if directory not in self._watched:
+            if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK) < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._watched.add(directory)
+
+    def wait(self, timeout):
+        """True if something changed in watched directories within timeout seconds, the events are drained"""
+        ready = select.select([self._fd], [], [], timeout)[0]
+        if not ready:
+            return False
+        try:
+            while os.read(self._fd, 1 << 16):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+class Polling:
+    """Fallback without notifications, the folder is scanned every interval seconds"""
+    name = "polling"
+
+    def watch(self, directory):
+        pass
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+    def close(self):
+        pass
+
+
+def notifier(polling=False):
+    """Inotify where it's available, Polling otherwise"""
+    if not polling:
+        try:
+            return Inotify()
+        except (OSError, AttributeError):
+            # not Linux or no inotify in libc
+            pass
+    return Polling()
+
+
+class FolderWatcher:
+    """
+    Grades .pptx files in directory as they are submitted. A file is ready when its size and mtime didn't change for
+    settle seconds, ready files go to jobs supervised worker processes with at most jobs * 2 of them in flight, each
+    has timeout seconds (grade timeout s of config.ini by default), pictures are compared with references. Results
+    are appended to output (.sqlite by default, .csv or .jsonl) and the manifest is saved only after they are written,
+    a restart grades only what was not graded before
+    """
+
+    def __init__(self, directory, output="results.sqlite", manifest=None, jobs=None, backend="com", recursive=False,
+                 settle=2.0, interval=1.0, lazy=False, polling=False, timeout=None, references=None, log=sys.stderr):
+        self.directory, self.output = Path(directory).resolve(), Path(output)
+        self.manifest = Manifest(manifest or self.output.with_suffix(".manifest.json"))
+        self.jobs, self.backend, self.recursive = jobs or os.cpu_count() or 1, backend, recursive
+        self.settle, self.interval, self.lazy, self.timeout, self.log = settle, interval, lazy, timeout, log
+        self.references = references
+        self.notifier = notifier(polling)
+        # path -> (size, mtime, when this state was first seen), files that are still settling
+        self._settling = {}
+        # ready paths in the order they settled, path -> (future, stat, digest) of the ones being graded
+        self._ready, self._running = [], {}
+        self._events = queue.Queue()
+        self._pool = None
+        self.graded = 0
+
+    def scan(self, now=None):
+        """Moves files that stopped changing to the ready queue, returns seconds until the next one may settle"""
+        now = time.monotonic() if now is None else now
+        if self.recursive:
+            for root, _, _ in os.walk(self.directory):
+                self.notifier.watch(root)
+        else:
+            self.notifier.watch(self.directory)
+        settling, wake = {}, None
+        for path in find_presentations(self.directory, self.recursive):
+            try:
+                stat = path.stat()
+            except OSError:
+                # removed after it was listed
+                continue
+            if stat.st_size == 0 or path in self._running or path in self._ready:
+                continue
+            if self.manifest.unchanged(path, stat):
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            seen = self._settling.get(path)
+            since = seen[2] if seen and seen[:2] == state else now
+            if now - since >= self.settle:
+                self._ready.append(path)
+            else:
+                settling[path] = state + (since,)
+                left = since + self.settle - now
+                wake = left if wake is None else min(wake, left)
+        self._settling = settling
+        return wake
+
+    def __pool(self):
+        if self._pool is None:
+            self._pool = WorkerPool(self.jobs, self.backend, self.timeout, self.references)
+        return self._pool
+
+    def submit(self):
+        """Sends ready files to the pool while there are free places, touched files with graded content are skipped"""
+        while self._ready and len(self._running) < self.jobs * 2:
+            path = self._ready.pop(0)
+            try:
+                stat = path.stat()
+                # a new file is hashed by the worker, a known one here, it may be only touched
+                digest = file_digest(path) if str(path) in self.manifest.files else None
+            except OSError:
+                continue
+            if self.manifest.graded(path, digest):
+                self.manifest.update(path, stat, digest)
+                self.manifest.save()
+                continue
+            future = self.__pool().submit(path, False, self.lazy)
+            future.add_done_callback(lambda _: self._events.put("graded"))
+            self._running[path] = (future, stat, digest)
+
+    def collect(self, file, writer):
+        """Writes results of the graded files, then records them in the manifest"""
+        done = [(path, entry) for path, entry in self._running.items() if entry[0].done()]
+        if not done:
+            return
+        for path, (future, stat, digest) in done:
+            del self._running[path]
+            # a hung or crashed worker gives a result with the error, the file is graded again when it changes
+            graded = future.result()
+            writer.write(graded)
+            self.manifest.update(path, stat, graded["digest"] or digest, graded)
+            self.graded += 1
+            print(f"{graded['file']}: {status(graded)} ({graded['seconds']:.2f} с)", file=self.log)
+        file.flush()
+        self.manifest.save()
+
+    def run(self, stop=None):
+        """Watches the directory until stop (threading.Event) is set or KeyboardInterrupt"""
+        stop = stop or threading.Event()
+        print(f"Наблюдение за {self.directory} ({self.notifier.name}), проверено ранее: {len(self.manifest)}",
+              file=self.log)
+        file, writer = open_writer(self.output, append=True)
+        listener = threading.Thread(target=self.__listen, args=(stop,), daemon=True)
+        listener.start()
+        try:
+            with file:
+                while not stop.is_set():
+                    wake = self.scan()
+                    self.submit()
+                    self.collect(file, writer)
+                    timeout = self.interval if isinstance(self.notifier, Polling) else RESCAN
+                    try:
+                        self._events.get(timeout=min(timeout, wake) if wake is not None else timeout)
+                    except queue.Empty:
+                        pass
+                if self._running:
+                    wait([future for future, _, _ in self._running.values()])
+                    self.collect(file, writer)
+        finally:
+            stop.set()
+            if self._pool is not None:
+                # interrupted files aren't in the manifest, they are graded after a restart
+                self._pool.shutdown(cancel_futures=True)
+            listener.join()
+            self.notifier.close()
+        return self.graded
+
+    def __listen(self, stop):
+        """Wakes up run on changes in the directory and when stop is set"""
+        while not stop.is_set():
+            if self.notifier.wait(0.5):
+                self._events.put("changed")
+        self._events.put("stop")
+
+
+def run_watch(directory, output="results.sqlite", **options):
+    watcher = FolderWatcher(directory, output, **options)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    print(f"Проверено файлов: {watcher.graded}", file=watcher.log)
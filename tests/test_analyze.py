@@ -0,0 +1,49 @@
+"""
+Grading of generated presentations with the ooxml backend, the lazy mode must give the same grade as the full one
+"""
+import pytest
+
+from benchmarks.generate import generate
+from exam.analyze import Analyze
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Analyze writes its files to temp of the working directory"""
+    monkeypatch.chdir(tmp_path)
+
+
+def analyze(path, lazy):
+    with Analyze(str(path), backend="ooxml", cache=False, lazy=lazy) as presentation:
+        return presentation.get("analyze")
+
+
+@pytest.fixture
+def empty_deck(tmp_path):
+    """Three slides with titles only, cheap structure checks already give grade 0"""
+    path = tmp_path / "empty.pptx"
+    generate(path, slides=3, shapes=0, images=0)
+    return path
+
+
+def test_lazy_mode_stops_before_costly_checks(empty_deck):
+    presentation, structure, fonts, images, layout, grade = analyze(empty_deck, lazy=True)
+    assert grade == 0
+    assert structure["Текстовые блоки на 2, 3 слайде"] == "Не выполнено"
+    assert images["Оригинальные картинки"] == "Не проверено"
+    assert structure["Соответствует макету"] == "Не проверено"
+    assert layout is None
+
+
+def test_lazy_mode_gives_the_grade_of_the_full_mode(empty_deck):
+    full = analyze(empty_deck, lazy=False)
+    assert full[-1] == analyze(empty_deck, lazy=True)[-1] == 0
+    assert full[3]["Оригинальные картинки"] != "Не проверено"
+    assert full[1]["Соответствует макету"] != "Не проверено"
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_single_slide_is_not_graded(tmp_path, lazy):
+    path = tmp_path / "single.pptx"
+    generate(path, slides=1)
+    assert analyze(path, lazy) is None
@@ -0,0 +1,82 @@
+"""
+Reading of picture headers and the content-addressed MediaStore of exam/media.py
+"""
+import io
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+from benchmarks.generate import generate
+from exam.analyze import Analyze
+from exam.media import MediaStore, image_info, link, member_picture_size
+
+
+def picture(image_format, size=(300, 150), **options):
+    data = io.BytesIO()
+    Image.new("RGB", size, "white").save(data, image_format, **options)
+    return data.getvalue()
+
+
+@pytest.mark.parametrize("image_format, dpi", [("PNG", 150), ("JPEG", 300), ("BMP", 72), ("TIFF", None)])
+def test_image_info_reads_size_and_resolution(image_format, dpi):
+    info = image_info(io.BytesIO(picture(image_format, dpi=(dpi, dpi)) if dpi else picture(image_format)))
+    if image_format == "TIFF":
+        assert info is None
+        return
+    width, height, resolution = info
+    assert (width, height) == (300, 150)
+    assert resolution == pytest.approx((dpi, dpi), abs=0.5)
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "JPEG", "GIF"])
+def test_image_info_without_resolution(image_format):
+    assert image_info(io.BytesIO(picture(image_format))) == (300, 150, None)
+
+
+def test_member_picture_size_in_points(tmp_path):
+    path = tmp_path / "media.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("ppt/media/image1.png", picture("PNG", dpi=(144, 144)))
+        archive.writestr("ppt/media/image2.png", picture("PNG"))
+        archive.writestr("ppt/media/image3.bin", b"not a picture")
+    with zipfile.ZipFile(path) as archive:
+        assert member_picture_size(archive, "ppt/media/image1.png") == pytest.approx((150, 75), abs=0.01)
+        # without a resolution in the header the picture is at PICTURE_DPI, as PowerPoint places it
+        assert member_picture_size(archive, "ppt/media/image2.png") == pytest.approx((225, 112.5))
+        assert member_picture_size(archive, "ppt/media/image3.bin") is None
+
+
+@pytest.mark.parametrize("scale, crop, distorted", [(1.0, 0, False), (1.0, 5000, False), (1.3, 0, True)])
+def test_distortion_of_pictures(tmp_path, monkeypatch, scale, crop, distorted):
+    # Analyze writes its files to temp of the working directory
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "pictures.pptx"
+    generate(path, slides=3, shapes=1, images=2, scale=scale, crop=crop)
+    with Analyze(str(path), backend="ooxml", cache=False) as presentation:
+        distortions = presentation.images.image_distortions()
+    assert len(distortions) == 6
+    for slide, name, width, height, distortion in distortions:
+        # width and height are percentages of the cropped original size, a picture stretched horizontally is wider
+        assert (width > height if distorted else width == height) and (distortion > 0) == distorted
+
+
+def test_eviction_keeps_linked_files(tmp_path):
+    root = tmp_path / "store"
+    store = MediaStore(root, max_bytes=250)
+    linked = link(store.write("aa" * 32, b"a" * 100, ".png"), tmp_path / "linked.png")
+    store.write("bb" * 32, b"b" * 100, ".png")
+    # the linked file is not counted, the store holds only bb
+    assert MediaStore(root).size == 100
+    for index, name in enumerate(("aa", "bb")):
+        os.utime(store.path(name * 32, ".png"), ns=(index, index))
+    store.write("cc" * 32, b"c" * 100, ".png")
+    store.write("dd" * 32, b"d" * 100, ".png")
+    # bb is the least recently used file the store owns, aa is older but removing it frees nothing
+    assert store.get("aa" * 32) is not None and linked.exists()
+    assert store.get("bb" * 32) is None
+    assert store.get("cc" * 32) is not None and store.get("dd" * 32) is not None
+    linked.unlink()
+    store.evict(100)
+    assert store.get("aa" * 32) is None
@@ -0,0 +1,70 @@
+"""
+OOXML backend on decks written by benchmarks/generate.py
+"""
+import pytest
+from PIL import Image
+
+from benchmarks.generate import generate, LAYOUT_TITLE, MASTER_TITLE
+from exam.backends import ooxml
+from exam.constants import msoPlaceholder, ppEffectNone, ppPlaceholderTitle, ppShapeFormatPNG
+
+
+@pytest.fixture
+def open_deck(tmp_path):
+    opened = []
+
+    def open_deck(**options):
+        presentation = ooxml.Presentation(str(generate(tmp_path / "deck.pptx", **options)))
+        opened.append(presentation)
+        return presentation
+
+    yield open_deck
+    for presentation in opened:
+        presentation.Close()
+
+
+@pytest.mark.parametrize("inherit, box", [(None, LAYOUT_TITLE), ("layout", LAYOUT_TITLE), ("master", MASTER_TITLE)])
+def test_title_geometry_is_inherited(open_deck, inherit, box):
+    presentation = open_deck(slides=2, inherit=inherit)
+    for Slide in presentation.Slides:
+        Title = Slide.Shapes(1)
+        assert Title.Type == msoPlaceholder
+        assert Title.PlaceholderFormat.Type == ppPlaceholderTitle
+        assert (Title.Left, Title.Top, Title.Width, Title.Height) == pytest.approx(
+            [value / ooxml.EMU_PER_PT for value in box])
+
+
+def test_transitions(open_deck):
+    presentation = open_deck(slides=3, transitions=2)
+    effects = [Slide.SlideShowTransition.EntryEffect for Slide in presentation.Slides]
+    assert effects[0] != ppEffectNone and effects[1] != ppEffectNone
+    assert effects[2] == ppEffectNone
+
+
+@pytest.mark.parametrize("animations", [0, 1, 3])
+def test_animation_counts(open_deck, animations):
+    presentation = open_deck(slides=2, shapes=4, animations=animations)
+    assert [Slide.TimeLine.MainSequence.Count for Slide in presentation.Slides] == [animations, animations]
+
+
+def test_shapes_and_page_setup(open_deck):
+    presentation = open_deck(slides=3, shapes=2, images=1)
+    assert presentation.Slides.Count == 3
+    assert len(list(presentation.Slides(2).Shapes)) == 4
+    assert presentation.PageSetup.SlideWidth == pytest.approx(960)
+    assert presentation.PageSetup.SlideHeight == pytest.approx(540)
+
+
+def test_export(open_deck, tmp_path):
+    presentation = open_deck(slides=1, shapes=1, images=1)
+    Slide = presentation.Slides(1)
+    Slide.Export(tmp_path / "slide.jpg", "JPG", 640)
+    with Image.open(tmp_path / "slide.jpg") as image:
+        assert image.format == "JPEG" and image.size == (640, 360)
+    Picture = Slide.Shapes(3)
+    Picture.Export(tmp_path / "picture.png", ppShapeFormatPNG)
+    with Image.open(tmp_path / "picture.png") as image:
+        assert image.format == "PNG"
+        assert image.size == pytest.approx((Picture.Width * 4 / 3, Picture.Height * 4 / 3), abs=1)
+    with pytest.raises(ValueError):
+        Slide.Export(tmp_path / "slide.svg", "SVG")
@@ -0,0 +1,93 @@
+"""
+ResultsDB: results keyed by the file, replaced when the file is graded again, found by content and criteria
+"""
+import csv
+import json
+import sqlite3
+
+import pytest
+
+from exam.results import FAILED, ResultsDB, export
+
+DONE = "Выполнено"
+
+
+def record(file, digest, grade=1, layout="DEFAULT", fonts=DONE, error=None):
+    if error:
+        return {"file": file, "digest": digest, "seconds": 0.5, "error": error}
+    return {"file": file, "digest": digest, "seconds": 0.5, "error": None,
+            "presentation": {"Соотношение сторон 16:9": DONE}, "structure": {"Три слайда в презентации": DONE},
+            "fonts": {"Размер шрифта": fonts}, "images": {"Картинки не искажены": DONE}, "layout": layout,
+            "grade": grade, "warnings": {"0": [], "1": [], "2": ["Текст выходит за слайд"], "3": []}}
+
+
+@pytest.fixture
+def database(tmp_path):
+    with ResultsDB(tmp_path / "results.sqlite") as results:
+        results.write(record("a.pptx", "1" * 64, grade=2))
+        results.write(record("b.pptx", "2" * 64, grade=0, fonts=FAILED))
+        results.write(record("c.pptx", "1" * 64, grade=2))
+        results.write(record("d.pptx", None, error="файл повреждён"))
+    return tmp_path / "results.sqlite"
+
+
+def test_results_are_keyed_by_file(database):
+    with ResultsDB(database) as results:
+        assert [r["file"] for r in results.records()] == ["a.pptx", "b.pptx", "c.pptx", "d.pptx"]
+        assert results.get("b.pptx")["grade"] == 0
+        assert results.get("d.pptx")["error"] == "файл повреждён"
+        assert results.get("e.pptx") is None
+
+
+def test_graded_again_file_replaces_its_result(database):
+    with ResultsDB(database) as results:
+        results.write(record("b.pptx", "3" * 64, grade=1))
+        # the last one of the same batch wins as well
+        results.write(record("a.pptx", "4" * 64, grade=0, fonts=FAILED))
+        results.write(record("a.pptx", "5" * 64, grade=1))
+    with ResultsDB(database) as results:
+        assert len(results.records()) == 4
+        assert results.get("b.pptx")["digest"] == "3" * 64 and results.get("a.pptx")["grade"] == 1
+        # criteria of the replaced results are gone with them
+        assert results.failing("Размер шрифта") == []
+        assert results.grade_distribution() == {None: {None: 1}, "DEFAULT": {1: 2, 2: 1}}
+
+
+def test_copies_and_failing(database):
+    with ResultsDB(database) as results:
+        assert results.copies() == [["a.pptx", "c.pptx"]]
+        assert results.failing("Размер шрифта") == [("b.pptx", "2" * 64)]
+        assert results.grade_distribution() == {None: {None: 1}, "DEFAULT": {0: 1, 2: 2}}
+
+
+def test_export_filters_by_grade_and_failing_criterion(database, tmp_path):
+    def files(**conditions):
+        path = export(database, tmp_path / "results.csv", **conditions)
+        with open(path, newline="", encoding="windows-1251") as file:
+            return [row[0] for row in list(csv.reader(file))[1:]]
+
+    assert files() == ["a.pptx", "b.pptx", "c.pptx", "d.pptx"]
+    assert files(grade=2) == ["a.pptx", "c.pptx"]
+    assert files(failing="Размер шрифта") == ["b.pptx"]
+    assert files(grade=2, failing="Размер шрифта") == []
+
+
+def test_database_keyed_by_digest_is_migrated(tmp_path):
+    path = tmp_path / "old.sqlite"
+    old = [record("a.pptx", "1" * 64), record("b.pptx", "1" * 64, grade=0), record("d.pptx", "file:d.pptx", error="x")]
+    connection = sqlite3.connect(str(path))
+    with connection:
+        connection.execute("CREATE TABLE presentations (digest TEXT PRIMARY KEY, file TEXT NOT NULL, grade INTEGER, "
+                           "layout TEXT, seconds REAL, error TEXT, graded_at REAL NOT NULL, record TEXT NOT NULL)")
+        connection.executemany("INSERT INTO presentations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               [(item["file"], item["file"], item.get("grade"), item.get("layout"), item["seconds"],
+                                 item["error"], number, json.dumps(item)) for number, item in enumerate(old)])
+    connection.close()
+    with ResultsDB(path) as results:
+        assert [r["file"] for r in results.records()] == ["a.pptx", "b.pptx", "d.pptx"]
+        assert results.copies() == [["a.pptx", "b.pptx"]]
+        # files that couldn't be read had their path as the digest
+        assert results.get("d.pptx")["digest"] is None
+        assert results.failing("Размер шрифта") == []
+    with ResultsDB(path) as results:
+        assert len(results.records()) == 3
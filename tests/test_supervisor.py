@@ -0,0 +1,101 @@
+"""
+WorkerPool with a stand-in of grade, so hangs, crashes and errors of workers are reproduced without PowerPoint
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from exam.service import GradingService, HttpError
+from exam.supervisor import WorkerPool
+
+DEADLINE = 3
+
+
+def standin(path, backend=None, profile=False, lazy=False):
+    """grade that hangs, is slow, crashes or raises depending on the name of the file"""
+    if "slow" in path:
+        time.sleep(2)
+    if "hang" in path:
+        time.sleep(60)
+    if "crash" in path:
+        os._exit(3)
+    if "raise" in path:
+        raise RuntimeError("broken presentation")
+    return {"file": path, "digest": None, "result": None, "warnings": None, "error": None, "seconds": 0.0}
+
+
+@pytest.fixture
+def pool():
+    with WorkerPool(2, "ooxml", DEADLINE, function=standin) as pool:
+        assert pool.ready(60)
+        yield pool
+
+
+def test_failures_dont_stop_other_files(pool):
+    names = ["a.pptx", "hang.pptx", "b.pptx", "crash.pptx", "raise.pptx", "c.pptx"]
+    results = {name: future.result(60) for name, future in [(name, pool.submit(name)) for name in names]}
+    for name in ("a.pptx", "b.pptx", "c.pptx"):
+        assert results[name]["error"] is None
+    assert results["hang.pptx"]["error"].startswith("Проверка не закончилась")
+    assert results["hang.pptx"]["seconds"] >= DEADLINE
+    assert "завершился аварийно, код 3" in results["crash.pptx"]["error"]
+    assert results["raise.pptx"]["error"] == "RuntimeError: broken presentation"
+    assert pool.counters["deadlines"] == 1 and pool.counters["crashes"] == 1
+
+
+def test_killed_workers_are_started_again(pool):
+    pool.submit("crash.pptx").result(60)
+    pool.submit("hang.pptx").result(60)
+    # files submitted after that are graded by the workers started in place of the killed ones
+    after = [future.result(60) for future in [pool.submit(f"{index}.pptx") for index in range(4)]]
+    assert all(result["error"] is None for result in after)
+    assert pool.counters["restarts"] == 2
+    assert pool.ready(0)
+
+
+def test_broken_backend_fails_files_and_service(tmp_path):
+    with WorkerPool(1, "missing", function=standin) as pool:
+        assert not pool.ready(60)
+        assert pool.error
+        assert pool.submit("a.pptx").result(10)["error"] == pool.error
+    service = GradingService(jobs=1, backend="missing", uploads=tmp_path)
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.start())
+    assert service.health()["status"] == "error"
+
+
+class RecordingPool(WorkerPool):
+    """WorkerPool of the service with the stand-in and a longer deadline, remembers the submitted files"""
+    submitted = []
+
+    def __init__(self, jobs, backend, timeout, references):
+        super().__init__(jobs, backend, DEADLINE, references, function=standin)
+
+    def submit(self, path, profile=False, lazy=False):
+        self.submitted.append(path.name.split("_", 1)[1])
+        return super().submit(path, profile, lazy)
+
+
+def test_timed_out_requests_are_not_graded(tmp_path, monkeypatch):
+    monkeypatch.setattr("exam.service.WorkerPool", RecordingPool)
+    service = GradingService(jobs=1, backend="ooxml", timeout=1, uploads=tmp_path)
+
+    async def main():
+        await service.start()
+        try:
+            results = await asyncio.gather(service.submit(b"", "slow.pptx"), service.submit(b"", "a.pptx"),
+                                           return_exceptions=True)
+            # the worker is free after the slow file, a.pptx is taken from the queue and skipped
+            while service.busy or service.health()["queue"]:
+                await asyncio.sleep(0.1)
+            return results
+        finally:
+            await service.stop()
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, HttpError) and result.status == 504 for result in results)
+    assert RecordingPool.submitted == ["slow.pptx"]
+    assert service.counters["timeouts"] == 2
+    assert not list(tmp_path.iterdir())
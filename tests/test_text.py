@@ -0,0 +1,44 @@
+"""
+Text measurement of exam/text.py with a font that isn't installed, so widths are AVERAGE_GLYPH_WIDTH of the size
+"""
+import pytest
+
+from exam.text import AVERAGE_GLYPH_WIDTH, LINE_HEIGHT, Frame, Paragraph, Run, frame_bounds
+
+FONT, SIZE = "No Such Font", 20
+GLYPH = SIZE * AVERAGE_GLYPH_WIDTH
+
+
+def bounds(text, width, wrap=True):
+    paragraph = Paragraph([Run(text, SIZE, FONT)], "l", 0, 1.0, SIZE)
+    return frame_bounds(Frame([paragraph], (5, 5, 5, 5), wrap), 0, 0, width, 500)
+
+
+def test_words_wrap_at_spaces():
+    left, top, width, height = bounds("abcd abcd abcd", 10 + GLYPH * 9)
+    assert width == pytest.approx(GLYPH * 9)
+    assert height == pytest.approx(SIZE * LINE_HEIGHT * 2)
+
+
+def test_long_word_is_broken_between_characters():
+    # 11 characters in a frame with room for 4 of them, PowerPoint breaks the word into 4 + 4 + 3
+    left, top, width, height = bounds("презентация", 10 + GLYPH * 4)
+    assert width == pytest.approx(GLYPH * 4)
+    assert height == pytest.approx(SIZE * LINE_HEIGHT * 3)
+
+
+def test_long_word_starts_a_new_line():
+    left, top, width, height = bounds("ab презентация", 10 + GLYPH * 5)
+    assert width <= GLYPH * 5 + 1e-9
+    # "ab", then "презе", "нтаци", "я"
+    assert height == pytest.approx(SIZE * LINE_HEIGHT * 4)
+
+
+def test_narrow_frame_keeps_a_character_per_line():
+    left, top, width, height = bounds("abc", 10)
+    assert width == pytest.approx(GLYPH)
+    assert height == pytest.approx(SIZE * LINE_HEIGHT * 3)
+
+
+def test_without_wrap_the_word_is_not_broken():
+    assert bounds("презентация", 10 + GLYPH * 4, wrap=False)[2] == pytest.approx(GLYPH * 11)